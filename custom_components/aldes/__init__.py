@@ -4,25 +4,179 @@ Custom integration to integrate Aldes with Home Assistant.
 For more details about this integration, please refer to
 https://github.com/guix77/homeassistant-aldes
 """
+import logging
+import time
+
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers import aiohttp_client
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
 
 from .api import AldesApi
-from .const import CONF_PASSWORD, CONF_USERNAME, DOMAIN, PLATFORMS
+from .const import (
+    CONF_HEDGED_FETCH,
+    CONF_HOURLY_STATISTICS,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_PASSWORD,
+    CONF_SNAPSHOT_MAX_AGE,
+    CONF_TOKEN,
+    CONF_USERNAME,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_SNAPSHOT_MAX_AGE,
+    DEFAULT_SCAN_INTERVAL,
+    DOMAIN,
+    PLATFORMS,
+    SNAPSHOT_STORAGE_VERSION,
+    STAGGER_STEP,
+)
 from .coordinator import AldesDataUpdateCoordinator
+from .session import async_close_session, async_get_session
+
+_LOGGER = logging.getLogger(__name__)
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Set up Aldes from a config entry."""
+    started = time.monotonic()
+    # Entries of a domain are set up concurrently, so the stagger slot is
+    # taken before the first await rather than from the entries set up so far.
+    slot = hass.config_entries.async_entries(DOMAIN).index(entry)
     api = AldesApi(
         entry.data[CONF_USERNAME],
         entry.data[CONF_PASSWORD],
-        aiohttp_client.async_get_clientsession(hass),
+        async_get_session(hass),
+        entry.options.get(CONF_HEDGED_FETCH, False),
+    )
+    # Also run when setup fails, so a retried setup does not leave the token
+    # refresh of the previous attempt running.
+    entry.async_on_unload(api.close)
+    if (token := entry.data.get(CONF_TOKEN)) is not None:
+        api.token_manager.restore(token["access_token"], token["expires_at"])
+
+    @callback
+    def _async_save_token(access_token: str, expires_at: float | None) -> None:
+        """Persist a new token with the entry."""
+        hass.config_entries.async_update_entry(
+            entry,
+            data={
+                **entry.data,
+                CONF_TOKEN: {"access_token": access_token, "expires_at": expires_at},
+            },
+        )
+
+    api.token_manager.on_refresh = _async_save_token
+    options = dict(entry.options)
+
+    async def _async_entry_updated(hass: HomeAssistant, entry: ConfigEntry) -> None:
+        """Reload when the options changed, not when only the token did."""
+        if entry.options != options:
+            await async_reload_entry(hass, entry)
+
+    entries = hass.data.setdefault(DOMAIN, {})
+    coordinator = AldesDataUpdateCoordinator(
+        hass,
+        api,
+        entry.options.get(CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL),
+        entry.options.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL),
+        _snapshot_store(hass, entry),
+        slot * STAGGER_STEP % DEFAULT_SCAN_INTERVAL,
+        entry.options.get(CONF_HOURLY_STATISTICS, False),
+    )
+    entry.async_on_unload(coordinator.reconciler.close)
+    entry.async_on_unload(coordinator.confirmer.close)
+    from_snapshot = await coordinator.async_load_snapshot(
+        entry.options.get(CONF_SNAPSHOT_MAX_AGE, DEFAULT_SNAPSHOT_MAX_AGE)
+    )
+    if not from_snapshot:
+        await coordinator.async_config_entry_first_refresh()
+    entries[entry.entry_id] = coordinator
+    coordinator.platforms = set(coordinator.index.platforms)
+    await hass.config_entries.async_forward_entry_setups(
+        entry, _in_order(coordinator.platforms)
+    )
+
+    forwarding: set[Platform] = set()
+
+    @callback
+    def _async_add_platforms() -> None:
+        """Set up the platforms needed by product types that appeared."""
+        platforms = coordinator.index.platforms - coordinator.platforms - forwarding
+        if not platforms:
+            return
+        forwarding.update(platforms)
+        entry.async_create_background_task(
+            hass,
+            _async_forward_platforms(platforms),
+            f"{DOMAIN}_{entry.entry_id}_platforms",
+        )
+
+    async def _async_forward_platforms(platforms: set[Platform]) -> None:
+        """Forward platforms, marking them loaded only once they are set up."""
+        # Newer Home Assistant versions want platforms forwarded after the
+        # entry is set up to go through async_late_forward_entry_setups.
+        forward = getattr(
+            hass.config_entries,
+            "async_late_forward_entry_setups",
+            hass.config_entries.async_forward_entry_setups,
+        )
+        try:
+            await forward(entry, _in_order(platforms))
+        except Exception as exception:  # pylint: disable=broad-except
+            _LOGGER.warning(
+                "Failed to set up Aldes platforms %s, retrying on the next "
+                "refresh: %s",
+                ", ".join(sorted(platforms)),
+                exception,
+            )
+        else:
+            coordinator.platforms |= platforms
+        finally:
+            forwarding.difference_update(platforms)
+
+    entry.async_on_unload(coordinator.async_add_listener(_async_add_platforms))
+    if from_snapshot:
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh(), f"{DOMAIN}_{entry.entry_id}_refresh"
+        )
+    entry.async_on_unload(entry.add_update_listener(_async_entry_updated))
+    _LOGGER.debug(
+        "Aldes set up in %.3f s %s",
+        time.monotonic() - started,
+        "from the cached snapshot" if from_snapshot else "after a live refresh",
     )
-    coordinator = AldesDataUpdateCoordinator(hass, api)
-    await coordinator.async_config_entry_first_refresh()
-    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
-    await coordinator.async_request_refresh()
     return True
+
+
+async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Unload an Aldes config entry."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    unload_ok = await hass.config_entries.async_unload_platforms(
+        entry, coordinator.platforms
+    )
+    if unload_ok:
+        del hass.data[DOMAIN][entry.entry_id]
+        if not hass.data[DOMAIN]:
+            await async_close_session(hass)
+    return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the cached snapshot of a deleted config entry."""
+    await _snapshot_store(hass, entry).async_remove()
+
+
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload an Aldes config entry after its options changed."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
+def _snapshot_store(hass: HomeAssistant, entry: ConfigEntry) -> Store:
+    """Return the store holding the last snapshot of a config entry."""
+    return Store(hass, SNAPSHOT_STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.snapshot")
+
+
+def _in_order(platforms: set[Platform]) -> list[Platform]:
+    """Return platforms in the order they are set up."""
+    return [platform for platform in PLATFORMS if platform in platforms]
@@ -0,0 +1,212 @@
+"""Hourly aggregates of Aldes measurements imported as long-term statistics."""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import datetime, timezone
+import logging
+from operator import attrgetter
+from typing import TYPE_CHECKING
+
+from homeassistant.const import (
+    CONCENTRATION_PARTS_PER_MILLION,
+    PERCENTAGE,
+    UnitOfTemperature,
+)
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import slugify
+
+from .const import DOMAIN
+
+if TYPE_CHECKING:
+    from .coordinator import AldesProductEntry
+
+_LOGGER = logging.getLogger(__name__)
+
+# Statistic name, indicator path, unit and scale of the EASYHOME measurements.
+SOURCES_BY_REFERENCE = {
+    "EASY_HOME_CONNECT": (
+        ("Kitchen Humidity", "hr_cu_co", PERCENTAGE, 1),
+        ("Kitchen Temperature", "tmp_cu", UnitOfTemperature.CELSIUS, 0.1),
+        ("Bathroom 1 Humidity", "hr_ba1_co", PERCENTAGE, 1),
+        ("Bathroom 1 Temperature", "tmp_ba1", UnitOfTemperature.CELSIUS, 0.1),
+        ("Bathroom 2 Humidity", "hr_ba2_co", PERCENTAGE, 1),
+        ("Bathroom 2 Temperature", "tmp_ba2", UnitOfTemperature.CELSIUS, 0.1),
+        ("Carbon dioxyde", "co2", CONCENTRATION_PARTS_PER_MILLION, 1),
+        ("Air Quality Index", "qai.actual_value", None, 1),
+        ("Humidity Variation", "var_hr", PERCENTAGE, 1),
+    ),
+}
+
+
+def _reader(path: str):
+    """Return a function reading a dotted path, None if a parent is missing."""
+    parent, _, child = path.rpartition(".")
+    if not parent:
+        return attrgetter(path)
+    read_parent, read_child = attrgetter(parent), attrgetter(child)
+    return lambda indicator: (
+        None if (value := read_parent(indicator)) is None else read_child(value)
+    )
+
+
+COMPILED_SOURCES = {
+    reference: tuple(
+        (name, _reader(path), unit, scale) for name, path, unit, scale in sources
+    )
+    for reference, sources in SOURCES_BY_REFERENCE.items()
+}
+
+
+class HourlyAggregate:
+    """Minimum, maximum and running mean of the samples of one hour."""
+
+    __slots__ = ("hour", "count", "mean", "min", "max")
+
+    def __init__(self, hour: int) -> None:
+        """Initialize an empty aggregate for an hour given in UNIX hours."""
+        self.hour = hour
+        self.count = 0
+        self.mean = 0.0
+        self.min = float("inf")
+        self.max = float("-inf")
+
+    def add(self, value: float) -> None:
+        """Add a sample, updating the mean with Welford's recurrence."""
+        self.count += 1
+        self.mean += (value - self.mean) / self.count
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+
+class AldesHourlyStatistics:
+    """Aggregate measurements per hour and import the finished hours.
+
+    Only the aggregate of the current hour is kept for each measurement, so
+    memory does not grow with time. Finished hours are imported as external
+    statistics named aldes:<serial>_<measurement>. The aggregates are saved
+    with the snapshot, so an hour interrupted by a restart is imported once
+    it ends rather than lost; without a snapshot to load, it is lost.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize."""
+        self._hass = hass
+        self._aggregates: dict[str, HourlyAggregate] = {}
+        self._metadata: dict[str, tuple[str, str | None]] = {}
+        self.imported = 0
+
+    @callback
+    def record(self, products: Iterable[AldesProductEntry], timestamp: float) -> None:
+        """Add the measurements of a snapshot, importing the hours they close."""
+        hour = int(timestamp // 3600)
+        finished: list[tuple[str, HourlyAggregate]] = []
+        for product in products:
+            data = product.data
+            if not data.is_connected:
+                continue
+            for name, read, unit, scale in COMPILED_SOURCES.get(data.reference, ()):
+                value = read(data.indicator)
+                if value is not None:
+                    self._add(
+                        finished,
+                        f"{product.serial_number} {name}",
+                        f"{product.name} {name}",
+                        unit,
+                        hour,
+                        value * scale,
+                    )
+            for thermostat in data.indicator.thermostats:
+                if thermostat.current_temperature is not None:
+                    self._add(
+                        finished,
+                        f"{product.serial_number}_{thermostat.thermostat_id}",
+                        f"{product.name} {thermostat.name} temperature",
+                        UnitOfTemperature.CELSIUS,
+                        hour,
+                        thermostat.current_temperature,
+                    )
+        if finished:
+            self._async_import(finished)
+
+    def as_dict(self) -> dict[str, list]:
+        """Return the aggregates of the hours in progress for storage."""
+        return {
+            statistic_id: [
+                aggregate.hour,
+                aggregate.count,
+                aggregate.mean,
+                aggregate.min,
+                aggregate.max,
+                *self._metadata[statistic_id],
+            ]
+            for statistic_id, aggregate in self._aggregates.items()
+        }
+
+    def load(self, stored: dict[str, list]) -> None:
+        """Restore the aggregates of the hours in progress from storage."""
+        for statistic_id, (hour, count, mean, low, high, name, unit) in stored.items():
+            aggregate = self._aggregates[statistic_id] = HourlyAggregate(hour)
+            aggregate.count, aggregate.mean = count, mean
+            aggregate.min, aggregate.max = low, high
+            self._metadata[statistic_id] = (name, unit)
+
+    def _add(
+        self,
+        finished: list[tuple[str, HourlyAggregate]],
+        object_id: str,
+        name: str,
+        unit: str | None,
+        hour: int,
+        value: float,
+    ) -> None:
+        """Add a sample, setting aside the aggregate of a finished hour."""
+        statistic_id = f"{DOMAIN}:{slugify(object_id)}"
+        aggregate = self._aggregates.get(statistic_id)
+        if aggregate is None or aggregate.hour != hour:
+            if aggregate is not None and aggregate.count:
+                finished.append((statistic_id, aggregate))
+            aggregate = self._aggregates[statistic_id] = HourlyAggregate(hour)
+            self._metadata[statistic_id] = (name, unit)
+        aggregate.add(value)
+
+    @callback
+    def _async_import(self, finished: list[tuple[str, HourlyAggregate]]) -> None:
+        """Import finished hours into the recorder, when it is loaded."""
+        if "recorder" not in self._hass.config.components:
+            return
+        # pylint: disable-next=import-outside-toplevel
+        from homeassistant.components.recorder.models import (
+            StatisticData,
+            StatisticMetaData,
+        )
+
+        # pylint: disable-next=import-outside-toplevel
+        from homeassistant.components.recorder.statistics import (
+            async_add_external_statistics,
+        )
+
+        for statistic_id, aggregate in finished:
+            name, unit = self._metadata[statistic_id]
+            async_add_external_statistics(
+                self._hass,
+                StatisticMetaData(
+                    has_mean=True,
+                    has_sum=False,
+                    name=name,
+                    source=DOMAIN,
+                    statistic_id=statistic_id,
+                    unit_of_measurement=unit,
+                ),
+                [
+                    StatisticData(
+                        start=datetime.fromtimestamp(
+                            aggregate.hour * 3600, tz=timezone.utc
+                        ),
+                        mean=aggregate.mean,
+                        min=aggregate.min,
+                        max=aggregate.max,
+                    )
+                ],
+            )
+            self.imported += 1
+        _LOGGER.debug("Imported %d hourly Aldes statistics", len(finished))
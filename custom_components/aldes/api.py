@@ -1,7 +1,23 @@
 """Sample API Client."""
 # from typing import Dict
+import asyncio
+import hashlib
+import json
+import time
+from urllib.parse import urlsplit
+
 import aiohttp
+from .auth import AldesTokenManager
 from .const import TEXT_MODES
+from .metrics import AldesMetrics
+from .models import decode_products
+from .resilience import AldesCircuitBreaker, AldesRetryPolicy
+from .scheduler import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_NAMES,
+    AldesRequestScheduler,
+)
 
 
 class AldesApi:
@@ -11,75 +27,327 @@ class AldesApi:
     _API_URL_PRODUCTS = "https://aldesiotsuite-aldeswebapi.azurewebsites.net/aldesoc/v5/users/me/products"  # pylint: disable=line-too-long
     _AUTHORIZATION_HEADER_KEY = "Authorization"
     _TOKEN_TYPE = "Bearer"
+    _SETPOINT_DEBOUNCE = 0.5
+    _REQUEST_TIMEOUT = aiohttp.ClientTimeout(sock_connect=5, sock_read=10)
+    _AUTH_TIMEOUT = aiohttp.ClientTimeout(total=15)
+    _MAX_RESPONSE_SIZE = 4 * 1024 * 1024
 
     def __init__(
-        self, username: str, password: str, session: aiohttp.ClientSession
+        self,
+        username: str,
+        password: str,
+        session: aiohttp.ClientSession,
+        hedge: bool = False,
     ) -> None:
-        """Sample API Client."""
+        """Sample API Client.
+
+        With hedge, a products fetch slower than the recent p95 latency is
+        raced against a second request.
+        """
         self._username = username
         self._password = password
         self._session = session
-        self._token = ""
+        self.metrics = AldesMetrics()
+        self.token_manager = AldesTokenManager(self._login)
+        self.retry_policy = AldesRetryPolicy()
+        self.circuit_breaker = AldesCircuitBreaker()
+        self.scheduler = AldesRequestScheduler()
+        self.hedge = hedge
+        self._products = None
+        self._products_digest: bytes | None = None
+        self._products_etag: str | None = None
+        self._pending_setpoints: dict[str, dict[int, dict]] = {}
+        self._pending_setpoint_results: dict[str, asyncio.Future] = {}
+        self._setpoint_timers: dict[str, asyncio.TimerHandle] = {}
+        self._setpoint_flushes: dict[str, set[asyncio.Task]] = {}
 
     async def authenticate(self) -> None:
         """Get an access token."""
+        await self.token_manager.async_refresh(self.token_manager.token)
+
+    async def _login(self) -> tuple[str, int | None]:
+        """Run the password grant and return the token with its lifetime."""
         data: dict = {
             "grant_type": "password",
             "username": self._username,
             "password": self._password,
         }
 
-        async with self._session.post(self._API_URL_TOKEN, data=data) as response:
-            json = await response.json()
-            if response.status == 200:
-                self._token = json["access_token"]
-            else:
+        self.metrics.auth_refreshes += 1
+        started = time.perf_counter()
+        try:
+            async with self._session.post(
+                self._API_URL_TOKEN, data=data, timeout=self._AUTH_TIMEOUT
+            ) as response:
+                body = await self._read_limited(response)
+                if response.status == 200:
+                    payload = json.loads(body)
+                    return payload["access_token"], payload.get("expires_in")
+                self.metrics.auth_failures[f"http_{response.status}"] += 1
                 raise AuthenticationException()
+        except asyncio.TimeoutError:
+            self.metrics.auth_failures["timeout"] += 1
+            raise
+        except aiohttp.ClientError as exception:
+            self.metrics.auth_failures[type(exception).__name__] += 1
+            raise
+        finally:
+            self.metrics.record_latency("token", time.perf_counter() - started)
 
-    async def fetch_data(self):
-        """Fetch data."""
-        async with await self._request_with_auth_interceptor(
-            self._session.get, self._API_URL_PRODUCTS
+    async def fetch_data(self, priority=PRIORITY_BACKGROUND):
+        """Fetch and decode the products of the account.
+
+        The previous products are returned as is, without decoding, when the
+        cloud answers 304 to their ETag or sends the same bytes again.
+        """
+        headers = {}
+        if self._products is not None and self._products_etag is not None:
+            headers["If-None-Match"] = self._products_etag
+        self.metrics.fetches += 1
+        async with await self._hedged_request(
+            self._session.get,
+            self._API_URL_PRODUCTS,
+            priority=priority,
+            headers=headers,
         ) as response:
-            return await response.json()
+            if response.status == 304 and self._products is not None:
+                self.metrics.unchanged_payloads += 1
+                return self._products
+            body = await self._read_limited(response)
+            etag = response.headers.get("ETag")
+            if response.content_length is not None:
+                self.metrics.wire_bytes["products"] = response.content_length
+        self.metrics.payload_bytes["products"] = len(body)
+        digest = hashlib.blake2b(body, digest_size=16).digest()
+        if self._products is not None and digest == self._products_digest:
+            self._products_etag = etag
+            self.metrics.unchanged_payloads += 1
+            return self._products
+        started = time.perf_counter()
+        products = decode_products(json.loads(body))
+        self.metrics.decode_time = time.perf_counter() - started
+        self.metrics.changed_payloads += 1
+        self._products, self._products_digest = products, digest
+        self._products_etag = etag
+        return products
+
+    async def _read_limited(self, response) -> bytes:
+        """Read a response body, refusing bodies above the size limit."""
+        if (
+            response.content_length is not None
+            and response.content_length > self._MAX_RESPONSE_SIZE
+        ):
+            raise ResponseTooLargeException(response.content_length)
+        body = bytearray()
+        async for chunk in response.content.iter_chunked(64 * 1024):
+            body += chunk
+            if len(body) > self._MAX_RESPONSE_SIZE:
+                raise ResponseTooLargeException(len(body))
+        return bytes(body)
 
     async def set_target_temperature(
         self, modem, thermostat_id, thermostat_name, target_temperature
     ):
-        """Set target temperature."""
-        async with await self._request_with_auth_interceptor(
-            self._session.patch,
-            f"{self._API_URL_PRODUCTS}/{modem}/updateThermostats",
-            json=[
-                {
-                    "ThermostatId": thermostat_id,
-                    "Name": thermostat_name,
-                    "TemperatureSet": int(target_temperature),
-                }
-            ],
-        ) as response:
-            return await response.json()
+        """Set target temperature.
+
+        Setpoints for the same modem received within a short window are sent
+        in a single request, the last one winning for each thermostat.
+        """
+        loop = asyncio.get_running_loop()
+        self._pending_setpoints.setdefault(modem, {})[thermostat_id] = {
+            "ThermostatId": thermostat_id,
+            "Name": thermostat_name,
+            "TemperatureSet": int(target_temperature),
+        }
+        result = self._pending_setpoint_results.get(modem)
+        if result is None:
+            result = loop.create_future()
+            self._pending_setpoint_results[modem] = result
+            self._setpoint_timers[modem] = loop.call_later(
+                self._SETPOINT_DEBOUNCE, self._start_setpoint_flush, modem
+            )
+        return await asyncio.shield(result)
+
+    def _start_setpoint_flush(self, modem) -> None:
+        """Send the setpoints gathered for a modem.
+
+        A new batch may start gathering while this one is in flight, so the
+        running flushes are kept apart from the pending timers.
+        """
+        del self._setpoint_timers[modem]
+        flushes = self._setpoint_flushes.setdefault(modem, set())
+        flush = asyncio.get_running_loop().create_task(
+            self._async_flush_setpoints(modem)
+        )
+        flushes.add(flush)
+        flush.add_done_callback(flushes.discard)
+
+    async def _async_flush_setpoints(self, modem) -> None:
+        """Send pending setpoints in one request and resolve their callers."""
+        setpoints = self._pending_setpoints.pop(modem)
+        result = self._pending_setpoint_results.pop(modem)
+        try:
+            async with await self._request(
+                self._session.patch,
+                f"{self._API_URL_PRODUCTS}/{modem}/updateThermostats",
+                priority=PRIORITY_INTERACTIVE,
+                json=list(setpoints.values()),
+            ) as response:
+                result.set_result(json.loads(await self._read_limited(response)))
+        except asyncio.CancelledError:
+            result.cancel()
+            raise
+        except Exception as exception:  # pylint: disable=broad-except
+            result.set_exception(exception)
 
-    async def _request_with_auth_interceptor(self, request, url, **kwargs):
+    async def _hedged_request(self, request, url, **kwargs):
+        """Send a request, racing a second one once the first is unusually slow.
+
+        The second request is only sent when the scheduler has a free slot
+        for it. The first response wins and the other request is cancelled,
+        or released when it completed too.
+        """
+        endpoint = url.rsplit("/", 1)[-1]
+        delay = self.metrics.latency_quantile(endpoint, 0.95) if self.hedge else None
+        if delay is None:
+            return await self._request(request, url, **kwargs)
+        primary = asyncio.ensure_future(self._request(request, url, **kwargs))
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+        except asyncio.CancelledError:
+            primary.cancel()
+            raise
+        if done:
+            return primary.result()
+        if not self.scheduler.has_free_slot(
+            urlsplit(url).netloc, kwargs.get("priority", PRIORITY_BACKGROUND)
+        ):
+            # A queued hedge would only delay other requests.
+            return await primary
+
+        self.metrics.hedged_fetches += 1
+        hedge = asyncio.ensure_future(self._request(request, url, **kwargs))
+        pending = {primary, hedge}
+        winner = None
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                winner = next((task for task in done if task.exception() is None), None)
+        finally:
+            for task in (primary, hedge):
+                if task is winner:
+                    continue
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled() and task.exception() is None:
+                    task.result().release()
+        if winner is None:
+            return primary.result()
+        if winner is hedge:
+            self.metrics.hedge_wins += 1
+        return winner.result()
+
+    async def _request(
+        self, request, url, idempotent=True, priority=PRIORITY_BACKGROUND, **kwargs
+    ):
+        """Send a request, retrying transient failures.
+
+        Requests that are not idempotent are only replayed when the cloud did
+        not process them: connection failures and 429 responses. Each attempt
+        waits for a scheduler slot, held until the response headers arrive.
+        """
+        host = urlsplit(url).netloc
+        kwargs.setdefault("timeout", self._REQUEST_TIMEOUT)
+        attempt = 0
+        while True:
+            self.circuit_breaker.before_call()
+            retry_after = None
+            try:
+                async with self.scheduler.slot(host, priority) as waited:
+                    self.metrics.record_queue_wait(PRIORITY_NAMES[priority], waited)
+                    started = time.perf_counter()
+                    response = await self._request_with_auth_interceptor(
+                        request, url, **kwargs
+                    )
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exception:
+                failure: Exception = exception
+                replayable = idempotent or isinstance(
+                    exception, aiohttp.ClientConnectorError
+                )
+            else:
+                self.metrics.record_latency(
+                    url.rsplit("/", 1)[-1], time.perf_counter() - started
+                )
+                if response.status != 429 and response.status < 500:
+                    self.circuit_breaker.record_success()
+                    return response
+                retry_after = response.headers.get("Retry-After")
+                response.release()
+                failure = aiohttp.ClientResponseError(
+                    response.request_info,
+                    response.history,
+                    status=response.status,
+                    message=response.reason or "",
+                    headers=response.headers,
+                )
+                replayable = idempotent or response.status == 429
+
+            self.circuit_breaker.record_failure()
+            delay = (
+                self.retry_policy.delay(attempt, retry_after) if replayable else None
+            )
+            if delay is None:
+                raise failure
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def _request_with_auth_interceptor(
+        self, request, url, headers=None, **kwargs
+    ):
         """Provide authentication to request."""
-        initial_response = await request(
+        token = await self.token_manager.async_get_token()
+        response = await request(
             url,
-            headers={self._AUTHORIZATION_HEADER_KEY: self._build_authorization()},
+            headers={
+                **(headers or {}),
+                self._AUTHORIZATION_HEADER_KEY: self._build_authorization(token),
+            },
             **kwargs,
         )
-        if initial_response.status == 401:
-            initial_response.close()
-            await self.authenticate()
-            return request(
+        if response.status == 401:
+            response.close()
+            token = await self.token_manager.async_refresh(token)
+            response = await request(
                 url,
-                headers={self._AUTHORIZATION_HEADER_KEY: self._build_authorization()},
+                headers={
+                    **(headers or {}),
+                    self._AUTHORIZATION_HEADER_KEY: self._build_authorization(token),
+                },
                 **kwargs,
             )
-        return initial_response
+        return response
 
-    def _build_authorization(self) -> str:
+    def _build_authorization(self, token: str) -> str:
         """Build authorization."""
-        return f"{self._TOKEN_TYPE} {self._token}"
+        return f"{self._TOKEN_TYPE} {token}"
+
+    def close(self) -> None:
+        """Release background resources."""
+        self.token_manager.close()
+        self.scheduler.close()
+        for timer in self._setpoint_timers.values():
+            timer.cancel()
+        self._setpoint_timers.clear()
+        for flushes in self._setpoint_flushes.values():
+            for flush in flushes:
+                flush.cancel()
+        self._setpoint_flushes.clear()
+        for result in self._pending_setpoint_results.values():
+            result.cancel()
+        self._pending_setpoint_results.clear()
+        self._pending_setpoints.clear()
 
     async def set_mode(self, modem, mode):
         """Set mode."""
@@ -91,14 +359,19 @@ class AldesApi:
             "params": [TEXT_MODES[mode]],
         }
 
-        async with await self._request_with_auth_interceptor(
+        async with await self._request(
             self._session.post,
             f"{self._API_URL_PRODUCTS}/{modem}/commands",
+            idempotent=False,
+            priority=PRIORITY_INTERACTIVE,
             json=body,
         ) as response:
             return response.raise_for_status()
-        # TO DO: Must verifiy if the request is OK. Sometime the aldes product is in force mode due to bad air quality.
 
 
 class AuthenticationException(Exception):
     """Exception"""
+
+
+class ResponseTooLargeException(Exception):
+    """Raised when a response body exceeds the size limit."""
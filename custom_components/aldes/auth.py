@@ -0,0 +1,130 @@
+"""Aldes access token lifecycle."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+import logging
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class AldesTokenManager:
+    """Keep an Aldes access token valid.
+
+    The token is refreshed in the background shortly before it expires, and
+    concurrent callers that need a new token share a single login.
+    """
+
+    _REFRESH_MARGIN = 300
+
+    def __init__(
+        self,
+        login: Callable[[], Awaitable[tuple[str, int | None]]],
+        on_refresh: Callable[[str, float | None], None] | None = None,
+    ) -> None:
+        """Initialize with a coroutine returning a token and its lifetime.
+
+        on_refresh is called with every new token and its expiry, so that the
+        token can be persisted and reused after a restart.
+        """
+        self._login = login
+        self.on_refresh = on_refresh
+        self._lock = asyncio.Lock()
+        self._token = ""
+        self._expires_at: float | None = None
+        self._refresh_handle: asyncio.TimerHandle | None = None
+        self._refresh_task: asyncio.Task | None = None
+        self.auth_calls = 0
+        self.saved_auth_calls = 0
+
+    @property
+    def token(self) -> str:
+        """Return the current token, possibly empty or expired."""
+        return self._token
+
+    @property
+    def expires_at(self) -> float | None:
+        """Return the token expiry as a UNIX timestamp, if known."""
+        return self._expires_at
+
+    @property
+    def is_valid(self) -> bool:
+        """Return whether the current token can still be used."""
+        return bool(self._token) and (
+            self._expires_at is None or time.time() < self._expires_at
+        )
+
+    def set_token(self, token: str, expires_in: int | None) -> None:
+        """Record a token and schedule its proactive refresh."""
+        self._token = token
+        self._expires_at = time.time() + expires_in if expires_in else None
+        self._schedule_refresh(expires_in)
+
+    def restore(self, token: str, expires_at: float | None) -> bool:
+        """Reuse a persisted token unless it expired, saving a login."""
+        if expires_at is None:
+            expires_in = None
+        elif (expires_in := expires_at - time.time()) <= 0:
+            return False
+        self._token = token
+        self._expires_at = expires_at
+        self._schedule_refresh(expires_in)
+        self.saved_auth_calls += 1
+        return True
+
+    async def async_get_token(self) -> str:
+        """Return a valid token, logging in first when needed."""
+        if self.is_valid:
+            return self._token
+        return await self.async_refresh(self._token)
+
+    async def async_refresh(self, stale_token: str) -> str:
+        """Replace a stale token, sharing one login between concurrent callers."""
+        async with self._lock:
+            if self._token != stale_token and self.is_valid:
+                self.saved_auth_calls += 1
+                return self._token
+            self.auth_calls += 1
+            token, expires_in = await self._login()
+            self.set_token(token, expires_in)
+            if self.on_refresh is not None:
+                self.on_refresh(token, self._expires_at)
+            return token
+
+    def close(self) -> None:
+        """Cancel any scheduled or running background refresh."""
+        if self._refresh_handle is not None:
+            self._refresh_handle.cancel()
+            self._refresh_handle = None
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+
+    def _schedule_refresh(self, expires_in: int | None) -> None:
+        """Schedule a background refresh ahead of the token expiry."""
+        if self._refresh_handle is not None:
+            self._refresh_handle.cancel()
+            self._refresh_handle = None
+        if not expires_in:
+            return
+        delay = max(expires_in - self._REFRESH_MARGIN, expires_in / 2)
+        self._refresh_handle = asyncio.get_running_loop().call_later(
+            delay, self._start_background_refresh
+        )
+
+    def _start_background_refresh(self) -> None:
+        """Start the proactive refresh task."""
+        self._refresh_handle = None
+        self._refresh_task = asyncio.get_running_loop().create_task(
+            self._async_background_refresh()
+        )
+
+    async def _async_background_refresh(self) -> None:
+        """Refresh the token, leaving recovery to the next request on failure."""
+        try:
+            await self.async_refresh(self._token)
+        except Exception as exception:  # pylint: disable=broad-except
+            _LOGGER.warning("Proactive Aldes token refresh failed: %s", exception)
+        finally:
+            self._refresh_task = None
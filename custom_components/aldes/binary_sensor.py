@@ -4,8 +4,7 @@ from homeassistant.core import HomeAssistant, callback
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.components.binary_sensor import BinarySensorEntity
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.entity import DeviceInfo
-from .const import DOMAIN, MANUFACTURER, FRIENDLY_NAMES
+from .const import DOMAIN, MANUFACTURER
 from .entity import AldesEntity
 
 
@@ -15,20 +14,24 @@ async def async_setup_entry(
     """Add Aldes binary sensors from a config_entry."""
     coordinator = hass.data[DOMAIN][entry.entry_id]
 
-    binary_sensors: list[AldesBinarySensorEntity] = []
-
-    for product in coordinator.data:
-        binary_sensors.append(
+    def _build_binary_sensors(products, thermostats):
+        """Build the binary sensors of the given products."""
+        return [
             AldesBinarySensorEntity(
                 coordinator,
                 entry,
-                product["serial_number"],
-                product["reference"],
-                product["modem"],
+                product.serial_number,
+                product.reference,
+                product.modem,
             )
-        )
+            for product in products
+        ]
 
-    async_add_entities(binary_sensors)
+    entry.async_on_unload(
+        coordinator.discovery.async_add_platform(
+            _build_binary_sensors, async_add_entities
+        )
+    )
 
 
 class AldesBinarySensorEntity(AldesEntity, BinarySensorEntity):
@@ -39,12 +42,8 @@ class AldesBinarySensorEntity(AldesEntity, BinarySensorEntity):
     @property
     def device_info(self):
         """Return the device info."""
-        return DeviceInfo(
-            identifiers={(DOMAIN, self.product_serial_number)},
-            manufacturer=MANUFACTURER,
-            name=f"{FRIENDLY_NAMES[self.reference]} {self.product_serial_number}",
-            model=FRIENDLY_NAMES[self.reference],
-        )
+        product = self.product
+        return product.device_info if product else None
 
     @property
     def unique_id(self):
@@ -65,9 +64,6 @@ class AldesBinarySensorEntity(AldesEntity, BinarySensorEntity):
     @callback
     def _async_update_attrs(self) -> None:
         """Update binary sensor attributes."""
-        for product in self.coordinator.data:
-            if product["serial_number"] == self.product_serial_number:
-                if product["isConnected"]:
-                    self._attr_is_on = True
-                else:
-                    self._attr_is_on = False
+        product = self.product
+        if product is not None:
+            self._attr_is_on = product.data.is_connected
@@ -1,5 +1,6 @@
 """Support for the Aldes sensors."""
 from __future__ import annotations
+import logging
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import ATTR_TEMPERATURE, UnitOfTemperature
@@ -9,10 +10,12 @@ from homeassistant.components.climate import (
     HVACMode,
 )
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.entity import DeviceInfo
 from .const import DOMAIN
+from .coordinator import AldesThermostatEntry
 from .entity import AldesEntity
 
+_LOGGER = logging.getLogger(__name__)
+
 
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
@@ -20,24 +23,27 @@ async def async_setup_entry(
     """Add Aldes sensors from a config_entry."""
     coordinator = hass.data[DOMAIN][entry.entry_id]
 
-    sensors: list[AldesClimateEntity] = []
-
-    for product in coordinator.data:
-        if product["thermostats"] != "null":
-            if "thermostats" in product["indicator"]:
-                for thermostat in product["indicator"]["thermostats"]:
-                    sensors.append(
-                        AldesClimateEntity(
-                            coordinator,
-                            entry,
-                            product["serial_number"],
-                            product["reference"],
-                            product["modem"],
-                            thermostat["ThermostatId"],
-                        )
+    def _build_climates(products, thermostats):
+        """Build the climate entities of the given thermostats."""
+        sensors: list[AldesClimateEntity] = []
+        for thermostat in thermostats:
+            product = thermostat.product
+            if product.data.has_thermostats:
+                sensors.append(
+                    AldesClimateEntity(
+                        coordinator,
+                        entry,
+                        product.serial_number,
+                        product.reference,
+                        product.modem,
+                        thermostat.thermostat_id,
                     )
+                )
+        return sensors
 
-    async_add_entities(sensors)
+    entry.async_on_unload(
+        coordinator.discovery.async_add_platform(_build_climates, async_add_entities)
+    )
 
 
 class AldesClimateEntity(AldesEntity, ClimateEntity):
@@ -53,7 +59,12 @@ class AldesClimateEntity(AldesEntity, ClimateEntity):
         thermostat_id,
     ) -> None:
         super().__init__(
-            coordinator, config_entry, product_serial_number, reference, modem
+            coordinator,
+            config_entry,
+            product_serial_number,
+            reference,
+            modem,
+            (product_serial_number, thermostat_id),
         )
         self.thermostat_id = thermostat_id
         self._attr_device_class = "temperature"
@@ -64,12 +75,18 @@ class AldesClimateEntity(AldesEntity, ClimateEntity):
         self._attr_target_temperature_step = 1
         self._attr_hvac_action = "Unknown"
 
+    @property
+    def thermostat(self) -> AldesThermostatEntry | None:
+        """Return the indexed thermostat of this entity."""
+        return self.coordinator.index.thermostats.get(
+            (self.product_serial_number, self.thermostat_id)
+        )
+
     @property
     def device_info(self):
         """Return the device info."""
-        return DeviceInfo(
-            identifiers={(DOMAIN, self.thermostat_id)},
-        )
+        thermostat = self.thermostat
+        return thermostat.device_info if thermostat else None
 
     @property
     def unique_id(self):
@@ -79,34 +96,30 @@ class AldesClimateEntity(AldesEntity, ClimateEntity):
     @property
     def name(self):
         """Return a name to use for this entity."""
-        for product in self.coordinator.data:
-            if product["serial_number"] == self.product_serial_number:
-                for thermostat in product["indicator"]["thermostats"]:
-                    if thermostat["ThermostatId"] == self.thermostat_id:
-                        return f"{thermostat['Name']} climate"
-            return None
+        thermostat = self.thermostat
+        return f"{thermostat.name} climate" if thermostat else None
 
     @property
     def min_temp(self):
         """Get the minimum temperature"""
-        for product in self.coordinator.data:
-            if product["serial_number"] == self.product_serial_number:
-                if product["indicator"]["current_air_mode"] == "B":
-                    return product["indicator"]["cmist"]
-                if product["indicator"]["current_air_mode"] == "C":
-                    return product["indicator"]["fmist"]
-            return None
+        return self._air_mode_bound("cmist", "fmist")
 
     @property
     def max_temp(self):
         """Get the maximum temperature"""
-        for product in self.coordinator.data:
-            if product["serial_number"] == self.product_serial_number:
-                if product["indicator"]["current_air_mode"] == "B":
-                    return product["indicator"]["cmast"]
-                if product["indicator"]["current_air_mode"] == "C":
-                    return product["indicator"]["fmast"]
+        return self._air_mode_bound("cmast", "fmast")
+
+    def _air_mode_bound(self, heat_key, cool_key):
+        """Get the indicator bound matching the current air mode."""
+        product = self.product
+        if product is None:
             return None
+        indicator = product.data.indicator
+        if indicator.current_air_mode == "B":
+            return getattr(indicator, heat_key)
+        if indicator.current_air_mode == "C":
+            return getattr(indicator, cool_key)
+        return None
 
     @callback
     def _handle_coordinator_update(self) -> None:
@@ -116,33 +129,52 @@ class AldesClimateEntity(AldesEntity, ClimateEntity):
 
     @callback
     def _async_update_attrs(self) -> None:
-        """Update binary sensor attributes."""
-
-        for product in self.coordinator.data:
-            if product["isConnected"]:
-                if product["serial_number"] == self.product_serial_number:
-                    if product["indicator"]["current_air_mode"] == "B":
-                        self._attr_hvac_mode = HVACMode.HEAT
-                    if product["indicator"]["current_air_mode"] == "C":
-                        self._attr_hvac_mode = HVACMode.COOL
-                    for thermostat in product["indicator"]["thermostats"]:
-                        if thermostat["ThermostatId"] == self.thermostat_id:
-                            self._attr_target_temperature = thermostat["TemperatureSet"]
-                            self._attr_current_temperature = thermostat[
-                                "CurrentTemperature"
-                            ]
-            else:
-                self._attr_current_temperature = None
+        """Update climate attributes."""
+        product = self.product
+        if product is None:
+            return
+        if not product.data.is_connected:
+            self._attr_current_temperature = None
+            return
+        indicator = product.data.indicator
+        if indicator.current_air_mode == "B":
+            self._attr_hvac_mode = HVACMode.HEAT
+        if indicator.current_air_mode == "C":
+            self._attr_hvac_mode = HVACMode.COOL
+        thermostat = self.thermostat
+        if thermostat is not None:
+            self._attr_target_temperature = thermostat.data.temperature_set
+            self._attr_current_temperature = thermostat.data.current_temperature
 
     async def async_set_temperature(self, **kwargs):
         """Set new target temperature."""
-        await self.coordinator.api.set_target_temperature(
-            self.modem,
+        target_temperature = int(kwargs.get(ATTR_TEMPERATURE))
+        if not await self.coordinator.reconciler.async_set_setpoint(
+            self.product_serial_number, self.thermostat_id, target_temperature
+        ):
+            return
+        self._attr_target_temperature = target_temperature
+        self.async_write_ha_state()
+        self.coordinator.async_note_command()
+        self.hass.async_create_task(self._async_confirm_temperature(target_temperature))
+
+    async def _async_confirm_temperature(self, target_temperature) -> None:
+        """Check that the thermostat applied the setpoint, reverting if not."""
+        key = (self.product_serial_number, self.thermostat_id)
+        if await self.coordinator.confirmer.async_confirm(
+            lambda index: key in index.thermostats
+            and index.thermostats[key].data.temperature_set == target_temperature
+        ):
+            return
+        thermostat = self.thermostat
+        _LOGGER.warning(
+            "Aldes thermostat %s did not apply setpoint %s",
             self.thermostat_id,
-            self._thermostat_name,
-            kwargs.get(ATTR_TEMPERATURE),
+            target_temperature,
         )
-        self._attr_target_temperature = kwargs.get(ATTR_TEMPERATURE)
+        if self._attr_target_temperature == target_temperature and thermostat:
+            self._attr_target_temperature = thermostat.data.temperature_set
+            self.async_write_ha_state()
 
     async def async_set_hvac_mode(self, hvac_mode: HVACMode) -> None:
         return
@@ -150,9 +182,5 @@ class AldesClimateEntity(AldesEntity, ClimateEntity):
     @property
     def _thermostat_name(self):
         """Get the thermostat name as defined in the API"""
-        for product in self.coordinator.data:
-            if product["serial_number"] == self.product_serial_number:
-                for thermostat in product["indicator"]["thermostats"]:
-                    if thermostat["ThermostatId"] == self.thermostat_id:
-                        return thermostat["Name"]
-            return None
+        thermostat = self.thermostat
+        return thermostat.name if thermostat else None
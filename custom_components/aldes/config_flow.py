@@ -1,14 +1,30 @@
 """Adds config flow for Aldes."""
 from homeassistant import config_entries
-from homeassistant.helpers.aiohttp_client import async_create_clientsession
+from homeassistant.components.sensor import SensorDeviceClass
+from homeassistant.core import callback
 import voluptuous as vol
 
 from .api import AldesApi
 from .const import (
+    CONF_CO2_DEADBAND,
+    CONF_HEDGED_FETCH,
+    CONF_HOURLY_STATISTICS,
+    CONF_HUMIDITY_DEADBAND,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_MIN_STATE_INTERVAL,
     CONF_PASSWORD,
+    CONF_SNAPSHOT_MAX_AGE,
+    CONF_TEMPERATURE_DEADBAND,
+    CONF_TOKEN,
     CONF_USERNAME,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_SNAPSHOT_MAX_AGE,
     DOMAIN,
 )
+from .deadband import DEFAULT_DEADBANDS
+from .session import async_get_session
 
 
 class AldesFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
@@ -21,20 +37,26 @@ class AldesFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         """Initialize."""
         self._errors = {}
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Get the options flow for this handler."""
+        return AldesOptionsFlowHandler(config_entry)
+
     async def async_step_user(self, user_input=None):
         """Handle a flow initialized by the user."""
         self._errors = {}
 
-        if self._async_current_entries():
-            return self.async_abort(reason="single_instance_allowed")
-
         if user_input is not None:
-            valid = await self._test_credentials(
+            await self.async_set_unique_id(user_input[CONF_USERNAME].lower())
+            self._abort_if_unique_id_configured()
+            token = await self._test_credentials(
                 user_input[CONF_USERNAME], user_input[CONF_PASSWORD]
             )
-            if valid:
+            if token is not None:
                 return self.async_create_entry(
-                    title=user_input[CONF_USERNAME], data=user_input
+                    title=user_input[CONF_USERNAME],
+                    data={**user_input, CONF_TOKEN: token},
                 )
             self._errors["base"] = "auth"
             return await self._show_config_form(user_input)
@@ -60,12 +82,96 @@ class AldesFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         )
 
     async def _test_credentials(self, username, password):
-        """Return true if credentials is valid."""
+        """Return the token obtained with the credentials, None if invalid.
+
+        The token is stored with the entry so that setup does not log in again.
+        """
+        api = AldesApi(username, password, async_get_session(self.hass))
         try:
-            session = async_create_clientsession(self.hass)
-            api = AldesApi(username, password, session)
             await api.authenticate()
-            return True
+            return {
+                "access_token": api.token_manager.token,
+                "expires_at": api.token_manager.expires_at,
+            }
         except Exception:  # pylint: disable=broad-except
             pass
-        return False
+        finally:
+            api.close()
+        return None
+
+
+class AldesOptionsFlowHandler(config_entries.OptionsFlow):
+    """Options flow for Aldes."""
+
+    def __init__(self, config_entry) -> None:
+        """Initialize."""
+        self.config_entry = config_entry
+
+    async def async_step_init(self, user_input=None):
+        """Manage the polling and snapshot cache options."""
+        errors = {}
+
+        if user_input is not None:
+            if user_input[CONF_MIN_SCAN_INTERVAL] <= user_input[CONF_MAX_SCAN_INTERVAL]:
+                return self.async_create_entry(title="", data=user_input)
+            errors["base"] = "interval_bounds"
+
+        options = self.config_entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_MIN_SCAN_INTERVAL,
+                        default=options.get(
+                            CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=10)),
+                    vol.Required(
+                        CONF_MAX_SCAN_INTERVAL,
+                        default=options.get(
+                            CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=10)),
+                    vol.Required(
+                        CONF_SNAPSHOT_MAX_AGE,
+                        default=options.get(
+                            CONF_SNAPSHOT_MAX_AGE, DEFAULT_SNAPSHOT_MAX_AGE
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                    vol.Required(
+                        CONF_HOURLY_STATISTICS,
+                        default=options.get(CONF_HOURLY_STATISTICS, False),
+                    ): bool,
+                    vol.Required(
+                        CONF_HEDGED_FETCH,
+                        default=options.get(CONF_HEDGED_FETCH, False),
+                    ): bool,
+                    vol.Required(
+                        CONF_TEMPERATURE_DEADBAND,
+                        default=options.get(
+                            CONF_TEMPERATURE_DEADBAND,
+                            DEFAULT_DEADBANDS[SensorDeviceClass.TEMPERATURE],
+                        ),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                    vol.Required(
+                        CONF_HUMIDITY_DEADBAND,
+                        default=options.get(
+                            CONF_HUMIDITY_DEADBAND,
+                            DEFAULT_DEADBANDS[SensorDeviceClass.HUMIDITY],
+                        ),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                    vol.Required(
+                        CONF_CO2_DEADBAND,
+                        default=options.get(
+                            CONF_CO2_DEADBAND, DEFAULT_DEADBANDS[SensorDeviceClass.CO2]
+                        ),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                    vol.Required(
+                        CONF_MIN_STATE_INTERVAL,
+                        default=options.get(CONF_MIN_STATE_INTERVAL, 0),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                }
+            ),
+            errors=errors,
+        )
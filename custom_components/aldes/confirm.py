@@ -0,0 +1,90 @@
+"""Confirmation of commands sent to Aldes products."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from dataclasses import dataclass
+import logging
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .coordinator import AldesDataUpdateCoordinator, AldesIndex
+
+_LOGGER = logging.getLogger(__name__)
+
+VERIFICATION_DELAYS = (3, 6, 12)
+
+
+@dataclass
+class _PendingConfirmation:
+    """A command waiting for the products payload to reflect it."""
+
+    check: Callable[[AldesIndex], bool]
+    result: asyncio.Future
+    attempts: int = 0
+
+
+class AldesCommandConfirmer:
+    """Verify commands with a few bounded polls.
+
+    Commands waiting at the same time share every verification fetch. A
+    command is rejected when its state is still not visible after the last
+    verification, for instance because the product is in a forced mode.
+    """
+
+    def __init__(self, coordinator: AldesDataUpdateCoordinator) -> None:
+        """Initialize."""
+        self._coordinator = coordinator
+        self._pending: list[_PendingConfirmation] = []
+        self._task: asyncio.Task | None = None
+        self.confirmed = 0
+        self.rejected = 0
+
+    async def async_confirm(self, check: Callable[[AldesIndex], bool]) -> bool:
+        """Return whether a fresh snapshot satisfies check within the bounds."""
+        result = asyncio.get_running_loop().create_future()
+        self._pending.append(_PendingConfirmation(check, result))
+        if self._task is None:
+            self._task = self._coordinator.hass.async_create_task(self._async_verify())
+        return await result
+
+    def close(self) -> None:
+        """Stop verifying and cancel the waiting commands."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for pending in self._pending:
+            pending.result.cancel()
+        self._pending.clear()
+
+    async def _async_verify(self) -> None:
+        """Refresh until every waiting command is confirmed or rejected."""
+        try:
+            while self._pending:
+                attempt = min(pending.attempts for pending in self._pending)
+                await asyncio.sleep(VERIFICATION_DELAYS[attempt])
+                await self._coordinator.async_confirmation_refresh()
+                self._resolve(
+                    self._coordinator.index
+                    if self._coordinator.last_update_success
+                    else None
+                )
+        finally:
+            self._task = None
+
+    def _resolve(self, index: AldesIndex | None) -> None:
+        """Resolve the waiting commands against a fresh snapshot, if any."""
+        waiting: list[_PendingConfirmation] = []
+        for pending in self._pending:
+            pending.attempts += 1
+            if pending.result.done():
+                continue
+            if index is not None and pending.check(index):
+                self.confirmed += 1
+                pending.result.set_result(True)
+            elif pending.attempts >= len(VERIFICATION_DELAYS):
+                self.rejected += 1
+                pending.result.set_result(False)
+            else:
+                waiting.append(pending)
+        self._pending = waiting
@@ -7,6 +7,26 @@ VERSION = "0.0.1"
 
 CONF_USERNAME = "username"
 CONF_PASSWORD = "password"
+CONF_MIN_SCAN_INTERVAL = "min_scan_interval"
+CONF_MAX_SCAN_INTERVAL = "max_scan_interval"
+CONF_SNAPSHOT_MAX_AGE = "snapshot_max_age"
+CONF_TOKEN = "token"
+CONF_HOURLY_STATISTICS = "hourly_statistics"
+CONF_TEMPERATURE_DEADBAND = "temperature_deadband"
+CONF_HUMIDITY_DEADBAND = "humidity_deadband"
+CONF_CO2_DEADBAND = "co2_deadband"
+CONF_MIN_STATE_INTERVAL = "min_state_interval"
+CONF_HEDGED_FETCH = "hedged_fetch"
+
+DEFAULT_SCAN_INTERVAL = 300
+DEFAULT_MIN_SCAN_INTERVAL = 30
+DEFAULT_MAX_SCAN_INTERVAL = 1800
+DEFAULT_SNAPSHOT_MAX_AGE = 21600
+
+STAGGER_STEP = 7
+
+SNAPSHOT_STORAGE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 10
 
 MANUFACTURER = "Aldes"
 PLATFORMS: list[Platform] = [
@@ -1,39 +1,342 @@
 """Aldes"""
 from __future__ import annotations
 
-from datetime import timedelta
+from collections import Counter
+from dataclasses import dataclass, replace
 import logging
-from typing import Any
+import time
+from types import MappingProxyType
+from typing import Mapping
 import async_timeout
 
-from homeassistant.core import HomeAssistant
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
+from .aggregates import AldesHourlyStatistics
 from .api import AldesApi
-from .const import DOMAIN
+from .confirm import AldesCommandConfirmer
+from .discovery import AldesEntityDiscovery
+from .const import (
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_SCAN_INTERVAL,
+    DOMAIN,
+    FRIENDLY_NAMES,
+    MANUFACTURER,
+    SNAPSHOT_SAVE_DELAY,
+)
+from .history import AldesHistory
+from .models import (
+    AldesDecodeError,
+    Product,
+    Thermostat,
+    decode_products,
+    encode_products,
+)
+from .polling import AldesPollScheduler
+from .reconcile import AldesReconciler
+from .scheduler import PRIORITY_BACKGROUND, PRIORITY_CONFIRMATION
 
 _LOGGER = logging.getLogger(__name__)
 
 
-class AldesDataUpdateCoordinator(DataUpdateCoordinator[dict[str, Any]]):
+@dataclass(frozen=True)
+class AldesProductEntry:
+    """Indexed Aldes product."""
+
+    serial_number: str
+    reference: str
+    modem: str
+    name: str
+    device_info: DeviceInfo
+    data: Product
+    fingerprint: int
+
+
+@dataclass(frozen=True)
+class AldesThermostatEntry:
+    """Indexed Aldes thermostat."""
+
+    product: AldesProductEntry
+    thermostat_id: int
+    name: str
+    device_info: DeviceInfo
+    data: Thermostat
+    fingerprint: int
+
+
+def _product_fingerprint(product: Product) -> int:
+    """Return a fingerprint of a product, leaving its thermostats out."""
+    return hash(replace(product, indicator=replace(product.indicator, thermostats=())))
+
+
+class AldesIndex:
+    """Read-only lookup tables built once per products payload."""
+
+    __slots__ = ("products", "thermostats", "cache")
+
+    def __init__(self, payload: list[Product]) -> None:
+        """Index products by serial number and thermostats by (serial, id)."""
+        products: dict[str, AldesProductEntry] = {}
+        thermostats: dict[tuple[str, int], AldesThermostatEntry] = {}
+
+        for product in payload:
+            serial_number = product.serial_number
+            reference = product.reference
+            model = FRIENDLY_NAMES.get(reference, reference)
+            entry = AldesProductEntry(
+                serial_number=serial_number,
+                reference=reference,
+                modem=product.modem,
+                name=f"{model} {serial_number}",
+                device_info=DeviceInfo(
+                    identifiers={(DOMAIN, serial_number)},
+                    manufacturer=MANUFACTURER,
+                    name=f"{model} {serial_number}",
+                    model=model,
+                ),
+                data=product,
+                fingerprint=_product_fingerprint(product),
+            )
+            products[serial_number] = entry
+
+            for thermostat in product.indicator.thermostats:
+                thermostat_id = thermostat.thermostat_id
+                thermostats[(serial_number, thermostat_id)] = AldesThermostatEntry(
+                    product=entry,
+                    thermostat_id=thermostat_id,
+                    name=thermostat.name,
+                    device_info=DeviceInfo(identifiers={(DOMAIN, thermostat_id)}),
+                    data=thermostat,
+                    fingerprint=hash(thermostat),
+                )
+
+        self.products: Mapping[str, AldesProductEntry] = MappingProxyType(products)
+        self.thermostats: Mapping[tuple[str, int], AldesThermostatEntry] = (
+            MappingProxyType(thermostats)
+        )
+        # Values derived from this snapshot, filled lazily by the platforms.
+        self.cache: dict = {}
+
+    @property
+    def platforms(self) -> set[Platform]:
+        """Return the platforms that have entities for the indexed products."""
+        platforms = self.cache.get("platforms")
+        if platforms is not None:
+            return platforms
+        platforms = {Platform.SENSOR}
+        for product in self.products.values():
+            platforms.add(Platform.BINARY_SENSOR)
+            if product.data.mode is not None:
+                platforms.add(Platform.SELECT)
+        if any(
+            thermostat.product.data.has_thermostats
+            for thermostat in self.thermostats.values()
+        ):
+            platforms.add(Platform.CLIMATE)
+        self.cache["platforms"] = platforms
+        return platforms
+
+    def changed_since(self, previous: AldesIndex) -> set[str | tuple[str, int]]:
+        """Return the products and thermostats whose payload changed.
+
+        A changed product also marks its thermostats as changed, since
+        thermostat entities read product level indicators such as the air mode.
+        """
+        changed: set[str | tuple[str, int]] = set()
+        for serial_number, product in self.products.items():
+            old = previous.products.get(serial_number)
+            if old is None or old.fingerprint != product.fingerprint:
+                changed.add(serial_number)
+        for key, thermostat in self.thermostats.items():
+            old = previous.thermostats.get(key)
+            if (
+                key[0] in changed
+                or old is None
+                or old.fingerprint != thermostat.fingerprint
+            ):
+                changed.add(key)
+        return changed
+
+
+class AldesDataUpdateCoordinator(DataUpdateCoordinator[list[Product]]):
     """Aldes data coordinator."""
 
-    _API_TIMEOUT = 10
+    _API_TIMEOUT = 30
+    _MAX_STALE_AGE = 1800
 
-    def __init__(self, hass: HomeAssistant, api: AldesApi) -> None:
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        api: AldesApi,
+        min_interval: int = DEFAULT_MIN_SCAN_INTERVAL,
+        max_interval: int = DEFAULT_MAX_SCAN_INTERVAL,
+        store: Store | None = None,
+        stagger: float = 0,
+        hourly_statistics: bool = False,
+    ) -> None:
         """Initialize."""
+        self.scheduler = AldesPollScheduler(
+            DEFAULT_SCAN_INTERVAL, min_interval, max_interval, stagger
+        )
         super().__init__(
             hass,
             _LOGGER,
             name=DOMAIN,
-            update_interval=timedelta(minutes=5),
+            update_interval=self.scheduler.update_interval,
         )
         self.api = api
+        self._store = store
+        self.index = AldesIndex([])
+        self.platforms: set[Platform] = set()
+        self._fetch_priority = PRIORITY_BACKGROUND
+        self.history = AldesHistory()
+        self.statistics = AldesHourlyStatistics(hass) if hourly_statistics else None
+        self.confirmer = AldesCommandConfirmer(self)
+        self.discovery = AldesEntityDiscovery(self)
+        self.reconciler = AldesReconciler(self)
+        self.dispatched_updates = 0
+        self.skipped_updates = 0
+        self.state_writes: Counter[str] = Counter()
+        self.suppressed_writes: Counter[str] = Counter()
+        self._changed: set[str | tuple[str, int]] | None = None
+        self._last_success: float | None = None
+        self.stale = False
+
+    @property
+    def snapshot_age(self) -> float | None:
+        """Return the age in seconds of the last successfully fetched data."""
+        if self._last_success is None:
+            return None
+        return time.monotonic() - self._last_success
+
+    async def async_load_snapshot(self, max_age: float) -> bool:
+        """Load the persisted snapshot if it is not older than max_age seconds."""
+        if self._store is None or max_age <= 0:
+            return False
+        stored = await self._store.async_load()
+        if not stored:
+            return False
+        age = time.time() - stored["saved_at"]
+        if age > max_age:
+            return False
+        try:
+            data = decode_products(stored["products"])
+        except AldesDecodeError as exception:
+            _LOGGER.debug("Ignoring the cached Aldes snapshot: %s", exception)
+            return False
+        self.index = AldesIndex(data)
+        self.history.load(stored.get("history", {}))
+        if self.statistics is not None:
+            self.statistics.load(stored.get("statistics", {}))
+        self._last_success = time.monotonic() - age
+        self.stale = True
+        self.async_set_updated_data(data)
+        return True
+
+    @callback
+    def _snapshot_to_store(self) -> dict:
+        """Return the snapshot to persist."""
+        return {
+            "saved_at": time.time() - self.snapshot_age,
+            "products": encode_products(self.data),
+            "history": self.history.as_dict(),
+            "statistics": (
+                {} if self.statistics is None else self.statistics.as_dict()
+            ),
+        }
 
-    async def _async_update_data(self) -> dict[str, Any]:
+    @property
+    def suppressed_write_ratio(self) -> float | None:
+        """Return the share of sensor values withheld by their deadband."""
+        suppressed = self.suppressed_writes.total()
+        total = suppressed + self.state_writes.total()
+        return suppressed / total if total else None
+
+    @property
+    def skip_ratio(self) -> float | None:
+        """Return the share of entity updates skipped as unchanged."""
+        total = self.dispatched_updates + self.skipped_updates
+        if total == 0:
+            return None
+        return self.skipped_updates / total
+
+    @callback
+    def async_note_command(self) -> None:
+        """Poll faster for a while after a command was sent to a product."""
+        self.update_interval = self.scheduler.on_command()
+        self._schedule_refresh()
+
+    async def async_confirmation_refresh(self) -> None:
+        """Refresh ahead of background polls to verify a command."""
+        self._fetch_priority = PRIORITY_CONFIRMATION
+        try:
+            await self.async_refresh()
+        finally:
+            self._fetch_priority = PRIORITY_BACKGROUND
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Notify only the entities bound to a changed product or thermostat.
+
+        Listeners without a context, and every listener after a failed
+        refresh, are always notified.
+        """
+        started = time.perf_counter()
+        changed, self._changed = self._changed, None
+        if changed is None or not self.last_update_success:
+            super().async_update_listeners()
+        else:
+            for update_callback, context in list(self._listeners.values()):
+                if context is None:
+                    update_callback()
+                elif context in changed:
+                    self.dispatched_updates += 1
+                    update_callback()
+                else:
+                    self.skipped_updates += 1
+        self.api.metrics.fanout_time = time.perf_counter() - started
+
+    async def _async_update_data(self) -> list[Product]:
         """Update data via library."""
         try:
             async with async_timeout.timeout(self._API_TIMEOUT):
-                return await self.api.fetch_data()
+                data = await self.api.fetch_data(self._fetch_priority)
+            index = self.index if data is self.data else AldesIndex(data)
         except Exception as exception:
+            self.update_interval = self.scheduler.on_failure()
+            age = self.snapshot_age
+            if self.data is not None and age is not None and age < self._MAX_STALE_AGE:
+                _LOGGER.warning(
+                    "Error fetching Aldes data, keeping data from %d s ago: %s",
+                    age,
+                    exception,
+                )
+                self.stale = True
+                self._changed = set()
+                return self.data
             raise UpdateFailed(exception) from exception
+        self.stale = False
+        self._last_success = time.monotonic()
+        if not self.last_update_success:
+            self._changed = None
+        elif index is self.index:
+            self._changed = set()
+        else:
+            self._changed = index.changed_since(self.index)
+        self.update_interval = self.scheduler.on_success(
+            self._changed is None or bool(self._changed)
+        )
+        previous, self.index = self.index, index
+        if index is not previous:
+            self.discovery.async_update(previous, index)
+            self.reconciler.reconcile(index, self._changed)
+        self.history.record(data, time.time())
+        if self.statistics is not None:
+            self.statistics.record(index.products.values(), time.time())
+        if self._store is not None and (self._changed is None or self._changed):
+            self._store.async_delay_save(self._snapshot_to_store, SNAPSHOT_SAVE_DELAY)
+        return data
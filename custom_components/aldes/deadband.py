@@ -0,0 +1,118 @@
+"""Deadband filtering of Aldes sensor state writes."""
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import Any
+
+from homeassistant.components.sensor import SensorDeviceClass
+
+from .const import (
+    CONF_CO2_DEADBAND,
+    CONF_HUMIDITY_DEADBAND,
+    CONF_MIN_STATE_INTERVAL,
+    CONF_TEMPERATURE_DEADBAND,
+)
+
+DEFAULT_DEADBANDS = {
+    SensorDeviceClass.TEMPERATURE: 0.2,
+    SensorDeviceClass.HUMIDITY: 1,
+    SensorDeviceClass.CO2: 10,
+}
+DEADBAND_OPTIONS = {
+    SensorDeviceClass.TEMPERATURE: CONF_TEMPERATURE_DEADBAND,
+    SensorDeviceClass.HUMIDITY: CONF_HUMIDITY_DEADBAND,
+    SensorDeviceClass.CO2: CONF_CO2_DEADBAND,
+}
+HYSTERESIS_RATIO = 0.5
+# Tolerance for the rounding of decoded values, e.g. 0.1 steps of tenths.
+EPSILON = 1e-9
+
+
+class AldesStateFilter:
+    """Decide whether a new sensor value is worth a state write.
+
+    A numeric value is written once it moves at least deadband away from
+    the last written value, plus hysteresis when it turns back, and no
+    sooner than min_interval seconds after the previous write. A value held
+    back only by min_interval is kept as deferred until it can be written.
+    """
+
+    __slots__ = (
+        "deadband",
+        "hysteresis",
+        "min_interval",
+        "deferred",
+        "_value",
+        "_direction",
+        "_written_at",
+    )
+
+    def __init__(
+        self, deadband: float = 0, hysteresis: float = 0, min_interval: float = 0
+    ) -> None:
+        """Initialize."""
+        self.deadband = deadband
+        self.hysteresis = hysteresis
+        self.min_interval = min_interval
+        self.deferred = None
+        self._value = None
+        self._direction = 0
+        self._written_at: float | None = None
+
+    @classmethod
+    def for_description(
+        cls, description, options: Mapping[str, Any]
+    ) -> AldesStateFilter:
+        """Build the filter of a sensor description.
+
+        Entry options take precedence over the description, which takes
+        precedence over the defaults of its device class.
+        """
+        device_class = description.device_class
+        deadband = description.deadband
+        if (option := DEADBAND_OPTIONS.get(device_class)) in options:
+            deadband = options[option]
+        elif deadband is None:
+            deadband = DEFAULT_DEADBANDS.get(device_class, 0)
+        hysteresis = description.hysteresis
+        if hysteresis is None:
+            hysteresis = deadband * HYSTERESIS_RATIO
+        return cls(
+            deadband,
+            hysteresis,
+            options.get(CONF_MIN_STATE_INTERVAL, description.min_interval or 0),
+        )
+
+    def accept(self, value, now: float) -> bool:
+        """Return whether value should be written, recording it if so."""
+        self.deferred = None
+        previous = self._value
+        direction = 0
+        if isinstance(value, (int, float)) and isinstance(previous, (int, float)):
+            delta = value - previous
+            direction = (delta > 0) - (delta < 0)
+            threshold = self.deadband
+            if self._direction and direction != self._direction:
+                threshold += self.hysteresis
+            if not delta or abs(delta) < threshold - EPSILON:
+                return False
+        elif value == previous:
+            return False
+        if self.remaining(now) > 0:
+            self.deferred = value
+            return False
+        self._direction = direction
+        self.reset(value, now)
+        return True
+
+    def remaining(self, now: float) -> float:
+        """Return the seconds left before min_interval allows a new write."""
+        if self._written_at is None:
+            return 0
+        return max(self._written_at + self.min_interval - now, 0)
+
+    def reset(self, value, now: float) -> None:
+        """Record a value written regardless of the filter."""
+        self.deferred = None
+        self._value = value
+        self._written_at = now
@@ -0,0 +1,73 @@
+"""Diagnostics support for Aldes."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_PASSWORD, CONF_TOKEN, CONF_USERNAME, DOMAIN
+from .coordinator import AldesDataUpdateCoordinator
+
+TO_REDACT = {CONF_USERNAME, CONF_PASSWORD, CONF_TOKEN, "title", "unique_id"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: AldesDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    api = coordinator.api
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "metrics": api.metrics.as_dict(),
+        "polling": {
+            "interval": coordinator.scheduler.interval,
+            **coordinator.scheduler.as_dict(),
+        },
+        "dispatch": {
+            "dispatched_updates": coordinator.dispatched_updates,
+            "skipped_updates": coordinator.skipped_updates,
+            "state_writes": dict(coordinator.state_writes),
+            "suppressed_writes": dict(coordinator.suppressed_writes),
+        },
+        "snapshot": {
+            "age": coordinator.snapshot_age,
+            "stale": coordinator.stale,
+            "products": len(coordinator.index.products),
+            "thermostats": len(coordinator.index.thermostats),
+        },
+        "auth": {
+            "auth_calls": api.token_manager.auth_calls,
+            "saved_auth_calls": api.token_manager.saved_auth_calls,
+            "expires_at": api.token_manager.expires_at,
+        },
+        "request_scheduler": {
+            "queue_depth": api.scheduler.queue_depth,
+            "in_flight": api.scheduler.in_flight,
+        },
+        "circuit_breaker": {
+            "state": api.circuit_breaker.state,
+            "failures": api.circuit_breaker.failures,
+        },
+        "reconciler": {
+            "sent": coordinator.reconciler.sent,
+            "suppressed": coordinator.reconciler.suppressed,
+            "reapplied": coordinator.reconciler.reapplied,
+            "pending": coordinator.reconciler.pending,
+        },
+        "hourly_statistics": (
+            None
+            if coordinator.statistics is None
+            else {"imported": coordinator.statistics.imported}
+        ),
+        "discovery": {
+            "added_entities": coordinator.discovery.added,
+            "removed_entities": coordinator.discovery.removed,
+        },
+        "confirmations": {
+            "confirmed": coordinator.confirmer.confirmed,
+            "rejected": coordinator.confirmer.rejected,
+        },
+    }
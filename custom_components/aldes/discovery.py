@@ -0,0 +1,135 @@
+"""Discovery of Aldes products and thermostats between refreshes."""
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable
+from typing import TYPE_CHECKING
+
+from homeassistant.core import CALLBACK_TYPE, callback
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import DOMAIN
+
+if TYPE_CHECKING:
+    from .coordinator import (
+        AldesDataUpdateCoordinator,
+        AldesIndex,
+        AldesProductEntry,
+        AldesThermostatEntry,
+    )
+
+EntityBuilder = Callable[
+    [Iterable["AldesProductEntry"], Iterable["AldesThermostatEntry"]], list[Entity]
+]
+
+
+class AldesEntityDiscovery:
+    """Add entities for new products and thermostats and prune vanished ones.
+
+    Each platform registers a builder with its async_add_entities callback.
+    After a refresh, builders only get the products and thermostats that
+    appeared, and only the entities of those that vanished are removed.
+    Removal goes through the unique ids of every built entity, so disabled
+    entities that never reach Home Assistant are pruned from the registry too.
+    """
+
+    def __init__(self, coordinator: AldesDataUpdateCoordinator) -> None:
+        """Initialize."""
+        self._coordinator = coordinator
+        self._platforms: list[tuple[EntityBuilder, AddEntitiesCallback]] = []
+        self._entities: dict[str | tuple[str, int], set[Entity]] = {}
+        self._unique_ids: dict[str | tuple[str, int], set[str]] = {}
+        self.added = 0
+        self.removed = 0
+
+    @callback
+    def async_add_platform(
+        self, build: EntityBuilder, async_add_entities: AddEntitiesCallback
+    ) -> CALLBACK_TYPE:
+        """Add the entities of the indexed products and keep adding new ones."""
+        index = self._coordinator.index
+        entities = build(index.products.values(), index.thermostats.values())
+        self._remember(entities)
+        async_add_entities(entities)
+        platform = (build, async_add_entities)
+        self._platforms.append(platform)
+        return lambda: self._platforms.remove(platform)
+
+    @callback
+    def async_track(self, key: str | tuple[str, int], entity: Entity) -> CALLBACK_TYPE:
+        """Remember that an entity belongs to a product or thermostat."""
+        entities = self._entities.setdefault(key, set())
+        entities.add(entity)
+        return lambda: entities.discard(entity)
+
+    @callback
+    def async_update(self, previous: AldesIndex, index: AldesIndex) -> None:
+        """Add and remove entities for the products that came and went."""
+        new_products = [
+            product
+            for serial_number, product in index.products.items()
+            if serial_number not in previous.products
+        ]
+        new_thermostats = [
+            thermostat
+            for key, thermostat in index.thermostats.items()
+            if key not in previous.thermostats
+        ]
+        if new_products or new_thermostats:
+            for build, async_add_entities in self._platforms:
+                if entities := build(new_products, new_thermostats):
+                    self._remember(entities)
+                    self.added += len(entities)
+                    async_add_entities(entities)
+
+        # Nothing vanished unless the sizes differ once the new ones are counted.
+        removed: list[str | tuple[str, int]] = []
+        if len(previous.products) + len(new_products) != len(index.products):
+            removed.extend(previous.products.keys() - index.products.keys())
+        if len(previous.thermostats) + len(new_thermostats) != len(index.thermostats):
+            removed.extend(previous.thermostats.keys() - index.thermostats.keys())
+        # An empty payload is more likely a cloud glitch than an emptied account.
+        if removed and index.products:
+            self._async_remove(removed)
+
+    def _remember(self, entities: list[Entity]) -> None:
+        """Record the unique ids of built entities per product or thermostat."""
+        for entity in entities:
+            if entity.unique_id is not None:
+                self._unique_ids.setdefault(entity.index_key, set()).add(
+                    entity.unique_id
+                )
+
+    @callback
+    def _async_remove(self, keys: list[str | tuple[str, int]]) -> None:
+        """Remove the entities and devices of vanished products and thermostats."""
+        hass = self._coordinator.hass
+        entity_registry = er.async_get(hass)
+        device_registry = dr.async_get(hass)
+        entry_id = self._coordinator.config_entry.entry_id
+        unique_ids: set[str] = set()
+        for key in keys:
+            unique_ids |= self._unique_ids.pop(key, set())
+            for entity in self._entities.pop(key, ()):
+                if entity.registry_entry is None:
+                    self.removed += 1
+                    hass.async_create_task(entity.async_remove(force_remove=True))
+            identifier = key[1] if isinstance(key, tuple) else key
+            device = device_registry.async_get_device(
+                identifiers={(DOMAIN, identifier)}
+            )
+            if device is not None:
+                device_registry.async_update_device(
+                    device.id, remove_config_entry_id=entry_id
+                )
+        # Keep the ids that remaining products or thermostats still build.
+        for remaining in self._unique_ids.values():
+            unique_ids -= remaining
+        for registry_entry in er.async_entries_for_config_entry(
+            entity_registry, entry_id
+        ):
+            if registry_entry.unique_id in unique_ids:
+                self.removed += 1
+                entity_registry.async_remove(registry_entry.entity_id)
+        self._coordinator.history.remove(keys)
@@ -1,15 +1,73 @@
 """AldesEntity class"""
+from __future__ import annotations
+
+from homeassistant.helpers.device_registry import DeviceEntryType
+from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.typing import UNDEFINED
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
+from .const import DOMAIN, MANUFACTURER, NAME
+from .coordinator import AldesProductEntry
+
 
 class AldesEntity(CoordinatorEntity):
-    """Aldes entity"""
+    """Aldes entity
+
+    index_key is the product serial number, or the (serial number, thermostat
+    id) pair of a thermostat entity. The coordinator only notifies the entity
+    when that product or thermostat changed, unless another context is given;
+    None gets every update.
+    """
 
     def __init__(
-        self, coordinator, config_entry, product_serial_number, reference, modem
+        self,
+        coordinator,
+        config_entry,
+        product_serial_number,
+        reference,
+        modem,
+        index_key=None,
+        context=UNDEFINED,
     ) -> None:
-        super().__init__(coordinator)
+        self.index_key = index_key or product_serial_number
+        super().__init__(
+            coordinator, self.index_key if context is UNDEFINED else context
+        )
         self._attr_config_entry = config_entry
         self.product_serial_number = product_serial_number
         self.reference = reference
         self.modem = modem
+
+    async def async_added_to_hass(self) -> None:
+        """Register the entity with the discovery of its product or thermostat."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.discovery.async_track(self.index_key, self)
+        )
+
+    @property
+    def product(self) -> AldesProductEntry | None:
+        """Return the indexed product of this entity."""
+        return self.coordinator.index.products.get(self.product_serial_number)
+
+
+class AldesHubEntity(CoordinatorEntity):
+    """Aldes entity describing the integration itself rather than a product
+
+    These entities are written on every refresh, so they are disabled by
+    default.
+    """
+
+    _attr_entity_registry_enabled_default = False
+    # Named after the device, whose name does not include the account email.
+    _attr_has_entity_name = True
+
+    def __init__(self, coordinator, config_entry) -> None:
+        super().__init__(coordinator)
+        self._attr_config_entry = config_entry
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, config_entry.entry_id)},
+            entry_type=DeviceEntryType.SERVICE,
+            manufacturer=MANUFACTURER,
+            name=f"{NAME} account",
+        )
@@ -0,0 +1,168 @@
+"""Bounded per-probe history of Aldes measurements."""
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterable
+
+from .models import Product
+
+HISTORY_SIZE = 36
+
+PROBES_BY_REFERENCE = {
+    "EASY_HOME_CONNECT": ("hr_cu_co", "hr_ba1_co", "hr_ba2_co", "co2"),
+}
+
+
+class ProbeHistory:
+    """Fixed-size ring buffer of timestamped samples.
+
+    The mean and the rate of change over the buffered window are maintained
+    incrementally, so each new sample costs O(1).
+    """
+
+    __slots__ = ("_times", "_values", "_start", "_count", "_sum")
+
+    def __init__(self, size: int = HISTORY_SIZE) -> None:
+        """Initialize an empty buffer of the given size."""
+        self._times = array("d", bytes(8 * size))
+        self._values = array("d", bytes(8 * size))
+        self._start = 0
+        self._count = 0
+        self._sum = 0.0
+
+    def __len__(self) -> int:
+        """Return the number of buffered samples."""
+        return self._count
+
+    def append(self, timestamp: float, value: float) -> None:
+        """Add a sample, dropping the oldest one when the buffer is full."""
+        size = len(self._values)
+        if self._count == size:
+            self._sum -= self._values[self._start]
+            position = self._start
+            self._start = (self._start + 1) % size
+        else:
+            position = (self._start + self._count) % size
+            self._count += 1
+        self._times[position] = timestamp
+        self._values[position] = value
+        self._sum += value
+
+    @property
+    def latest(self) -> float | None:
+        """Return the newest value."""
+        if not self._count:
+            return None
+        return self._values[(self._start + self._count - 1) % len(self._values)]
+
+    @property
+    def mean(self) -> float | None:
+        """Return the mean value over the window."""
+        if not self._count:
+            return None
+        return self._sum / self._count
+
+    @property
+    def rate(self) -> float | None:
+        """Return the change per hour between the oldest and newest samples."""
+        if self._count < 2:
+            return None
+        newest = (self._start + self._count - 1) % len(self._values)
+        elapsed = self._times[newest] - self._times[self._start]
+        if elapsed <= 0:
+            return None
+        return (self._values[newest] - self._values[self._start]) * 3600 / elapsed
+
+    def time_to(self, target: float) -> float | None:
+        """Return the hours needed to reach target at the current rate."""
+        latest, rate = self.latest, self.rate
+        if latest is None or rate is None:
+            return None
+        gap = target - latest
+        if abs(gap) < 0.1:
+            return 0
+        if rate == 0 or (gap > 0) != (rate > 0):
+            return None
+        return gap / rate
+
+    def as_list(self) -> list[list[float]]:
+        """Return the samples from oldest to newest."""
+        size = len(self._values)
+        return [
+            [
+                self._times[(self._start + i) % size],
+                self._values[(self._start + i) % size],
+            ]
+            for i in range(self._count)
+        ]
+
+
+class AldesHistory:
+    """Histories of the EASYHOME humidity and CO2 probes and T.One® AIR rooms."""
+
+    def __init__(self, size: int = HISTORY_SIZE) -> None:
+        """Initialize."""
+        self._size = size
+        self.probes: dict[str, ProbeHistory] = {}
+
+    def get(self, serial_number: str, probe) -> ProbeHistory | None:
+        """Return the history of a probe or thermostat of a product."""
+        return self.probes.get(f"{serial_number}:{probe}")
+
+    def record(self, products: Iterable[Product], timestamp: float) -> None:
+        """Add the current value of every probe of a snapshot."""
+        for product in products:
+            if not product.is_connected:
+                continue
+            for probe in PROBES_BY_REFERENCE.get(product.reference, ()):
+                self._append(
+                    product.serial_number,
+                    probe,
+                    timestamp,
+                    getattr(product.indicator, probe),
+                )
+            for thermostat in product.indicator.thermostats:
+                self._append(
+                    product.serial_number,
+                    thermostat.thermostat_id,
+                    timestamp,
+                    thermostat.current_temperature,
+                )
+
+    def remove(self, keys: Iterable[str | tuple[str, int]]) -> None:
+        """Drop the histories of vanished products and thermostats.
+
+        Keys are serial numbers, which drop every probe of the product, or
+        (serial number, thermostat id) pairs.
+        """
+        serial_numbers: set[str] = set()
+        thermostats: set[str] = set()
+        for key in keys:
+            if isinstance(key, tuple):
+                thermostats.add(f"{key[0]}:{key[1]}")
+            else:
+                serial_numbers.add(key)
+        for key in list(self.probes):
+            if key in thermostats or key.rpartition(":")[0] in serial_numbers:
+                del self.probes[key]
+
+    def as_dict(self) -> dict[str, list[list[float]]]:
+        """Return every history for storage."""
+        return {key: history.as_list() for key, history in self.probes.items()}
+
+    def load(self, stored: dict[str, list[list[float]]]) -> None:
+        """Refill the histories from storage."""
+        for key, samples in stored.items():
+            history = self.probes[key] = ProbeHistory(self._size)
+            for timestamp, value in samples:
+                history.append(timestamp, value)
+
+    def _append(self, serial_number: str, probe, timestamp: float, value) -> None:
+        """Add a sample to a probe history, creating it on first use."""
+        if value is None:
+            return
+        key = f"{serial_number}:{probe}"
+        history = self.probes.get(key)
+        if history is None:
+            history = self.probes[key] = ProbeHistory(self._size)
+        history.append(timestamp, value)
@@ -0,0 +1,140 @@
+"""Request and processing metrics for the Aldes integration."""
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections import Counter, deque
+from itertools import accumulate
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+LATENCY_WINDOW = 64
+MIN_QUANTILE_SAMPLES = 10
+
+
+class LatencyHistogram:
+    """Cumulative latency histogram with fixed buckets in seconds."""
+
+    __slots__ = ("counts", "count", "total", "last", "recent")
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.last: float | None = None
+        self.recent: deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    def record(self, seconds: float) -> None:
+        """Add a sample."""
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        self.recent.append(seconds)
+
+    def quantile(self, fraction: float) -> float | None:
+        """Return a quantile of the recent samples, None while they are too few."""
+        if len(self.recent) < MIN_QUANTILE_SAMPLES:
+            return None
+        ordered = sorted(self.recent)
+        return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+    def as_dict(self) -> dict:
+        """Return the histogram for diagnostics, with cumulative buckets."""
+        cumulative = list(accumulate(self.counts))
+        buckets = {
+            f"le_{bound}": count for bound, count in zip(LATENCY_BUCKETS, cumulative)
+        }
+        buckets["le_inf"] = cumulative[-1]
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "last": self.last,
+            "p95": self.quantile(0.95),
+            "buckets": buckets,
+        }
+
+
+class AldesMetrics:
+    """Metrics recorded by AldesApi and the coordinator."""
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.latency: dict[str, LatencyHistogram] = {}
+        self.queue_wait: dict[str, LatencyHistogram] = {}
+        self.payload_bytes: dict[str, int] = {}
+        self.wire_bytes: dict[str, int] = {}
+        self.decode_time: float | None = None
+        self.fanout_time: float | None = None
+        self.fetches = 0
+        self.hedged_fetches = 0
+        self.hedge_wins = 0
+        self.changed_payloads = 0
+        self.unchanged_payloads = 0
+        self.auth_refreshes = 0
+        self.auth_failures: Counter[str] = Counter()
+
+    @property
+    def unchanged_ratio(self) -> float | None:
+        """Return the share of products fetches that returned the same payload."""
+        total = self.changed_payloads + self.unchanged_payloads
+        return self.unchanged_payloads / total if total else None
+
+    @property
+    def hedge_rate(self) -> float | None:
+        """Return the share of products fetches that sent a hedged request."""
+        return self.hedged_fetches / self.fetches if self.fetches else None
+
+    @property
+    def hedge_win_rate(self) -> float | None:
+        """Return the share of hedged requests that answered first."""
+        if not self.hedged_fetches:
+            return None
+        return self.hedge_wins / self.hedged_fetches
+
+    def latency_quantile(self, endpoint: str, fraction: float) -> float | None:
+        """Return a latency quantile of an endpoint over its recent calls."""
+        histogram = self.latency.get(endpoint)
+        return None if histogram is None else histogram.quantile(fraction)
+
+    def record_latency(self, endpoint: str, seconds: float) -> None:
+        """Record the latency of a call to an endpoint."""
+        histogram = self.latency.get(endpoint)
+        if histogram is None:
+            histogram = self.latency[endpoint] = LatencyHistogram()
+        histogram.record(seconds)
+
+    def record_queue_wait(self, priority: str, seconds: float) -> None:
+        """Record the time a request of a priority class waited for a slot."""
+        histogram = self.queue_wait.get(priority)
+        if histogram is None:
+            histogram = self.queue_wait[priority] = LatencyHistogram()
+        histogram.record(seconds)
+
+    def last_latency(self, endpoint: str) -> float | None:
+        """Return the latency of the last call to an endpoint."""
+        histogram = self.latency.get(endpoint)
+        return None if histogram is None else histogram.last
+
+    def as_dict(self) -> dict:
+        """Return every metric for diagnostics."""
+        return {
+            "latency": {
+                endpoint: histogram.as_dict()
+                for endpoint, histogram in self.latency.items()
+            },
+            "queue_wait": {
+                priority: histogram.as_dict()
+                for priority, histogram in self.queue_wait.items()
+            },
+            "payload_bytes": dict(self.payload_bytes),
+            "wire_bytes": dict(self.wire_bytes),
+            "fetches": self.fetches,
+            "hedged_fetches": self.hedged_fetches,
+            "hedge_wins": self.hedge_wins,
+            "changed_payloads": self.changed_payloads,
+            "unchanged_payloads": self.unchanged_payloads,
+            "decode_time": self.decode_time,
+            "fanout_time": self.fanout_time,
+            "auth_refreshes": self.auth_refreshes,
+            "auth_failures": dict(self.auth_failures),
+        }
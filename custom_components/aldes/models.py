@@ -0,0 +1,205 @@
+"""Typed records decoded from the Aldes products payload."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+
+class AldesDecodeError(Exception):
+    """Raised when the products payload does not have the expected shape."""
+
+
+@dataclass(frozen=True, slots=True)
+class Thermostat:
+    """A T.One® AIR room thermostat."""
+
+    thermostat_id: int
+    name: str
+    temperature_set: float | None
+    current_temperature: float | None
+
+
+@dataclass(frozen=True, slots=True)
+class Qai:
+    """Air quality index reported by an EASYHOME product."""
+
+    actual_value: float | None
+    polluant_dominant: str | None
+
+
+@dataclass(frozen=True, slots=True)
+class Indicator:
+    """Product measurements and settings used by the platforms."""
+
+    hr_cu_co: float | None
+    tmp_cu: float | None
+    hr_ba1_co: float | None
+    tmp_ba1: float | None
+    hr_ba2_co: float | None
+    tmp_ba2: float | None
+    co2: float | None
+    qai: Qai | None
+    var_hr: float | None
+    current_air_mode: str | None
+    cmist: float | None
+    cmast: float | None
+    fmist: float | None
+    fmast: float | None
+    thermostats: tuple[Thermostat, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class Product:
+    """An Aldes product attached to the account."""
+
+    serial_number: str
+    reference: str
+    modem: str
+    is_connected: bool
+    mode: str | None
+    has_thermostats: bool
+    indicator: Indicator
+
+
+_NUMBER = (int, float)
+
+
+def _typed(fields: dict, key: str, types: type | tuple[type, ...], required=False):
+    """Return a field if it has one of types, None when optional and missing.
+
+    Booleans are rejected, since JSON true and false would otherwise pass for
+    the numbers 1 and 0.
+    """
+    value = fields[key] if required else fields.get(key)
+    if value is None and not required:
+        return None
+    if not isinstance(value, types) or isinstance(value, bool):
+        raise TypeError(f"{key} is {type(value).__name__}")
+    return value
+
+
+def decode_products(payload: Any) -> list[Product]:
+    """Decode the products payload, keeping only the fields in use."""
+    if not isinstance(payload, list):
+        raise AldesDecodeError(
+            f"Expected a list of products, got {type(payload).__name__}"
+        )
+    return [
+        _decode_product(position, product) for position, product in enumerate(payload)
+    ]
+
+
+def _decode_product(position: int, product: Any) -> Product:
+    """Decode one product."""
+    try:
+        indicator = product["indicator"]
+        mode = None
+        for data_line in product.get("indicators") or ():
+            if data_line["type"] == "MODE":
+                mode = _typed(data_line, "value", str)
+        qai = indicator.get("Qai")
+        if qai is not None and not isinstance(qai, dict):
+            raise TypeError(f"Qai is {type(qai).__name__}")
+        return Product(
+            serial_number=_typed(product, "serial_number", str, required=True),
+            reference=_typed(product, "reference", str, required=True),
+            modem=_typed(product, "modem", str, required=True),
+            is_connected=bool(product["isConnected"]),
+            mode=mode,
+            has_thermostats=product.get("thermostats") != "null",
+            indicator=Indicator(
+                hr_cu_co=_typed(indicator, "HrCuCo", _NUMBER),
+                tmp_cu=_typed(indicator, "TmpCu", _NUMBER),
+                hr_ba1_co=_typed(indicator, "HrBa1Co", _NUMBER),
+                tmp_ba1=_typed(indicator, "TmpBa1", _NUMBER),
+                hr_ba2_co=_typed(indicator, "HrBa2Co", _NUMBER),
+                tmp_ba2=_typed(indicator, "TmpBa2", _NUMBER),
+                co2=_typed(indicator, "CO2", _NUMBER),
+                qai=(
+                    None
+                    if qai is None
+                    else Qai(
+                        actual_value=_typed(qai, "actualValue", _NUMBER),
+                        polluant_dominant=_typed(qai, "polluantDominant", str),
+                    )
+                ),
+                var_hr=_typed(indicator, "VarHR", _NUMBER),
+                current_air_mode=_typed(indicator, "current_air_mode", str),
+                cmist=_typed(indicator, "cmist", _NUMBER),
+                cmast=_typed(indicator, "cmast", _NUMBER),
+                fmist=_typed(indicator, "fmist", _NUMBER),
+                fmast=_typed(indicator, "fmast", _NUMBER),
+                thermostats=tuple(
+                    Thermostat(
+                        thermostat_id=_typed(
+                            thermostat, "ThermostatId", int, required=True
+                        ),
+                        name=_typed(thermostat, "Name", str, required=True),
+                        temperature_set=_typed(thermostat, "TemperatureSet", _NUMBER),
+                        current_temperature=_typed(
+                            thermostat, "CurrentTemperature", _NUMBER
+                        ),
+                    )
+                    for thermostat in indicator.get("thermostats") or ()
+                ),
+            ),
+        )
+    except (AttributeError, KeyError, TypeError) as exception:
+        serial_number = (
+            product.get("serial_number") if isinstance(product, dict) else None
+        )
+        raise AldesDecodeError(
+            f"Malformed product {serial_number or position}: {exception!r}"
+        ) from exception
+
+
+def encode_products(products: list[Product]) -> list[dict[str, Any]]:
+    """Encode products back into the payload shape read by decode_products."""
+    return [_encode_product(product) for product in products]
+
+
+def _encode_product(product: Product) -> dict[str, Any]:
+    """Encode one product."""
+    indicator = product.indicator
+    return {
+        "serial_number": product.serial_number,
+        "reference": product.reference,
+        "modem": product.modem,
+        "isConnected": product.is_connected,
+        "indicators": (
+            [] if product.mode is None else [{"type": "MODE", "value": product.mode}]
+        ),
+        "thermostats": None if product.has_thermostats else "null",
+        "indicator": {
+            "HrCuCo": indicator.hr_cu_co,
+            "TmpCu": indicator.tmp_cu,
+            "HrBa1Co": indicator.hr_ba1_co,
+            "TmpBa1": indicator.tmp_ba1,
+            "HrBa2Co": indicator.hr_ba2_co,
+            "TmpBa2": indicator.tmp_ba2,
+            "CO2": indicator.co2,
+            "Qai": (
+                None
+                if indicator.qai is None
+                else {
+                    "actualValue": indicator.qai.actual_value,
+                    "polluantDominant": indicator.qai.polluant_dominant,
+                }
+            ),
+            "VarHR": indicator.var_hr,
+            "current_air_mode": indicator.current_air_mode,
+            "cmist": indicator.cmist,
+            "cmast": indicator.cmast,
+            "fmist": indicator.fmist,
+            "fmast": indicator.fmast,
+            "thermostats": [
+                {
+                    "ThermostatId": thermostat.thermostat_id,
+                    "Name": thermostat.name,
+                    "TemperatureSet": thermostat.temperature_set,
+                    "CurrentTemperature": thermostat.current_temperature,
+                }
+                for thermostat in indicator.thermostats
+            ],
+        },
+    }
@@ -0,0 +1,130 @@
+"""Adaptive polling for the Aldes coordinator."""
+from __future__ import annotations
+
+from collections import deque
+from datetime import timedelta
+from itertools import islice
+import math
+from statistics import median
+import time
+
+BURST_POLLS = 3
+STRETCH_FACTOR = 1.5
+MAX_BACKOFF_EXPONENT = 6
+CADENCE_SAMPLES = 6
+PHASE_LAG = 0.1
+
+
+class AldesPollScheduler:
+    """Choose the interval until the next products fetch.
+
+    Polls run at the minimum interval for a few refreshes after a command,
+    slow down while the payload stays unchanged, back off exponentially while
+    the cloud fails and lock onto the cadence at which upstream data changes.
+    """
+
+    def __init__(
+        self,
+        default_interval: float,
+        min_interval: float,
+        max_interval: float,
+        offset: float = 0,
+    ) -> None:
+        """Initialize with interval bounds and a one-time offset in seconds.
+
+        The offset delays the poll after the first refresh so that accounts
+        set up together do not keep polling the cloud in the same second.
+        """
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.default_interval = self._clamp(default_interval)
+        self.interval = self.default_interval
+        self.decision = "default"
+        self.failures = 0
+        self.cadence: float | None = None
+        self._stretched = self.default_interval
+        self._burst_remaining = 0
+        self._offset = offset
+        self._changes: deque[float] = deque(maxlen=CADENCE_SAMPLES)
+
+    @property
+    def update_interval(self) -> timedelta:
+        """Return the current interval for the coordinator."""
+        return timedelta(seconds=self.interval)
+
+    def on_command(self) -> timedelta:
+        """Poll fast for a few refreshes after a command was sent."""
+        self._burst_remaining = BURST_POLLS
+        return self._set(self.min_interval, "command burst")
+
+    def on_failure(self) -> timedelta:
+        """Back off exponentially while refreshes fail."""
+        self.failures += 1
+        exponent = min(self.failures, MAX_BACKOFF_EXPONENT)
+        return self._set(self.default_interval * 2**exponent, "backoff")
+
+    def on_success(self, changed: bool, now: float | None = None) -> timedelta:
+        """Pick the next interval after a successful refresh."""
+        now = time.monotonic() if now is None else now
+        self.failures = 0
+        if changed:
+            self._changes.append(now)
+            self._update_cadence()
+            self._stretched = self.default_interval
+        else:
+            self._stretched = self._clamp(self._stretched * STRETCH_FACTOR)
+
+        if self._burst_remaining:
+            self._burst_remaining -= 1
+            return self._set(self.min_interval, "command burst")
+
+        interval = self._stretched
+        decision = "changed" if changed else "unchanged"
+        if self.cadence is not None:
+            until_change = self._next_expected_change(now) - now
+            if until_change < interval:
+                interval, decision = until_change, "phase lock"
+        if self._offset:
+            interval, decision = interval + self._offset, f"{decision}, staggered"
+            self._offset = 0
+        return self._set(interval, decision)
+
+    def as_dict(self) -> dict:
+        """Return the scheduler state for diagnostics."""
+        return {
+            "decision": self.decision,
+            "failures": self.failures,
+            "cadence": None if self.cadence is None else round(self.cadence),
+            "burst_remaining": self._burst_remaining,
+            "min_interval": self.min_interval,
+            "max_interval": self.max_interval,
+        }
+
+    def _update_cadence(self) -> None:
+        """Estimate the upstream change cadence from the last changes seen."""
+        if len(self._changes) < 3:
+            return
+        cadence = median(
+            later - earlier
+            for earlier, later in zip(self._changes, islice(self._changes, 1, None))
+        )
+        if self.min_interval <= cadence <= self.max_interval:
+            self.cadence = cadence
+        else:
+            self.cadence = None
+
+    def _next_expected_change(self, now: float) -> float:
+        """Return when the next upstream change should be visible."""
+        last_change = self._changes[-1]
+        periods = math.floor((now - last_change) / self.cadence) + 1
+        return last_change + periods * self.cadence + self.cadence * PHASE_LAG
+
+    def _set(self, interval: float, decision: str) -> timedelta:
+        """Record the chosen interval and the reason for it."""
+        self.interval = self._clamp(interval)
+        self.decision = decision
+        return self.update_interval
+
+    def _clamp(self, interval: float) -> float:
+        """Keep an interval within the configured bounds."""
+        return min(max(interval, self.min_interval), self.max_interval)
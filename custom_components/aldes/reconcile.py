@@ -0,0 +1,237 @@
+"""Desired state reconciliation of Aldes commands."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Hashable
+from dataclasses import dataclass
+import logging
+import time
+from typing import TYPE_CHECKING, Any
+
+from . import confirm
+from .const import MODES_TEXT
+
+if TYPE_CHECKING:
+    from .coordinator import AldesDataUpdateCoordinator, AldesIndex
+
+_LOGGER = logging.getLogger(__name__)
+
+DESIRED_STATE_TTL = 3600
+REAPPLY_DELAY = 60
+MAX_REAPPLY = 3
+# Older snapshots may miss changes made from the Aldes app in the meantime,
+# so commands are sent regardless once polls have stretched past this age.
+MAX_SNAPSHOT_AGE = 600
+
+
+@dataclass
+class _DesiredState:
+    """A state requested for a product or thermostat."""
+
+    value: Any
+    expires_at: float
+    sent_at: float
+    reapplied: int = 0
+
+
+class AldesReconciler:
+    """Send only the commands that change the state of a product.
+
+    Callers declare the mode of a product and the setpoints of its
+    thermostats. Requests a fresh snapshot already reflects are suppressed, and
+    desired states that a changed snapshot still contradicts are sent again a
+    bounded number of times, for instance once a product leaves a forced
+    mode. A desired state is forgotten as soon as the snapshot shows it, so
+    later changes made from the Aldes app are never reverted.
+    """
+
+    def __init__(self, coordinator: AldesDataUpdateCoordinator) -> None:
+        """Initialize."""
+        self._coordinator = coordinator
+        self._modes: dict[str, _DesiredState] = {}
+        self._setpoints: dict[tuple[str, int], _DesiredState] = {}
+        self._tasks: dict[Hashable, asyncio.Task] = {}
+        self.sent = 0
+        self.suppressed = 0
+        self.reapplied = 0
+
+    async def async_set_mode(self, serial_number: str, option: str) -> bool:
+        """Declare the mode of a product, returning whether it was sent."""
+        if not self._declare(
+            self._modes, serial_number, option, _mode(self._index, serial_number)
+        ):
+            return False
+        await self._async_send_declared(
+            self._modes, serial_number, self._send_mode(serial_number, option)
+        )
+        return True
+
+    async def async_set_setpoint(
+        self, serial_number: str, thermostat_id: int, temperature: int
+    ) -> bool:
+        """Declare the setpoint of a thermostat, returning whether it was sent."""
+        key = (serial_number, thermostat_id)
+        if not self._declare(
+            self._setpoints, key, temperature, _setpoint(self._index, key)
+        ):
+            return False
+        await self._async_send_declared(
+            self._setpoints, key, self._send_setpoint(key, temperature)
+        )
+        return True
+
+    @property
+    def pending(self) -> int:
+        """Return the number of desired states not yet seen in a snapshot."""
+        return len(self._modes) + len(self._setpoints)
+
+    def close(self) -> None:
+        """Cancel the commands being sent again and forget desired states."""
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+        self._modes.clear()
+        self._setpoints.clear()
+
+    def reconcile(self, index: AldesIndex, changed: set | None) -> None:
+        """Compare desired states with a fresh snapshot and resend drifted ones.
+
+        changed holds the product and thermostat keys whose payload changed,
+        None when everything must be checked.
+        """
+        now = time.monotonic()
+        for serial_number, desired in list(self._modes.items()):
+            self._reconcile(
+                self._modes,
+                serial_number,
+                desired,
+                _mode(index, serial_number),
+                changed is None or serial_number in changed,
+                now,
+                self._send_mode,
+            )
+        for key, desired in list(self._setpoints.items()):
+            self._reconcile(
+                self._setpoints,
+                key,
+                desired,
+                _setpoint(index, key),
+                changed is None or key in changed,
+                now,
+                self._send_setpoint,
+            )
+
+    @property
+    def _index(self) -> AldesIndex:
+        """Return the current snapshot index."""
+        return self._coordinator.index
+
+    @property
+    def _snapshot_is_fresh(self) -> bool:
+        """Return whether the snapshot is recent enough to suppress commands."""
+        age = self._coordinator.snapshot_age
+        return (
+            not self._coordinator.stale and age is not None and age <= MAX_SNAPSHOT_AGE
+        )
+
+    def _declare(self, states: dict, key, value, current) -> bool:
+        """Record a desired state, returning whether a command is needed.
+
+        A pending state only counts as a duplicate while its command is being
+        confirmed: once the product rejected it, asking again sends it again.
+        The snapshot is only trusted to suppress a command while it is fresh.
+        """
+        now = time.monotonic()
+        desired = states.get(key)
+        if desired is not None and now - desired.sent_at <= sum(
+            confirm.VERIFICATION_DELAYS
+        ):
+            current = desired.value
+        elif not self._snapshot_is_fresh:
+            current = None
+        if current == value:
+            self.suppressed += 1
+            return False
+        states[key] = _DesiredState(value, now + DESIRED_STATE_TTL, now)
+        return True
+
+    async def _async_send_declared(self, states: dict, key, command) -> None:
+        """Send a declared state, forgetting it when the command fails."""
+        try:
+            await command
+        except Exception:
+            states.pop(key, None)
+            raise
+
+    def _reconcile(
+        self, states: dict, key, desired: _DesiredState, current, changed, now, send
+    ) -> None:
+        """Forget a reached or expired desired state, or send it again."""
+        if current == desired.value or now >= desired.expires_at:
+            del states[key]
+            return
+        if (
+            current is None
+            or not changed
+            or key in self._tasks
+            or now - desired.sent_at < REAPPLY_DELAY
+        ):
+            return
+        if desired.reapplied >= MAX_REAPPLY:
+            _LOGGER.warning(
+                "Aldes %s still reports %s instead of %s, giving up",
+                key,
+                current,
+                desired.value,
+            )
+            del states[key]
+            return
+        desired.reapplied += 1
+        desired.sent_at = now
+        self.reapplied += 1
+        self._start(key, send(key, desired.value))
+
+    def _start(self, key, command: Awaitable) -> None:
+        """Send a command in the background."""
+
+        async def _async_send() -> None:
+            try:
+                await command
+            except Exception as exception:  # pylint: disable=broad-except
+                _LOGGER.warning("Failed to send again Aldes %s: %s", key, exception)
+            finally:
+                self._tasks.pop(key, None)
+
+        self._tasks[key] = self._coordinator.hass.async_create_task(_async_send())
+
+    async def _send_mode(self, serial_number: str, option: str) -> None:
+        """Send a mode to a product."""
+        product = self._index.products.get(serial_number)
+        if product is None:
+            return
+        self.sent += 1
+        await self._coordinator.api.set_mode(product.modem, option)
+
+    async def _send_setpoint(self, key: tuple[str, int], temperature: int) -> None:
+        """Send a setpoint to a thermostat."""
+        thermostat = self._index.thermostats.get(key)
+        if thermostat is None:
+            return
+        self.sent += 1
+        await self._coordinator.api.set_target_temperature(
+            thermostat.product.modem, key[1], thermostat.name, temperature
+        )
+
+
+def _mode(index: AldesIndex, serial_number: str) -> str | None:
+    """Return the mode a product reports in a snapshot."""
+    product = index.products.get(serial_number)
+    if product is None or product.data.mode is None:
+        return None
+    return MODES_TEXT.get(product.data.mode)
+
+
+def _setpoint(index: AldesIndex, key: tuple[str, int]) -> int | None:
+    """Return the setpoint a thermostat reports in a snapshot."""
+    thermostat = index.thermostats.get(key)
+    return None if thermostat is None else thermostat.data.temperature_set
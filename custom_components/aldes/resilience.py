@@ -0,0 +1,94 @@
+"""Retry and circuit breaker policies for the Aldes cloud."""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import random
+import time
+
+
+class CircuitOpenException(Exception):
+    """Raised while the circuit breaker rejects calls to the cloud."""
+
+
+class AldesRetryPolicy:
+    """Exponential backoff with full jitter."""
+
+    def __init__(
+        self, attempts: int = 3, base_delay: float = 0.5, max_delay: float = 5
+    ) -> None:
+        """Initialize."""
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int, retry_after: str | None = None) -> float | None:
+        """Return how long to wait before retrying, or None to give up."""
+        if attempt + 1 >= self.attempts:
+            return None
+        if retry_after is not None:
+            delay = parse_retry_after(retry_after)
+            if delay is not None:
+                return delay if delay <= self.max_delay else None
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+def parse_retry_after(value: str) -> float | None:
+    """Parse a Retry-After header given in seconds or as an HTTP date."""
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0)
+
+
+class AldesCircuitBreaker:
+    """Fail fast after repeated failures until the cloud recovers.
+
+    Once open, a single trial call is let through every reset_timeout seconds;
+    its success closes the circuit again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60) -> None:
+        """Initialize."""
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at: float | None = None
+
+    @property
+    def state(self) -> str:
+        """Return closed, open or half_open."""
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenException when calls must not reach the cloud."""
+        state = self.state
+        if state == "open":
+            raise CircuitOpenException(
+                f"Aldes cloud unavailable after {self.failures} failures"
+            )
+        if state == "half_open":
+            # Let this trial call through and hold back the others.
+            self._opened_at = time.monotonic()
+
+    def record_success(self) -> None:
+        """Close the circuit."""
+        self.failures = 0
+        self._opened_at = None
+
+    def record_failure(self) -> None:
+        """Count a failure, opening the circuit past the threshold."""
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
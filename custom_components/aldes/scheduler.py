@@ -0,0 +1,176 @@
+"""Priority scheduling of the requests sent to the Aldes cloud."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+import heapq
+from itertools import count
+import time
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_CONFIRMATION = 1
+PRIORITY_BACKGROUND = 2
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_CONFIRMATION: "confirmation",
+    PRIORITY_BACKGROUND: "background",
+}
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at a fixed rate."""
+
+    __slots__ = ("rate", "capacity", "_tokens", "_updated")
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        """Initialize a full bucket."""
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def take(self) -> float:
+        """Take a token, or return the seconds to wait until one is available."""
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0
+        return (1 - self._tokens) / self.rate
+
+
+@dataclass
+class _HostQueue:
+    """Requests waiting for a host, ordered by priority then arrival."""
+
+    bucket: TokenBucket
+    waiting: list[tuple[int, int, asyncio.Future]] = field(default_factory=list)
+    active: int = 0
+    wakeup: asyncio.TimerHandle | None = None
+
+
+class AldesRequestScheduler:
+    """Order the requests to each host by priority.
+
+    Interactive commands go before confirmation refreshes, which go before
+    background polls. Each host gets a bounded number of requests in flight
+    and a token bucket rate limit. The last reserved slots of a host only
+    take interactive commands, so that slow polls never hold them all.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 3,
+        rate: float = 2,
+        burst: float = 5,
+        reserved: int = 1,
+    ) -> None:
+        """Initialize with the per host concurrency, reserve and rate limit."""
+        self.concurrency = concurrency
+        self.reserved = reserved
+        self.rate = rate
+        self.burst = burst
+        self._hosts: dict[str, _HostQueue] = {}
+        self._sequence = count()
+
+    @property
+    def queue_depth(self) -> dict[str, int]:
+        """Return the number of waiting requests per priority class."""
+        depth = dict.fromkeys(PRIORITY_NAMES.values(), 0)
+        for queue in self._hosts.values():
+            for priority, _, waiter in queue.waiting:
+                if not waiter.done():
+                    depth[PRIORITY_NAMES[priority]] += 1
+        return depth
+
+    @property
+    def in_flight(self) -> int:
+        """Return the number of requests holding a slot."""
+        return sum(queue.active for queue in self._hosts.values())
+
+    def has_free_slot(self, host: str, priority: int) -> bool:
+        """Return whether a request of a priority would start without waiting."""
+        queue = self._hosts.get(host)
+        if queue is None:
+            return True
+        ahead = sum(
+            not waiter.done() and queued <= priority
+            for queued, _, waiter in queue.waiting
+        )
+        return queue.active + ahead < self._limit(priority)
+
+    @asynccontextmanager
+    async def slot(self, host: str, priority: int) -> AsyncIterator[float]:
+        """Wait for a slot on a host and yield the time spent waiting."""
+        queue = self._hosts.get(host)
+        if queue is None:
+            queue = self._hosts[host] = _HostQueue(TokenBucket(self.rate, self.burst))
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(queue.waiting, (priority, next(self._sequence), waiter))
+        started = time.monotonic()
+        self._dispatch(host)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release(host)
+            raise
+        try:
+            yield time.monotonic() - started
+        finally:
+            self._release(host)
+
+    def close(self) -> None:
+        """Cancel the pending wake-ups and every waiting request."""
+        for queue in self._hosts.values():
+            if queue.wakeup is not None:
+                queue.wakeup.cancel()
+                queue.wakeup = None
+            for _, _, waiter in queue.waiting:
+                waiter.cancel()
+            queue.waiting.clear()
+
+    def _release(self, host: str) -> None:
+        """Free a slot and start the next waiting request."""
+        self._hosts[host].active -= 1
+        self._dispatch(host)
+
+    def _wake(self, host: str) -> None:
+        """Dispatch once the rate limit lets a new request through."""
+        self._hosts[host].wakeup = None
+        self._dispatch(host)
+
+    def _limit(self, priority: int) -> int:
+        """Return the number of slots requests of a priority may hold."""
+        if priority == PRIORITY_INTERACTIVE:
+            return self.concurrency
+        return self.concurrency - self.reserved
+
+    def _dispatch(self, host: str) -> None:
+        """Start waiting requests while slots and rate tokens are available."""
+        queue = self._hosts[host]
+        while queue.waiting:
+            priority, _, waiter = queue.waiting[0]
+            if waiter.done():
+                heapq.heappop(queue.waiting)
+                continue
+            # The head has the best priority, so nothing else can start.
+            if queue.active >= self._limit(priority):
+                return
+            if queue.wakeup is not None:
+                return
+            delay = queue.bucket.take()
+            if delay:
+                queue.wakeup = asyncio.get_running_loop().call_later(
+                    delay, self._wake, host
+                )
+                return
+            _, _, waiter = heapq.heappop(queue.waiting)
+            queue.active += 1
+            waiter.set_result(None)
@@ -1,14 +1,18 @@
 """Support for the Aldes selects."""
+import logging
+
 from homeassistant.components.select import SelectEntity
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.helpers.entity import EntityCategory, DeviceInfo
+from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 
 from .const import DOMAIN, FRIENDLY_NAMES, MODES_TEXT, TEXT_MODES
 from .entity import AldesEntity
 
+_LOGGER = logging.getLogger(__name__)
+
 
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
@@ -16,23 +20,26 @@ async def async_setup_entry(
     """Add Aldes slects from a config_entry."""
     coordinator = hass.data[DOMAIN][entry.entry_id]
 
-    selects: list[AldesSelectEntity] = []
-
-    for product in coordinator.data:
-        for data_line in product["indicators"][0:]:
-            if data_line["type"] == "MODE":
+    def _build_selects(products, thermostats):
+        """Build the selects of the given products."""
+        selects: list[AldesSelectEntity] = []
+        for product in products:
+            if product.data.mode is not None:
                 selects.append(
                     AldesSelectEntity(
                         coordinator,
                         entry,
-                        product["serial_number"],
-                        product["reference"],
-                        product["modem"],
-                        MODES_TEXT[data_line["value"]],
+                        product.serial_number,
+                        product.reference,
+                        product.modem,
+                        MODES_TEXT[product.data.mode],
                     )
                 )
+        return selects
 
-    async_add_entities(selects)
+    entry.async_on_unload(
+        coordinator.discovery.async_add_platform(_build_selects, async_add_entities)
+    )
 
 
 class AldesSelectEntity(AldesEntity, SelectEntity):
@@ -59,11 +66,8 @@ class AldesSelectEntity(AldesEntity, SelectEntity):
     @property
     def device_info(self):
         """Return the device info."""
-        return DeviceInfo(
-            identifiers={(DOMAIN, self.product_serial_number)},
-            name=f"{FRIENDLY_NAMES[self.reference]} {self.product_serial_number}",
-            model=FRIENDLY_NAMES[self.reference],
-        )
+        product = self.product
+        return product.device_info if product else None
 
     @property
     def unique_id(self):
@@ -73,12 +77,8 @@ class AldesSelectEntity(AldesEntity, SelectEntity):
     @property
     def name(self):
         """Return a name to use for this entity."""
-        for product in self.coordinator.data:
-            if product["serial_number"] == self.product_serial_number:
-                for data in product["indicators"]:
-                    if data == "MODE":
-                        return f"{FRIENDLY_NAMES[self.reference]} {self.product_serial_number} mode"
-            return None
+        product = self.product
+        return f"{product.name} mode" if product else None
 
     @property
     def current_option(self) -> str:
@@ -86,20 +86,43 @@ class AldesSelectEntity(AldesEntity, SelectEntity):
 
     async def async_select_option(self, option: str) -> None:
         """Set mode."""
-        await self.coordinator.api.set_mode(self.modem, option)
+        if not await self.coordinator.reconciler.async_set_mode(
+            self.product_serial_number, option
+        ):
+            return
         self._mode = option
-        await self.coordinator.async_request_refresh()
-
-    # @callback
-    # def _handle_coordinator_update(self) -> None:
-    #    """Update attributes when the coordinator updates."""
-    #    self._async_update_attrs()
-    #    super()._handle_coordinator_update()
-
-    # @callback
-    # def _async_update_attrs(self) -> None:
-    #    """Update select attributes."""
-    #    for product in self.coordinator.data:
-    #        for data_line in product["indicators"][0:]:
-    #            if data_line["type"] == "MODE":
-    #                self._mode = MODES_TEXT[data_line["value"]]
+        self.async_write_ha_state()
+        self.coordinator.async_note_command()
+        self.hass.async_create_task(self._async_confirm_mode(option))
+
+    async def _async_confirm_mode(self, option: str) -> None:
+        """Check that the product applied the mode, reverting if it did not."""
+        if await self.coordinator.confirmer.async_confirm(
+            lambda index: self._product_mode(index) == option
+        ):
+            return
+        current_mode = self._product_mode(self.coordinator.index)
+        _LOGGER.warning(
+            "Aldes %s did not apply mode %s and stays in %s, it may be forced "
+            "by the air quality",
+            self.product_serial_number,
+            option,
+            current_mode,
+        )
+        if self._mode == option and current_mode is not None:
+            self._mode = current_mode
+            self.async_write_ha_state()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Update the mode when the coordinator updates."""
+        if (mode := self._product_mode(self.coordinator.index)) is not None:
+            self._mode = mode
+        super()._handle_coordinator_update()
+
+    def _product_mode(self, index):
+        """Get the mode reported by the product in a snapshot."""
+        product = index.products.get(self.product_serial_number)
+        if product is None or product.data.mode is None:
+            return None
+        return MODES_TEXT.get(product.data.mode)
@@ -1,26 +1,38 @@
 """Support for the Aldes sensors."""
 from __future__ import annotations
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
     UnitOfTemperature,
     PERCENTAGE,
     CONCENTRATION_PARTS_PER_MILLION,
     EntityCategory,
+    UnitOfInformation,
     UnitOfPower,
+    UnitOfTime,
 )
 from homeassistant.components.sensor import (
     SensorEntity,
     SensorDeviceClass,
     SensorEntityDescription,
+    SensorStateClass,
 )
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_call_later
 
 from .const import DOMAIN, FRIENDLY_NAMES, POLLUANTS
-from .entity import AldesEntity
+from .deadband import AldesStateFilter
+from .entity import AldesEntity, AldesHubEntity
+from .history import PROBES_BY_REFERENCE
 
 from collections.abc import Callable
 from dataclasses import dataclass
+from functools import partial
+import logging
+from operator import attrgetter
+import time
+
+_LOGGER = logging.getLogger(__name__)
 
 ATTR_HUMIDITY = "humidity"
 ATTR_TEMPERATURE = "temperature"
@@ -45,6 +57,17 @@ class AldesSensorDescription(SensorEntityDescription):
     path2recursive: bool = False
     path2id: str = None
     path2value: str = None
+    deadband: float = None
+    hysteresis: float = None
+    min_interval: float = None
+
+
+@dataclass
+class AldesHubSensorDescription(SensorEntityDescription):
+    """A class that describes integration diagnostic sensor entities."""
+
+    value: Callable = None
+    attributes: Callable = None
 
 
 EASY_HOME_SENSORS = {
@@ -57,7 +80,7 @@ EASY_HOME_SENSORS = {
         native_unit_of_measurement=PERCENTAGE,
         entity_category=EntityCategory.DIAGNOSTIC,
         path1="indicator",
-        path2="HrCuCo",
+        path2="hr_cu_co",
     ),
     f"Kitchen_{ATTR_TEMPERATURE}": AldesSensorDescription(
         key="status",
@@ -68,7 +91,7 @@ EASY_HOME_SENSORS = {
         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
         entity_category=EntityCategory.DIAGNOSTIC,
         path1="indicator",
-        path2="TmpCu",
+        path2="tmp_cu",
         value=lambda value: value / 10,
     ),
     f"Bathroom_1_{ATTR_HUMIDITY}": AldesSensorDescription(
@@ -80,7 +103,7 @@ EASY_HOME_SENSORS = {
         native_unit_of_measurement=PERCENTAGE,
         entity_category=EntityCategory.DIAGNOSTIC,
         path1="indicator",
-        path2="HrBa1Co",
+        path2="hr_ba1_co",
     ),
     f"Bathroom_1_{ATTR_TEMPERATURE}": AldesSensorDescription(
         key="status",
@@ -91,7 +114,7 @@ EASY_HOME_SENSORS = {
         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
         entity_category=EntityCategory.DIAGNOSTIC,
         path1="indicator",
-        path2="TmpBa1",
+        path2="tmp_ba1",
         value=lambda value: value / 10,
     ),
     f"Bathroom_2_{ATTR_HUMIDITY}": AldesSensorDescription(
@@ -103,7 +126,7 @@ EASY_HOME_SENSORS = {
         native_unit_of_measurement=PERCENTAGE,
         entity_category=EntityCategory.DIAGNOSTIC,
         path1="indicator",
-        path2="HrBa2Co",
+        path2="hr_ba2_co",
     ),
     f"Bathroom_2_{ATTR_TEMPERATURE}": AldesSensorDescription(
         key="status",
@@ -114,7 +137,7 @@ EASY_HOME_SENSORS = {
         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
         entity_category=EntityCategory.DIAGNOSTIC,
         path1="indicator",
-        path2="TmpBa2",
+        path2="tmp_ba2",
         value=lambda value: value / 10,
     ),
     f"{ATTR_CO2}": AldesSensorDescription(
@@ -126,7 +149,7 @@ EASY_HOME_SENSORS = {
         native_unit_of_measurement=CONCENTRATION_PARTS_PER_MILLION,
         entity_category=EntityCategory.DIAGNOSTIC,
         path1="indicator",
-        path2="CO2",
+        path2="co2",
     ),
     f"{ATTR_QAI}": AldesSensorDescription(
         key="status",
@@ -137,8 +160,8 @@ EASY_HOME_SENSORS = {
         native_unit_of_measurement=None,
         entity_category=EntityCategory.DIAGNOSTIC,
         path1="indicator",
-        path2="Qai",
-        path3="actualValue",
+        path2="qai",
+        path3="actual_value",
     ),
     f"{ATTR_POLLUANT}": AldesSensorDescription(
         key="status",
@@ -148,9 +171,9 @@ EASY_HOME_SENSORS = {
         native_unit_of_measurement=None,
         entity_category=EntityCategory.DIAGNOSTIC,
         path1="indicator",
-        path2="Qai",
-        path3="polluantDominant",
-        value=lambda value: POLLUANTS[value],
+        path2="qai",
+        path3="polluant_dominant",
+        value=POLLUANTS.get,
     ),
     f"{ATTR_VARHR}": AldesSensorDescription(
         key="status",
@@ -161,7 +184,7 @@ EASY_HOME_SENSORS = {
         native_unit_of_measurement=PERCENTAGE,
         entity_category=EntityCategory.DIAGNOSTIC,
         path1="indicator",
-        path2="VarHR",
+        path2="var_hr",
     ),
     f"{ATTR_PWRQAI}": AldesSensorDescription(
         key="status",
@@ -172,7 +195,7 @@ EASY_HOME_SENSORS = {
         native_unit_of_measurement=UnitOfPower.WATT,
         entity_category=EntityCategory.DIAGNOSTIC,
         path1="indicator",
-        path2="VarHR",
+        path2="var_hr",
     ),
 }
 
@@ -188,53 +211,424 @@ TONE_AIR_SENSORS = {
         path1="indicator",
         path2="thermostats",
         path2recursive=True,
-        path2id="ThermostatId",
-        path2value="CurrentTemperature",
+        path2id="thermostat_id",
+        path2value="current_temperature",
         value=lambda value: round(value, 1),
     ),
 }
 
 
+@dataclass
+class AldesTrendSensorDescription(SensorEntityDescription):
+    """A class that describes sensor entities derived from a probe history."""
+
+    value: Callable = None
+    unit_suffix: str = ""
+    keep_device_class: bool = False
+
+
+TREND_SENSORS = {
+    "rate": AldesTrendSensorDescription(
+        key="rate",
+        icon="mdi:trending-up",
+        name="rate of change",
+        state_class=SensorStateClass.MEASUREMENT,
+        unit_suffix="/h",
+        value=lambda history, target: history.rate,
+    ),
+    "mean": AldesTrendSensorDescription(
+        key="mean",
+        icon="mdi:chart-bell-curve-cumulative",
+        name="moving average",
+        state_class=SensorStateClass.MEASUREMENT,
+        keep_device_class=True,
+        value=lambda history, target: history.mean,
+    ),
+    "time_to_setpoint": AldesTrendSensorDescription(
+        key="time_to_setpoint",
+        icon="mdi:timer-sand",
+        name="time to setpoint",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MINUTES,
+        value=lambda history, target: (
+            None
+            if target is None or (hours := history.time_to(target)) is None
+            else hours * 60
+        ),
+    ),
+}
+
+PROBE_TRENDS = {
+    "hr_cu_co": ("Kitchen Humidity", SensorDeviceClass.HUMIDITY, PERCENTAGE),
+    "hr_ba1_co": ("Bathroom 1 Humidity", SensorDeviceClass.HUMIDITY, PERCENTAGE),
+    "hr_ba2_co": ("Bathroom 2 Humidity", SensorDeviceClass.HUMIDITY, PERCENTAGE),
+    "co2": (
+        "Carbon dioxyde",
+        SensorDeviceClass.CO2,
+        CONCENTRATION_PARTS_PER_MILLION,
+    ),
+}
+
+
+def _milliseconds(seconds):
+    """Convert a duration in seconds to rounded milliseconds."""
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+HUB_SENSORS = {
+    "dispatch_skip_ratio": AldesHubSensorDescription(
+        key="dispatch_skip_ratio",
+        icon="mdi:filter-variant-remove",
+        name="Skipped entity updates",
+        native_unit_of_measurement=PERCENTAGE,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value=lambda coordinator: (
+            None
+            if coordinator.skip_ratio is None
+            else round(coordinator.skip_ratio * 100, 1)
+        ),
+    ),
+    "poll_interval": AldesHubSensorDescription(
+        key="poll_interval",
+        icon="mdi:timer-sync-outline",
+        name="Poll interval",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value=lambda coordinator: round(coordinator.scheduler.interval),
+        attributes=lambda coordinator: coordinator.scheduler.as_dict(),
+    ),
+    "snapshot_age": AldesHubSensorDescription(
+        key="snapshot_age",
+        icon="mdi:clock-alert-outline",
+        name="Data age",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value=lambda coordinator: (
+            None
+            if coordinator.snapshot_age is None
+            else round(coordinator.snapshot_age)
+        ),
+        attributes=lambda coordinator: {
+            "stale": coordinator.stale,
+            "circuit_breaker": coordinator.api.circuit_breaker.state,
+        },
+    ),
+    "saved_auth_calls": AldesHubSensorDescription(
+        key="saved_auth_calls",
+        icon="mdi:key-chain",
+        name="Saved logins",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value=lambda coordinator: coordinator.api.token_manager.saved_auth_calls,
+    ),
+    "products_latency": AldesHubSensorDescription(
+        key="products_latency",
+        icon="mdi:timer-outline",
+        name="Products fetch latency",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value=lambda coordinator: _milliseconds(
+            coordinator.api.metrics.last_latency("products")
+        ),
+        attributes=lambda coordinator: {
+            endpoint: histogram.as_dict()
+            for endpoint, histogram in coordinator.api.metrics.latency.items()
+        },
+    ),
+    "products_latency_p95": AldesHubSensorDescription(
+        key="products_latency_p95",
+        icon="mdi:timer-alert-outline",
+        name="Products fetch latency p95",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value=lambda coordinator: _milliseconds(
+            coordinator.api.metrics.latency_quantile("products", 0.95)
+        ),
+        attributes=lambda coordinator: {
+            "hedged_fetches": coordinator.api.metrics.hedged_fetches,
+            "hedge_rate": coordinator.api.metrics.hedge_rate,
+            "hedge_win_rate": coordinator.api.metrics.hedge_win_rate,
+        },
+    ),
+    "products_payload_size": AldesHubSensorDescription(
+        key="products_payload_size",
+        icon="mdi:download-network-outline",
+        name="Products payload size",
+        device_class=SensorDeviceClass.DATA_SIZE,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value=lambda coordinator: coordinator.api.metrics.payload_bytes.get("products"),
+        attributes=lambda coordinator: {
+            "wire_bytes": coordinator.api.metrics.wire_bytes.get("products")
+        },
+    ),
+    "unchanged_payloads": AldesHubSensorDescription(
+        key="unchanged_payloads",
+        icon="mdi:content-duplicate",
+        name="Unchanged products fetches",
+        native_unit_of_measurement=PERCENTAGE,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value=lambda coordinator: (
+            None
+            if (ratio := coordinator.api.metrics.unchanged_ratio) is None
+            else round(ratio * 100, 1)
+        ),
+        attributes=lambda coordinator: {
+            "changed": coordinator.api.metrics.changed_payloads,
+            "unchanged": coordinator.api.metrics.unchanged_payloads,
+        },
+    ),
+    "decode_time": AldesHubSensorDescription(
+        key="decode_time",
+        icon="mdi:code-json",
+        name="Products decode time",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value=lambda coordinator: _milliseconds(coordinator.api.metrics.decode_time),
+    ),
+    "fanout_time": AldesHubSensorDescription(
+        key="fanout_time",
+        icon="mdi:call-split",
+        name="Entity update time",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value=lambda coordinator: _milliseconds(coordinator.api.metrics.fanout_time),
+    ),
+    "suppressed_commands": AldesHubSensorDescription(
+        key="suppressed_commands",
+        icon="mdi:send-lock-outline",
+        name="Suppressed commands",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value=lambda coordinator: coordinator.reconciler.suppressed,
+        attributes=lambda coordinator: {
+            "sent": coordinator.reconciler.sent,
+            "reapplied": coordinator.reconciler.reapplied,
+            "pending": coordinator.reconciler.pending,
+        },
+    ),
+    "suppressed_writes": AldesHubSensorDescription(
+        key="suppressed_writes",
+        icon="mdi:filter-outline",
+        name="Suppressed state writes",
+        native_unit_of_measurement=PERCENTAGE,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value=lambda coordinator: (
+            None
+            if (ratio := coordinator.suppressed_write_ratio) is None
+            else round(ratio * 100, 1)
+        ),
+        attributes=lambda coordinator: {
+            "suppressed": dict(coordinator.suppressed_writes),
+            "written": dict(coordinator.state_writes),
+        },
+    ),
+    "request_queue": AldesHubSensorDescription(
+        key="request_queue",
+        icon="mdi:tray-full",
+        name="Queued requests",
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value=lambda coordinator: sum(coordinator.api.scheduler.queue_depth.values()),
+        attributes=lambda coordinator: {
+            "queue_depth": coordinator.api.scheduler.queue_depth,
+            "in_flight": coordinator.api.scheduler.in_flight,
+            "wait": {
+                priority: histogram.as_dict()
+                for priority, histogram in coordinator.api.metrics.queue_wait.items()
+            },
+        },
+    ),
+    "auth_refreshes": AldesHubSensorDescription(
+        key="auth_refreshes",
+        icon="mdi:login",
+        name="Logins",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value=lambda coordinator: coordinator.api.metrics.auth_refreshes,
+    ),
+    "auth_failures": AldesHubSensorDescription(
+        key="auth_failures",
+        icon="mdi:login-variant",
+        name="Login failures",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value=lambda coordinator: coordinator.api.metrics.auth_failures.total(),
+        attributes=lambda coordinator: dict(coordinator.api.metrics.auth_failures),
+    ),
+}
+
+SENSORS_BY_REFERENCE = {
+    "EASY_HOME_CONNECT": EASY_HOME_SENSORS,
+    "TONE_AIR": TONE_AIR_SENSORS,
+}
+
+
+def _compile_accessor(description: AldesSensorDescription) -> Callable:
+    """Compile the paths and value transform of a description into a function.
+
+    The function takes a product and, for per thermostat sensors, one of its
+    thermostats, and returns None whenever a value along the path is missing
+    or the value transform rejects it, so that one unexpected field only
+    affects its own sensor.
+    """
+    transform = description.value
+    if description.path2recursive:
+        read_value = attrgetter(description.path2value)
+
+        def read(product, thermostat):
+            return read_value(thermostat)
+
+    elif description.path3 is None:
+        read_product = attrgetter(f"{description.path1}.{description.path2}")
+
+        def read(product, thermostat):
+            return read_product(product)
+
+    else:
+        read_parent = attrgetter(f"{description.path1}.{description.path2}")
+        read_child = attrgetter(description.path3)
+
+        def read(product, thermostat):
+            parent = read_parent(product)
+            return None if parent is None else read_child(parent)
+
+    if transform is None:
+        return read
+
+    def accessor(product, thermostat):
+        value = read(product, thermostat)
+        if value is None:
+            return None
+        try:
+            return transform(value)
+        except (ArithmeticError, KeyError, TypeError, ValueError) as exception:
+            _LOGGER.debug(
+                "Ignoring unexpected %s value %r: %r",
+                description.name,
+                value,
+                exception,
+            )
+            return None
+
+    return accessor
+
+
+COMPILED_SENSORS: dict[str, tuple] = {}
+
+
+def _compiled_sensors(reference: str) -> tuple:
+    """Return the descriptions of a model with their accessors.
+
+    Accessors are only compiled for the models found in the account.
+    """
+    compiled = COMPILED_SENSORS.get(reference)
+    if compiled is None:
+        compiled = COMPILED_SENSORS[reference] = tuple(
+            (description, _compile_accessor(description))
+            for description in SENSORS_BY_REFERENCE.get(reference, {}).values()
+        )
+    return compiled
+
+
+def _product_sensor_values(index, product) -> dict:
+    """Evaluate every sensor of a product once per snapshot.
+
+    Values are keyed by description name and thermostat id, None for the
+    product level sensors.
+    """
+    cache_key = ("sensor_values", product.serial_number)
+    values = index.cache.get(cache_key)
+    if values is not None:
+        return values
+
+    values = {}
+    data = product.data
+    for description, accessor in _compiled_sensors(product.reference):
+        if description.path2recursive:
+            for thermostat in data.indicator.thermostats:
+                values[(description.name, thermostat.thermostat_id)] = (
+                    accessor(data, thermostat) if data.is_connected else None
+                )
+        else:
+            values[(description.name, None)] = (
+                accessor(data, None) if data.is_connected else None
+            )
+    index.cache[cache_key] = values
+    return values
+
+
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
 ) -> None:
     """Add Aldes sensors from a config_entry."""
     coordinator = hass.data[DOMAIN][entry.entry_id]
 
-    entities: list[AldesSensorEntity] = []
-    for product in coordinator.data:
-        if product["reference"] == "EASY_HOME_CONNECT":
-            sensors = EASY_HOME_SENSORS
-        elif product["reference"] == "TONE_AIR":
-            sensors = TONE_AIR_SENSORS
+    async_add_entities(
+        AldesHubSensorEntity(coordinator, entry, description)
+        for description in HUB_SENSORS.values()
+    )
+    entry.async_on_unload(
+        coordinator.discovery.async_add_platform(
+            partial(_build_sensors, coordinator, entry), async_add_entities
+        )
+    )
+
+
+def _build_sensors(coordinator, entry, products, thermostats) -> list[SensorEntity]:
+    """Build the sensors of the given products and thermostats."""
+    entities: list[SensorEntity] = []
+    for product in products:
+        sensors = SENSORS_BY_REFERENCE.get(product.reference, {})
         for sensor, description in sensors.items():
-            if description.path2recursive:
-                for thermostat in product[description.path1][description.path2]:
-                    entities.append(
-                        AldesSensorEntity(
-                            coordinator,
-                            entry,
-                            product["serial_number"],
-                            product["reference"],
-                            product["modem"],
-                            thermostat["ThermostatId"],
-                            description,
-                        )
-                    )
-            else:
+            if not description.path2recursive:
                 entities.append(
                     AldesSensorEntity(
                         coordinator,
                         entry,
-                        product["serial_number"],
-                        product["reference"],
-                        product["modem"],
+                        product.serial_number,
+                        product.reference,
+                        product.modem,
                         sensor,
                         description,
                     )
                 )
+        for probe in PROBES_BY_REFERENCE.get(product.reference, ()):
+            entities.extend(
+                AldesTrendSensorEntity(coordinator, entry, product, probe, description)
+                for key, description in TREND_SENSORS.items()
+                if key != "time_to_setpoint"
+            )
 
-    async_add_entities(entities)
+    for thermostat in thermostats:
+        product = thermostat.product
+        sensors = SENSORS_BY_REFERENCE.get(product.reference, {})
+        for description in sensors.values():
+            if description.path2recursive:
+                entities.append(
+                    AldesSensorEntity(
+                        coordinator,
+                        entry,
+                        product.serial_number,
+                        product.reference,
+                        product.modem,
+                        getattr(thermostat.data, description.path2id),
+                        description,
+                    )
+                )
+        entities.extend(
+            AldesTrendSensorEntity(
+                coordinator, entry, product, thermostat.thermostat_id, description
+            )
+            for description in TREND_SENSORS.values()
+        )
+    return entities
 
 
 class AldesSensorEntity(AldesEntity, SensorEntity):
@@ -251,11 +645,27 @@ class AldesSensorEntity(AldesEntity, SensorEntity):
         description,
     ) -> None:
         super().__init__(
-            coordinator, config_entry, product_serial_number, reference, modem
+            coordinator,
+            config_entry,
+            product_serial_number,
+            reference,
+            modem,
+            (product_serial_number, probe_id) if description.path2recursive else None,
         )
         self.probe_id = probe_id
         self.entity_description = description
         self._attr_native_value = self._determine_native_value()
+        self._state_filter = AldesStateFilter.for_description(
+            description, config_entry.options
+        )
+        self._state_filter.reset(self._attr_native_value, time.monotonic())
+        self._written_available = coordinator.last_update_success
+        self._cancel_deferred_write: CALLBACK_TYPE | None = None
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Cancel a deferred state write."""
+        await super().async_will_remove_from_hass()
+        self._cancel_deferred()
 
     @property
     def unique_id(self):
@@ -265,47 +675,29 @@ class AldesSensorEntity(AldesEntity, SensorEntity):
     @property
     def name(self):
         """Return a name to use for this entity."""
-        for product in self.coordinator.data:
-            if product["serial_number"] == self.product_serial_number:
-                if self.entity_description.path2 == "thermostats":
-                    for thermostat in product["indicator"]["thermostats"]:
-                        if thermostat["ThermostatId"] == self.probe_id:
-                            return f"{FRIENDLY_NAMES[self.reference]} {self.product_serial_number} {thermostat['Name']} temperature"
-                else:
-                    return f"{FRIENDLY_NAMES[self.reference]} {self.product_serial_number} {self.entity_description.name}"
+        product = self.product
+        if product is None:
             return None
+        if self.entity_description.path2 == "thermostats":
+            thermostat = self.coordinator.index.thermostats.get(
+                (self.product_serial_number, self.probe_id)
+            )
+            if thermostat is None:
+                return None
+            return f"{product.name} {thermostat.name} temperature"
+        return f"{product.name} {self.entity_description.name}"
 
     def _determine_native_value(self):
         """Determine native value."""
-        for product in self.coordinator.data:
-            if product["isConnected"]:
-                if product["serial_number"] == self.product_serial_number:
-                    if self.entity_description.path2recursive:
-                        for thermostat in product[self.entity_description.path1][
-                            self.entity_description.path2
-                        ]:
-                            if (
-                                thermostat[self.entity_description.path2id]
-                                == self.probe_id
-                            ):
-                                value = thermostat[self.entity_description.path2value]
-                    elif self.entity_description.path3 is None:
-                        value = product[self.entity_description.path1][
-                            self.entity_description.path2
-                        ]
-                    else:
-                        value = product[self.entity_description.path1][
-                            self.entity_description.path2
-                        ][self.entity_description.path3]
-                else:
-                    value = None
-            else:
-                value = None
-
-        if value is not None:
-            if self.entity_description.value:
-                value = self.entity_description.value(value)
-        return value
+        product = self.product
+        if product is None:
+            return None
+        thermostat_id = (
+            self.probe_id if self.entity_description.path2recursive else None
+        )
+        return _product_sensor_values(self.coordinator.index, product).get(
+            (self.entity_description.name, thermostat_id)
+        )
 
     @callback
     def _handle_coordinator_update(self):
@@ -313,6 +705,164 @@ class AldesSensorEntity(AldesEntity, SensorEntity):
         native_value = self._determine_native_value()
         # Sometimes (quite rarely) the device returns None as the sensor value so we
         # check that the value: before updating the state.
-        if native_value is not None:
-            self._attr_native_value = native_value
-            super()._handle_coordinator_update()
+        if native_value is None:
+            return
+        now = time.monotonic()
+        if self.available != self._written_available:
+            self._written_available = self.available
+            self._state_filter.reset(native_value, now)
+        elif not self._state_filter.accept(native_value, now):
+            device_class = self.entity_description.device_class or "other"
+            self.coordinator.suppressed_writes[device_class] += 1
+            self._schedule_deferred(now)
+            return
+        self._write_value(native_value)
+        super()._handle_coordinator_update()
+
+    def _schedule_deferred(self, now: float) -> None:
+        """Write a value held back by the minimum interval once it elapses.
+
+        Unchanged products are not dispatched again, so the value would
+        otherwise wait for the next change of its product.
+        """
+        if self._state_filter.deferred is None:
+            self._cancel_deferred()
+        elif self._cancel_deferred_write is None:
+            self._cancel_deferred_write = async_call_later(
+                self.hass, self._state_filter.remaining(now), self._write_deferred
+            )
+
+    @callback
+    def _write_deferred(self, _now) -> None:
+        """Write the deferred value, unless a later refresh dropped it."""
+        self._cancel_deferred_write = None
+        value = self._state_filter.deferred
+        if value is None:
+            return
+        now = time.monotonic()
+        if not self._state_filter.accept(value, now):
+            self._schedule_deferred(now)
+            return
+        self._write_value(value)
+        self.async_write_ha_state()
+
+    def _cancel_deferred(self) -> None:
+        """Cancel a scheduled deferred write."""
+        if self._cancel_deferred_write is not None:
+            self._cancel_deferred_write()
+            self._cancel_deferred_write = None
+
+    def _write_value(self, value) -> None:
+        """Record the value about to be written."""
+        self._cancel_deferred()
+        device_class = self.entity_description.device_class or "other"
+        self.coordinator.state_writes[device_class] += 1
+        self._attr_native_value = value
+
+
+class AldesHubSensorEntity(AldesHubEntity, SensorEntity):
+    """Define an Aldes integration diagnostic sensor."""
+
+    # Histograms and counters that change on every refresh.
+    _unrecorded_attributes = frozenset(
+        {
+            "commands",
+            "products",
+            "token",
+            "updateThermostats",
+            "queue_depth",
+            "wait",
+            "suppressed",
+            "written",
+        }
+    )
+
+    def __init__(self, coordinator, config_entry, description) -> None:
+        super().__init__(coordinator, config_entry)
+        self.entity_description = description
+        self._attr_unique_id = f"{DOMAIN}_{config_entry.entry_id}_{description.key}"
+
+    @property
+    def native_value(self):
+        """Return the current value of the diagnostic."""
+        return self.entity_description.value(self.coordinator)
+
+    @property
+    def extra_state_attributes(self):
+        """Return the details behind the diagnostic."""
+        if self.entity_description.attributes is None:
+            return None
+        return self.entity_description.attributes(self.coordinator)
+
+
+class AldesTrendSensorEntity(AldesEntity, SensorEntity):
+    """Define a sensor derived from the recent history of a probe.
+
+    The history is filled by the coordinator on every refresh, so these
+    sensors are notified of every update rather than only of product changes.
+    """
+
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(self, coordinator, config_entry, product, probe, description):
+        super().__init__(
+            coordinator,
+            config_entry,
+            product.serial_number,
+            product.reference,
+            product.modem,
+            None if probe in PROBE_TRENDS else (product.serial_number, probe),
+            context=None,
+        )
+        self.probe = probe
+        self.entity_description = description
+        if probe in PROBE_TRENDS:
+            label, device_class, unit = PROBE_TRENDS[probe]
+        else:
+            label, device_class, unit = (
+                None,
+                SensorDeviceClass.TEMPERATURE,
+                UnitOfTemperature.CELSIUS,
+            )
+        self._label = label
+        if description.native_unit_of_measurement is None:
+            self._attr_native_unit_of_measurement = f"{unit}{description.unit_suffix}"
+        if description.keep_device_class:
+            self._attr_device_class = device_class
+        self._attr_unique_id = (
+            f"{FRIENDLY_NAMES[self.reference]}_{self.product_serial_number}"
+            f"_{probe}_{description.key}"
+        )
+
+    @property
+    def name(self):
+        """Return a name to use for this entity."""
+        product = self.product
+        if product is None:
+            return None
+        label = self._label
+        if label is None:
+            thermostat = self._thermostat()
+            if thermostat is None:
+                return None
+            label = f"{thermostat.name} temperature"
+        return f"{product.name} {label} {self.entity_description.name}"
+
+    @property
+    def native_value(self):
+        """Return the value derived from the probe history."""
+        history = self.coordinator.history.get(self.product_serial_number, self.probe)
+        if history is None:
+            return None
+        target = None
+        if self.entity_description.key == "time_to_setpoint":
+            thermostat = self._thermostat()
+            target = None if thermostat is None else thermostat.data.temperature_set
+        value = self.entity_description.value(history, target)
+        return None if value is None else round(value, 2)
+
+    def _thermostat(self):
+        """Return the indexed thermostat this entity follows, if any."""
+        return self.coordinator.index.thermostats.get(
+            (self.product_serial_number, self.probe)
+        )
@@ -0,0 +1,58 @@
+"""HTTP session shared by the Aldes config entries."""
+from __future__ import annotations
+
+import aiohttp
+
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.util.ssl import client_context
+
+from .const import DOMAIN
+
+DATA_SESSION = f"{DOMAIN}_session"
+DATA_SESSION_UNSUB = f"{DOMAIN}_session_unsub"
+
+# Every account talks to the same Aldes host and bounds its own requests in
+# flight with its scheduler, so the connector only caps the total and the
+# connections per host grow with the number of accounts.
+CONNECTION_LIMIT = 20
+KEEPALIVE_TIMEOUT = 60
+DNS_CACHE_TTL = 300
+
+
+@callback
+def async_get_session(hass: HomeAssistant) -> aiohttp.ClientSession:
+    """Return the session shared by every Aldes account, creating it if needed."""
+    session: aiohttp.ClientSession | None = hass.data.get(DATA_SESSION)
+    if session is not None and not session.closed:
+        return session
+
+    session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(
+            ssl=client_context(),
+            limit=CONNECTION_LIMIT,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=DNS_CACHE_TTL,
+            enable_cleanup_closed=True,
+        ),
+    )
+    hass.data[DATA_SESSION] = session
+
+    async def _async_close_session(event: Event) -> None:
+        """Close the session when Home Assistant stops."""
+        hass.data.pop(DATA_SESSION_UNSUB, None)
+        await async_close_session(hass)
+
+    hass.data[DATA_SESSION_UNSUB] = hass.bus.async_listen_once(
+        EVENT_HOMEASSISTANT_CLOSE, _async_close_session
+    )
+    return session
+
+
+async def async_close_session(hass: HomeAssistant) -> None:
+    """Close the shared session once no Aldes account uses it anymore."""
+    if (unsub := hass.data.pop(DATA_SESSION_UNSUB, None)) is not None:
+        unsub()
+    session: aiohttp.ClientSession | None = hass.data.pop(DATA_SESSION, None)
+    if session is not None:
+        await session.close()
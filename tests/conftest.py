@@ -0,0 +1,315 @@
+"""Fixtures for the Aldes tests."""
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+import copy
+import json
+import time
+
+from aiohttp import ClientSession, web
+from aiohttp.test_utils import TestServer
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.aldes.api import AldesApi
+from custom_components.aldes.const import CONF_PASSWORD, CONF_USERNAME, DOMAIN
+
+ROOMS = ("Living room", "Bedroom", "Office", "Kitchen")
+
+
+def tone_air_product(number: int, thermostats: int = 2) -> dict:
+    """Return a T.One® AIR product with its room thermostats.
+
+    Thermostat ids are unique across products, as they are in the cloud.
+    """
+    first_id = (number - 1) * thermostats + 1
+    return {
+        "serial_number": f"SERIAL{number}",
+        "reference": "TONE_AIR",
+        "modem": f"MODEM{number}",
+        "isConnected": True,
+        "indicators": [{"type": "MODE", "value": "V"}],
+        "thermostats": None,
+        "indicator": {
+            "current_air_mode": "B",
+            "cmist": 16,
+            "cmast": 24,
+            "fmist": 18,
+            "fmast": 26,
+            "thermostats": [
+                {
+                    "ThermostatId": first_id + position,
+                    "Name": ROOMS[position % len(ROOMS)],
+                    "TemperatureSet": 20 - 2 * (position % 2),
+                    "CurrentTemperature": round(19.5 - 1.3 * (position % 2), 1),
+                }
+                for position in range(thermostats)
+            ],
+        },
+    }
+
+
+def easy_home_product(number: int) -> dict:
+    """Return an EASYHOME PureAir Compact CONNECT product."""
+    return {
+        "serial_number": f"SERIAL{number}",
+        "reference": "EASY_HOME_CONNECT",
+        "modem": f"MODEM{number}",
+        "isConnected": True,
+        "indicators": [{"type": "MODE", "value": "V"}],
+        "thermostats": "null",
+        "indicator": {
+            "HrCuCo": 55,
+            "TmpCu": 215,
+            "HrBa1Co": 61,
+            "TmpBa1": 223,
+            "HrBa2Co": 58,
+            "TmpBa2": 219,
+            "CO2": 640,
+            "Qai": {"actualValue": 0.4, "polluantDominant": "hr"},
+            "VarHR": 2,
+        },
+    }
+
+
+def make_products(
+    tone_air: int = 1, easy_home: int = 0, thermostats: int = 2, first: int = 1
+) -> list[dict]:
+    """Return a products payload with the given number of each model.
+
+    Products are numbered from first, so that payloads of several accounts
+    do not share serial numbers or thermostat ids.
+    """
+    return [
+        tone_air_product(number, thermostats)
+        for number in range(first, first + tone_air)
+    ] + [
+        easy_home_product(number)
+        for number in range(first + tone_air, first + tone_air + easy_home)
+    ]
+
+
+PRODUCTS = make_products()
+
+
+class FakeAldesCloud:
+    """Minimal stand-in for the Aldes cloud API.
+
+    Tests tune the responses through the public attributes: status codes
+    to return next, per endpoint delays, the products payload and its ETag.
+    Accounts listed in accounts get their own products, the others share
+    products. Tokens expire after expires_in seconds and every request is
+    counted per endpoint. Accepted commands change the products payload unless
+    apply_commands is cleared, as for a product stuck in a forced mode.
+    """
+
+    def __init__(self, products: list[dict] | None = None) -> None:
+        """Initialize."""
+        self.products = copy.deepcopy(PRODUCTS if products is None else products)
+        self.accounts: dict[str, list[dict]] = {}
+        self.apply_commands = True
+        self.etag: str | None = None
+        self.expires_in = 3600
+        self.retry_after: str | None = None
+        self.tokens_issued = 0
+        self.tokens: dict[str, tuple[str, float]] = {}
+        self.calls: Counter[str] = Counter()
+        self.delays: dict[str, list[float]] = {}
+        self.statuses: dict[str, list[int]] = {}
+        self.thermostat_updates: list[list[dict]] = []
+        self.commands: list[dict] = []
+        self.body: bytes | None = None
+        self.server: TestServer | None = None
+
+    def app(self) -> web.Application:
+        """Return the application serving the fake API."""
+        app = web.Application()
+        app.router.add_post("/oauth2/token", self._token)
+        app.router.add_get("/aldesoc/v5/users/me/products", self._products)
+        app.router.add_patch(
+            "/aldesoc/v5/users/me/products/{modem}/updateThermostats",
+            self._update_thermostats,
+        )
+        app.router.add_post(
+            "/aldesoc/v5/users/me/products/{modem}/commands", self._command
+        )
+        return app
+
+    def url(self, path: str) -> str:
+        """Return the URL of a path on the fake cloud."""
+        return str(self.server.make_url(path))
+
+    async def _delay_and_status(self, endpoint: str) -> int:
+        """Count a call, apply its queued delay and return its queued status."""
+        self.calls[endpoint] += 1
+        if delays := self.delays.get(endpoint):
+            await asyncio.sleep(delays.pop(0))
+        if statuses := self.statuses.get(endpoint):
+            return statuses.pop(0)
+        return 200
+
+    def revoke_tokens(self) -> None:
+        """Make every issued token invalid."""
+        self.tokens.clear()
+
+    def _account(self, request: web.Request) -> str | None:
+        """Return the account of a request with an unexpired token, if any."""
+        authorization = request.headers.get("Authorization", "")
+        username, expires_at = self.tokens.get(
+            authorization.removeprefix("Bearer "), (None, 0)
+        )
+        return username if time.monotonic() < expires_at else None
+
+    def _authorized(self, request: web.Request) -> bool:
+        """Return whether a request carries an issued, unexpired token."""
+        return self._account(request) is not None
+
+    def _error(self, status: int) -> web.Response:
+        """Return an error answer, asking to retry later on 429."""
+        headers = {}
+        if status == 429 and self.retry_after is not None:
+            headers["Retry-After"] = self.retry_after
+        return web.Response(status=status, headers=headers)
+
+    async def _token(self, request: web.Request) -> web.Response:
+        status = await self._delay_and_status("token")
+        if status != 200:
+            return web.json_response({"error": "invalid_grant"}, status=status)
+        self.tokens_issued += 1
+        token = f"token-{self.tokens_issued}"
+        username = (await request.post()).get("username")
+        self.tokens[token] = (username, time.monotonic() + self.expires_in)
+        return web.json_response(
+            {
+                "access_token": token,
+                "expires_in": self.expires_in,
+            }
+        )
+
+    async def _products(self, request: web.Request) -> web.Response:
+        status = await self._delay_and_status("products")
+        if (username := self._account(request)) is None:
+            return web.Response(status=401)
+        if status != 200:
+            return self._error(status)
+        if self.etag is not None:
+            if request.headers.get("If-None-Match") == self.etag:
+                return web.Response(status=304)
+            headers = {"ETag": self.etag}
+        else:
+            headers = {}
+        body = self.body
+        if body is None:
+            body = json.dumps(self.accounts.get(username, self.products))
+        return web.Response(body=body, content_type="application/json", headers=headers)
+
+    async def _update_thermostats(self, request: web.Request) -> web.Response:
+        status = await self._delay_and_status("updateThermostats")
+        if not self._authorized(request):
+            return web.Response(status=401)
+        if status != 200:
+            return self._error(status)
+        setpoints = await request.json()
+        self.thermostat_updates.append(setpoints)
+        if self.apply_commands:
+            product = self._product(request.match_info["modem"])
+            for thermostat in product["indicator"]["thermostats"]:
+                for setpoint in setpoints:
+                    if setpoint["ThermostatId"] == thermostat["ThermostatId"]:
+                        thermostat["TemperatureSet"] = setpoint["TemperatureSet"]
+        return web.json_response(setpoints)
+
+    async def _command(self, request: web.Request) -> web.Response:
+        status = await self._delay_and_status("commands")
+        if not self._authorized(request):
+            return web.Response(status=401)
+        if status != 200:
+            return self._error(status)
+        command = await request.json()
+        self.commands.append(command)
+        if self.apply_commands and command["method"] == "changeMode":
+            product = self._product(request.match_info["modem"])
+            product["indicators"] = [{"type": "MODE", "value": command["params"][0]}]
+        return web.json_response({"id": 1, "jsonrpc": "2.0", "result": True})
+
+    def _product(self, modem: str) -> dict:
+        """Return the product behind a modem."""
+        return next(product for product in self.products if product["modem"] == modem)
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Let Home Assistant load the integration from custom_components."""
+    yield
+
+
+@pytest.fixture
+async def cloud(request, socket_enabled):
+    """Start a fake Aldes cloud.
+
+    Parametrize it indirectly with the keyword arguments of make_products to
+    serve another account, for example {"tone_air": 3, "easy_home": 2}.
+    """
+    param = getattr(request, "param", None)
+    fake = FakeAldesCloud(None if param is None else make_products(**param))
+    fake.server = TestServer(fake.app())
+    await fake.server.start_server()
+    yield fake
+    await fake.server.close()
+
+
+@pytest.fixture
+async def api(cloud):
+    """Return an AldesApi talking to the fake cloud without long waits."""
+    async with ClientSession() as session:
+        client = AldesApi("user@example.com", "secret", session)
+        client._API_URL_TOKEN = cloud.url("/oauth2/token")
+        client._API_URL_PRODUCTS = cloud.url("/aldesoc/v5/users/me/products")
+        client._SETPOINT_DEBOUNCE = 0.05
+        client.retry_policy.base_delay = 0.01
+        client.scheduler.rate = 1000
+        yield client
+        client.close()
+
+
+@pytest.fixture
+def aldes_cloud(cloud, monkeypatch):
+    """Point the integration at the fake cloud."""
+    monkeypatch.setattr(AldesApi, "_API_URL_TOKEN", cloud.url("/oauth2/token"))
+    monkeypatch.setattr(
+        AldesApi, "_API_URL_PRODUCTS", cloud.url("/aldesoc/v5/users/me/products")
+    )
+    monkeypatch.setattr(AldesApi, "_SETPOINT_DEBOUNCE", 0.05)
+    return cloud
+
+
+def mock_config_entry(
+    number: int = 1, data: dict | None = None, **kwargs
+) -> MockConfigEntry:
+    """Return the config entry of an Aldes account, with extra data if given."""
+    return MockConfigEntry(
+        domain=DOMAIN,
+        title=f"user{number}@example.com",
+        unique_id=f"user{number}@example.com",
+        data={
+            CONF_USERNAME: f"user{number}@example.com",
+            CONF_PASSWORD: "secret",
+            **(data or {}),
+        },
+        **kwargs,
+    )
+
+
+@pytest.fixture
+async def config_entry(hass: HomeAssistant, aldes_cloud):
+    """Set up an Aldes account against the fake cloud and unload it afterwards."""
+    entry = mock_config_entry()
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    yield entry
+    await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
@@ -0,0 +1,44 @@
+"""Tests for the hourly aggregates of Aldes measurements."""
+from __future__ import annotations
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.aldes.aggregates import AldesHourlyStatistics
+from custom_components.aldes.coordinator import AldesIndex
+from custom_components.aldes.models import decode_products
+
+from .conftest import easy_home_product
+
+KITCHEN = "aldes:serial1_kitchen_humidity"
+
+
+def _products(kitchen_humidity: int):
+    """Return the indexed products of an account with one EASYHOME."""
+    product = easy_home_product(1)
+    product["indicator"]["HrCuCo"] = kitchen_humidity
+    return AldesIndex(decode_products([product])).products.values()
+
+
+async def test_hour_in_progress_survives_a_restart(hass: HomeAssistant) -> None:
+    """Stored aggregates carry on with the samples taken after a restart."""
+    statistics = AldesHourlyStatistics(hass)
+    statistics.record(_products(50), 3600 * 10)
+
+    restarted = AldesHourlyStatistics(hass)
+    restarted.load(statistics.as_dict())
+    restarted.record(_products(60), 3600 * 10 + 1800)
+
+    aggregate = restarted._aggregates[KITCHEN]
+    assert aggregate.count == 2
+    assert aggregate.mean == 55
+    assert (aggregate.min, aggregate.max) == (50, 60)
+    assert restarted._metadata[KITCHEN] == statistics._metadata[KITCHEN]
+
+
+async def test_statistic_ids_are_slugs(hass: HomeAssistant) -> None:
+    """Measurement and thermostat statistics get slugified ids."""
+    statistics = AldesHourlyStatistics(hass)
+    statistics.record(_products(50), 0)
+
+    assert KITCHEN in statistics.as_dict()
+    assert "aldes:serial1_carbon_dioxyde" in statistics.as_dict()
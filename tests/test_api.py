@@ -0,0 +1,292 @@
+"""Tests for the Aldes API client against a fake cloud."""
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+
+from aiohttp import ClientResponseError
+import pytest
+
+from custom_components.aldes.api import (
+    AuthenticationException,
+    ResponseTooLargeException,
+)
+from custom_components.aldes.models import AldesDecodeError
+
+
+@pytest.mark.parametrize(
+    "cloud", [{"tone_air": 2, "easy_home": 3, "thermostats": 3}], indirect=True
+)
+async def test_fetch_decodes_every_model(api, cloud) -> None:
+    """Products of both models are fetched and decoded."""
+    products = await api.fetch_data()
+
+    assert [product.reference for product in products] == [
+        "TONE_AIR",
+        "TONE_AIR",
+        "EASY_HOME_CONNECT",
+        "EASY_HOME_CONNECT",
+        "EASY_HOME_CONNECT",
+    ]
+    assert [
+        thermostat.thermostat_id
+        for product in products
+        for thermostat in product.indicator.thermostats
+    ] == [1, 2, 3, 4, 5, 6]
+    assert products[2].indicator.co2 == 640
+    assert not products[2].has_thermostats
+
+
+async def test_fetch_logs_in_once_and_decodes_products(api, cloud) -> None:
+    """The first fetch logs in, later ones reuse the token."""
+    products = await api.fetch_data()
+    await api.fetch_data()
+
+    assert cloud.calls["token"] == 1
+    assert cloud.calls["products"] == 2
+    [product] = products
+    assert product.serial_number == "SERIAL1"
+    assert product.mode == "V"
+    assert [t.thermostat_id for t in product.indicator.thermostats] == [1, 2]
+
+
+async def test_rejected_token_is_refreshed_once(api, cloud) -> None:
+    """A 401 triggers one login and the request is sent again."""
+    await api.fetch_data()
+    cloud.revoke_tokens()
+
+    await api.fetch_data()
+
+    assert cloud.calls["token"] == 2
+    assert cloud.calls["products"] == 3
+
+
+async def test_failed_login_raises(api, cloud) -> None:
+    """Wrong credentials surface as AuthenticationException."""
+    cloud.statuses["token"] = [400]
+
+    with pytest.raises(AuthenticationException):
+        await api.fetch_data()
+    assert api.metrics.auth_failures["http_400"] == 1
+
+
+async def test_oversized_bodies_are_refused(api, cloud) -> None:
+    """Bodies above the size limit raise instead of being buffered."""
+    api._MAX_RESPONSE_SIZE = 1024
+    cloud.body = json.dumps(["x" * 2048])
+
+    with pytest.raises(ResponseTooLargeException):
+        await api.fetch_data()
+
+
+async def test_oversized_token_responses_are_refused(api, cloud) -> None:
+    """The login answer goes through the size limit too."""
+    api._MAX_RESPONSE_SIZE = 16
+
+    with pytest.raises(ResponseTooLargeException):
+        await api.fetch_data()
+    assert cloud.calls["products"] == 0
+
+
+async def test_oversized_setpoint_responses_are_refused(api, cloud) -> None:
+    """Callers of a batch whose answer is too large get the error."""
+    await api.fetch_data()
+    api._MAX_RESPONSE_SIZE = 32
+
+    with pytest.raises(ResponseTooLargeException):
+        await api.set_target_temperature("MODEM1", 1, "Living room", 21)
+    assert cloud.calls["updateThermostats"] == 1
+
+
+async def test_setpoints_for_a_modem_are_sent_together(api, cloud) -> None:
+    """Setpoints within the debounce window share one request."""
+    results = await asyncio.gather(
+        api.set_target_temperature("MODEM1", 1, "Living room", 21),
+        api.set_target_temperature("MODEM1", 2, "Bedroom", 17),
+        api.set_target_temperature("MODEM1", 1, "Living room", 22),
+    )
+
+    assert cloud.calls["updateThermostats"] == 1
+    [sent] = cloud.thermostat_updates
+    assert sent == [
+        {"ThermostatId": 1, "Name": "Living room", "TemperatureSet": 22},
+        {"ThermostatId": 2, "Name": "Bedroom", "TemperatureSet": 17},
+    ]
+    assert results[0] == results[1] == results[2] == sent
+
+
+async def test_setpoint_during_a_flush_starts_a_new_batch(api, cloud) -> None:
+    """A setpoint arriving while a batch is in flight goes in the next one."""
+    cloud.delays["updateThermostats"] = [0.2]
+    first = asyncio.create_task(
+        api.set_target_temperature("MODEM1", 1, "Living room", 21)
+    )
+    await asyncio.sleep(0.1)
+
+    second = await api.set_target_temperature("MODEM1", 2, "Bedroom", 17)
+
+    assert (await first)[0]["TemperatureSet"] == 21
+    assert second[0]["TemperatureSet"] == 17
+    assert cloud.calls["updateThermostats"] == 2
+
+
+async def test_close_during_a_flush_cancels_the_next_batch(api, cloud) -> None:
+    """Closing cancels both the batch in flight and the one being gathered."""
+    cloud.delays["updateThermostats"] = [0.3]
+    await api.fetch_data()
+    first = asyncio.create_task(
+        api.set_target_temperature("MODEM1", 1, "Living room", 21)
+    )
+    await asyncio.sleep(0.1)
+    second = asyncio.create_task(api.set_target_temperature("MODEM1", 2, "Bedroom", 17))
+    await asyncio.sleep(0)
+
+    api.close()
+    results = await asyncio.gather(first, second, return_exceptions=True)
+    await asyncio.sleep(0.2)
+
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)
+    assert cloud.calls["updateThermostats"] == 1
+    assert not api._setpoint_timers
+
+
+async def test_malformed_products_raise_decode_error(api, cloud) -> None:
+    """A payload that does not match the expected shape is refused."""
+    cloud.body = json.dumps({"error": "maintenance"})
+
+    with pytest.raises(AldesDecodeError):
+        await api.fetch_data()
+
+
+async def test_server_errors_are_retried(api, cloud) -> None:
+    """A 503 is retried and the next answer is used."""
+    cloud.statuses["products"] = [503]
+
+    assert await api.fetch_data()
+    assert cloud.calls["products"] == 2
+    assert api.circuit_breaker.failures == 0
+
+
+async def test_retries_give_up_after_the_last_attempt(api, cloud) -> None:
+    """Persistent server errors raise once the attempts are used."""
+    cloud.statuses["products"] = [503] * api.retry_policy.attempts
+
+    with pytest.raises(ClientResponseError):
+        await api.fetch_data()
+    assert cloud.calls["products"] == api.retry_policy.attempts
+
+
+async def test_commands_are_not_replayed_after_a_server_error(api, cloud) -> None:
+    """A mode change the cloud may have processed is not sent twice."""
+    cloud.statuses["commands"] = [502]
+
+    with pytest.raises(ClientResponseError):
+        await api.set_mode("MODEM1", "Boost")
+    assert cloud.calls["commands"] == 1
+
+
+async def test_commands_are_replayed_after_a_rate_limit(api, cloud) -> None:
+    """A 429 means the command was not processed, so it is sent again."""
+    cloud.statuses["commands"] = [429]
+    cloud.retry_after = "0"
+
+    await api.set_mode("MODEM1", "Boost")
+
+    assert cloud.calls["commands"] == 2
+    assert cloud.commands[0]["params"] == ["Y"]
+
+
+async def test_not_modified_products_are_reused(api, cloud) -> None:
+    """A 304 answer to the ETag returns the previous records as is."""
+    cloud.etag = '"v1"'
+    first = await api.fetch_data()
+
+    second = await api.fetch_data()
+
+    assert second is first
+    assert api.metrics.unchanged_payloads == 1
+    assert api.metrics.changed_payloads == 1
+
+
+async def test_identical_bodies_skip_decoding(api, cloud) -> None:
+    """The same bytes without an ETag still return the previous records."""
+    first = await api.fetch_data()
+    decode_time = api.metrics.decode_time
+
+    assert await api.fetch_data() is first
+    assert api.metrics.decode_time == decode_time
+
+    cloud.products = [{**cloud.products[0], "isConnected": False}]
+    changed = await api.fetch_data()
+    assert changed is not first
+    assert not changed[0].is_connected
+
+
+def _seed_latency(api, seconds: float = 0.01, samples: int = 20) -> None:
+    """Record enough products latencies for a p95 hedge delay."""
+    for _ in range(samples):
+        api.metrics.record_latency("products", seconds)
+
+
+async def test_slow_fetch_is_hedged_and_the_hedge_wins(api, cloud) -> None:
+    """A fetch slower than the p95 races a second request."""
+    await api.fetch_data()
+    api.hedge = True
+    _seed_latency(api)
+    cloud.delays["products"] = [1]
+    started = time.monotonic()
+
+    products = await api.fetch_data()
+
+    assert products
+    assert time.monotonic() - started < 0.5
+    assert api.metrics.hedged_fetches == 1
+    assert api.metrics.hedge_wins == 1
+    # The cancelled primary gives its slot back once it unwinds.
+    await asyncio.sleep(0.01)
+    assert api.scheduler.in_flight == 0
+
+
+async def test_fast_fetch_is_not_hedged(api, cloud) -> None:
+    """A fetch answering within the p95 sends a single request."""
+    await api.fetch_data()
+    api.hedge = True
+    _seed_latency(api, seconds=1)
+
+    await api.fetch_data()
+
+    assert api.metrics.hedged_fetches == 0
+    assert cloud.calls["products"] == 2
+
+
+async def test_no_hedge_without_a_free_slot(api, cloud) -> None:
+    """A hedge is not queued behind the requests already in flight."""
+    await api.fetch_data()
+    api.hedge = True
+    api.scheduler.concurrency = 2
+    _seed_latency(api)
+    cloud.delays["products"] = [0.2]
+
+    await api.fetch_data()
+
+    assert api.metrics.hedged_fetches == 0
+    assert cloud.calls["products"] == 2
+
+
+async def test_commands_are_not_blocked_by_a_hedged_poll(api, cloud) -> None:
+    """A poll and its hedge leave a slot for interactive commands."""
+    await api.fetch_data()
+    api.hedge = True
+    _seed_latency(api)
+    cloud.delays["products"] = [1, 1]
+    poll = asyncio.create_task(api.fetch_data())
+    await asyncio.sleep(0.2)
+    assert api.metrics.hedged_fetches == 1
+
+    started = time.monotonic()
+    await api.set_mode("MODEM1", "Boost")
+
+    assert time.monotonic() - started < 0.5
+    assert cloud.commands[0]["params"] == ["Y"]
+    await poll
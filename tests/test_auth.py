@@ -0,0 +1,123 @@
+"""Tests for the Aldes access token manager."""
+from __future__ import annotations
+
+import asyncio
+import time
+
+from custom_components.aldes.auth import AldesTokenManager
+
+
+class FakeLogin:
+    """Login coroutine counting its calls and issuing numbered tokens."""
+
+    def __init__(self, expires_in: int | None = 3600, delay: float = 0) -> None:
+        self.expires_in = expires_in
+        self.delay = delay
+        self.calls = 0
+        self.fail = False
+
+    async def __call__(self) -> tuple[str, int | None]:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("login failed")
+        return f"token-{self.calls}", self.expires_in
+
+
+async def test_concurrent_callers_share_one_login() -> None:
+    """Callers needing a token at the same time wait for a single login."""
+    login = FakeLogin(delay=0.05)
+    manager = AldesTokenManager(login)
+
+    tokens = await asyncio.gather(*(manager.async_get_token() for _ in range(10)))
+
+    assert tokens == ["token-1"] * 10
+    assert login.calls == 1
+    assert manager.auth_calls == 1
+    manager.close()
+
+
+async def test_refresh_of_stale_token_is_shared() -> None:
+    """Callers rejecting the same token trigger one refresh between them."""
+    login = FakeLogin(delay=0.05)
+    manager = AldesTokenManager(login)
+    stale = await manager.async_get_token()
+
+    tokens = await asyncio.gather(*(manager.async_refresh(stale) for _ in range(5)))
+
+    assert tokens == ["token-2"] * 5
+    assert login.calls == 2
+    assert manager.saved_auth_calls == 4
+    manager.close()
+
+
+async def test_on_refresh_receives_each_new_token() -> None:
+    """The refresh hook gets the token with its absolute expiry."""
+    refreshed: list[tuple[str, float | None]] = []
+    manager = AldesTokenManager(
+        FakeLogin(expires_in=600), lambda *token: refreshed.append(token)
+    )
+
+    await manager.async_get_token()
+
+    [(token, expires_at)] = refreshed
+    assert token == "token-1"
+    assert expires_at is not None
+    assert abs(expires_at - (time.time() + 600)) < 5
+    manager.close()
+
+
+async def test_restore_skips_login_until_expiry() -> None:
+    """A restored token is used as is, an expired one is refused."""
+    login = FakeLogin()
+    manager = AldesTokenManager(login)
+
+    assert not manager.restore("old", time.time() - 1)
+    assert manager.restore("saved", time.time() + 3600)
+    assert await manager.async_get_token() == "saved"
+    assert login.calls == 0
+    assert manager.saved_auth_calls == 1
+    manager.close()
+
+
+async def test_token_is_refreshed_before_it_expires(monkeypatch) -> None:
+    """A background refresh replaces the token ahead of its expiry."""
+    monkeypatch.setattr(AldesTokenManager, "_REFRESH_MARGIN", 0)
+    login = FakeLogin(expires_in=0.1)
+    manager = AldesTokenManager(login)
+    await manager.async_get_token()
+
+    await asyncio.sleep(0.25)
+
+    assert login.calls >= 2
+    assert manager.token == f"token-{login.calls}"
+    manager.close()
+
+
+async def test_failed_background_refresh_is_left_to_the_next_request(
+    monkeypatch,
+) -> None:
+    """A failed proactive refresh keeps the old token and does not raise."""
+    monkeypatch.setattr(AldesTokenManager, "_REFRESH_MARGIN", 0)
+    login = FakeLogin(expires_in=0.1)
+    manager = AldesTokenManager(login)
+    await manager.async_get_token()
+    login.fail = True
+
+    await asyncio.sleep(0.15)
+
+    assert manager.token == "token-1"
+    assert manager._refresh_task is None
+    manager.close()
+
+
+async def test_close_cancels_the_scheduled_refresh() -> None:
+    """No login happens after the manager is closed."""
+    login = FakeLogin(expires_in=0.1)
+    manager = AldesTokenManager(login)
+    await manager.async_get_token()
+
+    manager.close()
+    await asyncio.sleep(0.15)
+
+    assert login.calls == 1
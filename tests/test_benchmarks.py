@@ -0,0 +1,155 @@
+"""Benchmarks of the integration against the fake Aldes cloud.
+
+The budgets leave a wide margin for slow CI runners: they catch a change
+in complexity, such as a scan creeping back into a hot path, rather than
+small slowdowns.
+"""
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+
+from custom_components.aldes import confirm
+from custom_components.aldes.const import DOMAIN
+
+from .conftest import make_products, mock_config_entry
+
+LARGE_ACCOUNT = {"tone_air": 25, "easy_home": 25, "thermostats": 4}
+REFRESHES = 5
+REFRESH_BUDGET = 0.25
+ENTITY_UPDATE_BUDGET = 0.001
+COMMAND_BUDGET = 0.25
+SETUP_GROWTH = 2
+
+
+def _drift(cloud, step: int) -> None:
+    """Change a measurement of every product and thermostat."""
+    for product in cloud.products:
+        indicator = product["indicator"]
+        if "CO2" in indicator:
+            indicator["CO2"] = 640 + 50 * step
+        for thermostat in indicator.get("thermostats", ()):
+            thermostat["CurrentTemperature"] = 18 + step
+
+
+@pytest.mark.parametrize("cloud", [LARGE_ACCOUNT], indirect=True)
+async def test_refresh_of_a_large_account_stays_within_budget(
+    hass: HomeAssistant, config_entry, cloud
+) -> None:
+    """A refresh where every product changed is fetched, decoded and dispatched."""
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    elapsed = []
+    for step in range(1, REFRESHES + 1):
+        _drift(cloud, step)
+        started = time.perf_counter()
+        await coordinator.async_refresh()
+        elapsed.append(time.perf_counter() - started)
+
+    assert len(coordinator.index.products) == 50
+    assert max(elapsed) < REFRESH_BUDGET
+
+
+@pytest.mark.parametrize("cloud", [LARGE_ACCOUNT], indirect=True)
+async def test_event_loop_time_per_entity_stays_within_budget(
+    hass: HomeAssistant, config_entry, cloud
+) -> None:
+    """Notifying the entities of changed products costs little per entity."""
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    _drift(cloud, 1)
+    dispatched = coordinator.dispatched_updates
+
+    await coordinator.async_refresh()
+
+    updated = coordinator.dispatched_updates - dispatched
+    assert updated >= 50
+    assert coordinator.api.metrics.fanout_time / updated < ENTITY_UPDATE_BUDGET
+
+
+async def test_mode_command_path(
+    hass: HomeAssistant, config_entry, cloud, monkeypatch
+) -> None:
+    """A mode change costs one command and one confirmation fetch."""
+    monkeypatch.setattr(confirm, "VERIFICATION_DELAYS", (0, 0, 0))
+    entity_id = er.async_get(hass).async_get_entity_id(
+        "select", DOMAIN, "T.One® AIR_SERIAL1_mode"
+    )
+    calls = cloud.calls.copy()
+    started = time.perf_counter()
+
+    await hass.services.async_call(
+        "select",
+        "select_option",
+        {"entity_id": entity_id, "option": "Boost"},
+        blocking=True,
+    )
+    await hass.async_block_till_done()
+
+    assert time.perf_counter() - started < COMMAND_BUDGET
+    assert cloud.calls - calls == {"commands": 1, "products": 1}
+    assert hass.states.get(entity_id).state == "Boost"
+
+
+async def test_setpoint_command_path(
+    hass: HomeAssistant, config_entry, cloud, monkeypatch
+) -> None:
+    """A setpoint costs one debounced update and one confirmation fetch."""
+    monkeypatch.setattr(confirm, "VERIFICATION_DELAYS", (0, 0, 0))
+    entity_id = er.async_get(hass).async_get_entity_id(
+        "climate", DOMAIN, f"{DOMAIN}_1_climate"
+    )
+    calls = cloud.calls.copy()
+    started = time.perf_counter()
+
+    await hass.services.async_call(
+        "climate",
+        "set_temperature",
+        {"entity_id": entity_id, "temperature": 22},
+        blocking=True,
+    )
+    await hass.async_block_till_done()
+
+    # The update waits for the setpoint debounce window.
+    assert time.perf_counter() - started < COMMAND_BUDGET + 0.05
+    assert cloud.calls - calls == {"updateThermostats": 1, "products": 1}
+    assert hass.states.get(entity_id).attributes["temperature"] == 22
+
+
+async def _async_setup_time(hass: HomeAssistant, cloud, **account) -> tuple:
+    """Return the setup time of an account and its number of entities."""
+    cloud.products = make_products(**account)
+    entry = mock_config_entry()
+    entry.add_to_hass(hass)
+    started = time.perf_counter()
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    elapsed = time.perf_counter() - started
+    entities = len(
+        er.async_entries_for_config_entry(er.async_get(hass), entry.entry_id)
+    )
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.config_entries.async_remove(entry.entry_id)
+    await hass.async_block_till_done()
+    return elapsed, entities
+
+
+async def test_setup_time_grows_linearly_with_the_account(
+    hass: HomeAssistant, aldes_cloud
+) -> None:
+    """Setting up ten times more products costs the same per entity.
+
+    A first setup loads the platforms, so that it is not counted.
+    """
+    await _async_setup_time(hass, aldes_cloud)
+    small, small_entities = await _async_setup_time(
+        hass, aldes_cloud, tone_air=2, easy_home=2, thermostats=4
+    )
+    large, large_entities = await _async_setup_time(
+        hass, aldes_cloud, tone_air=20, easy_home=20, thermostats=4
+    )
+
+    assert large_entities > 8 * small_entities
+    assert large / large_entities < SETUP_GROWTH * small / small_entities
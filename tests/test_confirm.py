@@ -0,0 +1,93 @@
+"""Tests for the confirmation of Aldes commands."""
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.aldes import confirm
+from custom_components.aldes.const import DOMAIN
+
+DELAYS = (0.01, 0.02, 0.04)
+
+
+@pytest.fixture
+def coordinator(hass: HomeAssistant, config_entry, monkeypatch):
+    """Return the coordinator of an account verifying commands quickly."""
+    monkeypatch.setattr(confirm, "VERIFICATION_DELAYS", DELAYS)
+    return hass.data[DOMAIN][config_entry.entry_id]
+
+
+def _boost(index) -> bool:
+    """Return whether the first product reports the Boost mode."""
+    return index.products["SERIAL1"].data.mode == "Y"
+
+
+def _setpoint_22(index) -> bool:
+    """Return whether the first thermostat reports a setpoint of 22."""
+    return index.thermostats[("SERIAL1", 1)].data.temperature_set == 22
+
+
+async def test_waiting_commands_share_each_fetch(coordinator, cloud) -> None:
+    """Commands waiting at the same time are verified by one fetch."""
+    product = cloud.products[0]
+    product["indicators"] = [{"type": "MODE", "value": "Y"}]
+    product["indicator"]["thermostats"][0]["TemperatureSet"] = 22
+    fetches = cloud.calls["products"]
+
+    results = await asyncio.gather(
+        coordinator.confirmer.async_confirm(_boost),
+        coordinator.confirmer.async_confirm(_setpoint_22),
+    )
+
+    assert results == [True, True]
+    assert cloud.calls["products"] - fetches == 1
+    assert coordinator.confirmer.confirmed == 2
+
+
+async def test_command_is_confirmed_by_a_later_verification(coordinator, cloud) -> None:
+    """A state the cloud shows late is confirmed by the next verification."""
+    fetches = cloud.calls["products"]
+    checks = 0
+
+    def _applied_after_the_first_check(index) -> bool:
+        nonlocal checks
+        checks += 1
+        cloud.products[0]["indicators"] = [{"type": "MODE", "value": "Y"}]
+        return _boost(index)
+
+    assert await coordinator.confirmer.async_confirm(_applied_after_the_first_check)
+
+    assert checks == 2
+    assert cloud.calls["products"] - fetches == 2
+
+
+async def test_command_is_rejected_after_the_last_verification(
+    coordinator, cloud
+) -> None:
+    """A state never shown is rejected once every delay has passed."""
+    fetches = cloud.calls["products"]
+    started = time.monotonic()
+
+    assert not await coordinator.confirmer.async_confirm(_boost)
+
+    assert time.monotonic() - started >= sum(DELAYS)
+    assert cloud.calls["products"] - fetches == len(DELAYS)
+    assert coordinator.confirmer.rejected == 1
+
+
+async def test_close_cancels_waiting_commands(coordinator, cloud) -> None:
+    """Closing the confirmer cancels the commands and stops verifying."""
+    fetches = cloud.calls["products"]
+    waiting = asyncio.ensure_future(coordinator.confirmer.async_confirm(_boost))
+    await asyncio.sleep(0)
+
+    coordinator.confirmer.close()
+
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    await asyncio.sleep(sum(DELAYS))
+    assert cloud.calls["products"] == fetches
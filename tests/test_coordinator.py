@@ -0,0 +1,161 @@
+"""Tests for the Aldes coordinator."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Mapping
+import copy
+from datetime import timedelta
+import time
+
+import pytest
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from custom_components.aldes import coordinator as coordinator_module
+from custom_components.aldes.const import (
+    DEFAULT_SNAPSHOT_MAX_AGE,
+    DOMAIN,
+    SNAPSHOT_SAVE_DELAY,
+    SNAPSHOT_STORAGE_VERSION,
+)
+
+from .conftest import PRODUCTS, mock_config_entry
+
+SENSOR = "sensor.t_one_r_air_serial1_living_room_temperature"
+
+
+class CountingMapping(Mapping):
+    """Read-only mapping counting key lookups and full scans."""
+
+    def __init__(self, mapping: Mapping, counts: dict[str, int]) -> None:
+        self._mapping = mapping
+        self._counts = counts
+
+    def __getitem__(self, key):
+        self._counts["lookups"] += 1
+        return self._mapping[key]
+
+    def __iter__(self):
+        self._counts["scans"] += 1
+        return iter(self._mapping)
+
+    def __len__(self) -> int:
+        return len(self._mapping)
+
+
+@pytest.mark.parametrize(
+    "cloud", [{"tone_air": 25, "easy_home": 25, "thermostats": 4}], indirect=True
+)
+async def test_refresh_builds_one_index_read_with_lookups(
+    hass: HomeAssistant, config_entry, cloud, monkeypatch
+) -> None:
+    """Entities find their product or thermostat without scanning the index."""
+    counts = {"indexes": 0, "lookups": 0, "scans": 0}
+
+    class CountingIndex(coordinator_module.AldesIndex):
+        __slots__ = ()
+
+        def __init__(self, payload) -> None:
+            super().__init__(payload)
+            counts["indexes"] += 1
+            self.products = CountingMapping(self.products, counts)
+            self.thermostats = CountingMapping(self.thermostats, counts)
+
+    monkeypatch.setattr(coordinator_module, "AldesIndex", CountingIndex)
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    for product in cloud.products:
+        for thermostat in product["indicator"].get("thermostats", ()):
+            thermostat["CurrentTemperature"] += 1
+        if "CO2" in product["indicator"]:
+            product["indicator"]["CO2"] += 100
+    dispatched = coordinator.dispatched_updates
+
+    await coordinator.async_refresh()
+
+    notified = coordinator.dispatched_updates - dispatched
+    assert notified >= 25 * 4 + 25
+    assert counts["indexes"] == 1
+    # Change detection, discovery and the platform check walk each table
+    # once, whatever the size of the account. Entities never do.
+    assert counts["scans"] <= 6
+    assert counts["lookups"] <= 4 * notified
+
+
+def _store_snapshot(hass_storage, entry, age: float) -> None:
+    """Persist a snapshot of the given age where the first room is at 17 °C."""
+    products = copy.deepcopy(PRODUCTS)
+    products[0]["indicator"]["thermostats"][0]["CurrentTemperature"] = 17.0
+    key = f"{DOMAIN}.{entry.entry_id}.snapshot"
+    hass_storage[key] = {
+        "version": SNAPSHOT_STORAGE_VERSION,
+        "minor_version": 1,
+        "key": key,
+        "data": {
+            "saved_at": time.time() - age,
+            "products": products,
+            "history": {},
+        },
+    }
+
+
+async def test_fresh_snapshot_is_served_while_refreshing(
+    hass: HomeAssistant, aldes_cloud, hass_storage
+) -> None:
+    """Setup does not wait for the cloud, the background refresh catches up."""
+    aldes_cloud.delays["products"] = [0.2]
+    entry = mock_config_entry()
+    entry.add_to_hass(hass)
+    _store_snapshot(hass_storage, entry, age=60)
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    assert coordinator.stale
+    assert 60 <= coordinator.snapshot_age < 70
+    assert hass.states.get(SENSOR).state == "17.0"
+
+    refreshed = asyncio.Event()
+    entry.async_on_unload(coordinator.async_add_listener(refreshed.set))
+    await asyncio.wait_for(refreshed.wait(), 5)
+
+    assert not coordinator.stale
+    assert coordinator.snapshot_age < 10
+    assert aldes_cloud.calls["products"] == 1
+    assert hass.states.get(SENSOR).state == "19.5"
+    await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_expired_snapshot_is_ignored(
+    hass: HomeAssistant, aldes_cloud, hass_storage
+) -> None:
+    """A snapshot older than the maximum age is replaced by a live refresh."""
+    entry = mock_config_entry()
+    entry.add_to_hass(hass)
+    _store_snapshot(hass_storage, entry, age=DEFAULT_SNAPSHOT_MAX_AGE + 60)
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    assert not coordinator.stale
+    assert aldes_cloud.calls["products"] == 1
+    assert hass.states.get(SENSOR).state == "19.5"
+    await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_refreshed_snapshot_is_saved(
+    hass: HomeAssistant, config_entry, hass_storage
+) -> None:
+    """A changed snapshot is persisted once the save delay has passed."""
+    key = f"{DOMAIN}.{config_entry.entry_id}.snapshot"
+    assert key not in hass_storage
+
+    async_fire_time_changed(
+        hass, dt_util.utcnow() + timedelta(seconds=SNAPSHOT_SAVE_DELAY + 1)
+    )
+    await hass.async_block_till_done()
+
+    saved = hass_storage[key]["data"]
+    assert saved["products"][0]["serial_number"] == "SERIAL1"
+    assert time.time() - saved["saved_at"] < 10
@@ -0,0 +1,56 @@
+"""Tests for the deadband filtering of sensor state writes."""
+from __future__ import annotations
+
+from custom_components.aldes.deadband import AldesStateFilter
+
+
+def test_small_changes_are_withheld() -> None:
+    """Values within the deadband of the last write are not written."""
+    state_filter = AldesStateFilter(deadband=0.2, hysteresis=0.1)
+    state_filter.reset(20.0, 0)
+
+    assert not state_filter.accept(20.1, 1)
+    assert state_filter.accept(20.2, 2)
+    assert not state_filter.accept(20.2, 3)
+
+
+def test_turning_back_needs_the_hysteresis() -> None:
+    """A change of direction must clear the deadband plus hysteresis."""
+    state_filter = AldesStateFilter(deadband=0.2, hysteresis=0.1)
+    state_filter.reset(20.0, 0)
+    assert state_filter.accept(20.5, 1)
+
+    assert not state_filter.accept(20.3, 2)
+    assert state_filter.accept(20.2, 3)
+
+
+def test_non_numeric_values_are_written_when_they_change() -> None:
+    """Text values only need to differ."""
+    state_filter = AldesStateFilter(deadband=1)
+    state_filter.reset("Humidity", 0)
+
+    assert not state_filter.accept("Humidity", 1)
+    assert state_filter.accept("CO2", 2)
+
+
+def test_value_within_min_interval_is_deferred() -> None:
+    """A value held back only by min_interval is kept for a later write."""
+    state_filter = AldesStateFilter(deadband=0.2, min_interval=60)
+    state_filter.reset(20.0, 0)
+
+    assert not state_filter.accept(21.0, 10)
+    assert state_filter.deferred == 21.0
+    assert state_filter.remaining(10) == 50
+
+    assert state_filter.accept(state_filter.deferred, 60)
+    assert state_filter.deferred is None
+
+
+def test_deferred_value_is_dropped_when_the_change_reverts() -> None:
+    """A later value back within the deadband cancels the deferred write."""
+    state_filter = AldesStateFilter(deadband=0.2, min_interval=60)
+    state_filter.reset(20.0, 0)
+    state_filter.accept(21.0, 10)
+
+    assert not state_filter.accept(20.1, 20)
+    assert state_filter.deferred is None
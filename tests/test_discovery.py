@@ -0,0 +1,91 @@
+"""Tests for the discovery of Aldes products between refreshes."""
+from __future__ import annotations
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+
+from custom_components.aldes.const import DOMAIN
+
+from .conftest import tone_air_product
+
+TWO_PRODUCTS = {"tone_air": 2}
+
+
+def _serials(hass: HomeAssistant, entry) -> set[str]:
+    """Return the serial numbers of the products with a device."""
+    return {
+        identifier
+        for device in dr.async_entries_for_config_entry(
+            dr.async_get(hass), entry.entry_id
+        )
+        for domain, identifier in device.identifiers
+        if domain == DOMAIN and str(identifier).startswith("SERIAL")
+    }
+
+
+def _entities(hass: HomeAssistant, entry, serial_number: str) -> list:
+    """Return the registry entries of the entities of a product."""
+    return [
+        registry_entry
+        for registry_entry in er.async_entries_for_config_entry(
+            er.async_get(hass), entry.entry_id
+        )
+        if serial_number in registry_entry.unique_id
+    ]
+
+
+@pytest.mark.parametrize("cloud", [TWO_PRODUCTS], indirect=True)
+async def test_vanished_product_is_removed(
+    hass: HomeAssistant, config_entry, cloud
+) -> None:
+    """A product gone from the account loses its entities and device."""
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    assert _entities(hass, config_entry, "SERIAL2")
+    del cloud.products[1]
+
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert _serials(hass, config_entry) == {"SERIAL1"}
+    assert not _entities(hass, config_entry, "SERIAL2")
+    assert _entities(hass, config_entry, "SERIAL1")
+    assert coordinator.discovery.removed > 0
+
+
+@pytest.mark.parametrize("cloud", [TWO_PRODUCTS], indirect=True)
+async def test_empty_payload_removes_nothing(
+    hass: HomeAssistant, config_entry, cloud
+) -> None:
+    """An empty products list is taken for a glitch, not an emptied account."""
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    entities = len(
+        er.async_entries_for_config_entry(er.async_get(hass), config_entry.entry_id)
+    )
+    cloud.products = []
+
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert _serials(hass, config_entry) == {"SERIAL1", "SERIAL2"}
+    assert entities == len(
+        er.async_entries_for_config_entry(er.async_get(hass), config_entry.entry_id)
+    )
+    assert coordinator.discovery.removed == 0
+
+
+@pytest.mark.parametrize("cloud", [TWO_PRODUCTS], indirect=True)
+async def test_replaced_product_is_removed_and_its_successor_added(
+    hass: HomeAssistant, config_entry, cloud
+) -> None:
+    """A swap keeps the product count, yet the old product is still pruned."""
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    cloud.products[1] = tone_air_product(3)
+
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert _serials(hass, config_entry) == {"SERIAL1", "SERIAL3"}
+    assert not _entities(hass, config_entry, "SERIAL2")
+    assert _entities(hass, config_entry, "SERIAL3")
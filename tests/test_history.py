@@ -0,0 +1,56 @@
+"""Tests for the history of the Aldes probes."""
+from __future__ import annotations
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.aldes.const import DOMAIN
+from custom_components.aldes.history import AldesHistory
+from custom_components.aldes.models import decode_products
+from custom_components.aldes.sensor import TREND_SENSORS, AldesTrendSensorEntity
+
+from .conftest import make_products
+
+
+def test_removed_products_and_thermostats_lose_their_history() -> None:
+    """A vanished product drops every probe, a thermostat only its own."""
+    products = decode_products(make_products(tone_air=1, easy_home=1, thermostats=12))
+    history = AldesHistory()
+    history.record(products, 0)
+
+    history.remove(["SERIAL2", ("SERIAL1", 1)])
+
+    assert history.get("SERIAL1", 1) is None
+    assert history.get("SERIAL1", 12) is not None
+    assert not [key for key in history.probes if key.startswith("SERIAL2:")]
+
+
+@pytest.mark.parametrize("cloud", [{"tone_air": 2}], indirect=True)
+async def test_discovery_prunes_the_history_of_vanished_products(
+    hass: HomeAssistant, config_entry, cloud
+) -> None:
+    """A product gone from the account no longer keeps a history."""
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    assert coordinator.history.get("SERIAL2", 3) is not None
+    del cloud.products[1]
+
+    await coordinator.async_refresh()
+
+    assert coordinator.history.get("SERIAL2", 3) is None
+    assert coordinator.history.get("SERIAL1", 1) is not None
+
+
+async def test_trend_sensors_get_every_update(
+    hass: HomeAssistant, config_entry
+) -> None:
+    """Trend sensors follow the history rather than their thermostat."""
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    product = coordinator.index.products["SERIAL1"]
+
+    sensor = AldesTrendSensorEntity(
+        coordinator, config_entry, product, 1, TREND_SENSORS["rate"]
+    )
+
+    assert sensor.coordinator_context is None
+    assert sensor.index_key == ("SERIAL1", 1)
@@ -0,0 +1,151 @@
+"""Tests for the setup and unload of Aldes config entries."""
+from __future__ import annotations
+
+import asyncio
+from statistics import median
+import time
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+
+from custom_components.aldes.const import (
+    CONF_TOKEN,
+    CONF_USERNAME,
+    DEFAULT_SCAN_INTERVAL,
+    DOMAIN,
+    STAGGER_STEP,
+)
+
+from .conftest import make_products, mock_config_entry
+
+CLOUD_LATENCY = 0.02
+
+
+async def test_failed_setup_stops_the_token_refresh(
+    hass: HomeAssistant, aldes_cloud
+) -> None:
+    """A setup retried later leaves no token refresh running behind it.
+
+    A scheduled refresh left by the failed attempt would fail the test as a
+    lingering timer.
+    """
+    aldes_cloud.statuses["products"] = [500] * 10
+    entry = mock_config_entry()
+    entry.add_to_hass(hass)
+
+    assert not await hass.config_entries.async_setup(entry.entry_id)
+
+    assert entry.state is ConfigEntryState.SETUP_RETRY
+    assert aldes_cloud.calls["token"] == 1
+    assert not hass.data.get("aldes")
+
+
+async def test_failed_setup_with_a_saved_token_stops_its_refresh(
+    hass: HomeAssistant, aldes_cloud
+) -> None:
+    """A restored token is not refreshed after the setup failed."""
+    aldes_cloud.statuses["products"] = [500] * 10
+    aldes_cloud.tokens["saved"] = ("user1@example.com", time.monotonic() + 3600)
+    entry = mock_config_entry(
+        data={CONF_TOKEN: {"access_token": "saved", "expires_at": time.time() + 3600}}
+    )
+    entry.add_to_hass(hass)
+
+    assert not await hass.config_entries.async_setup(entry.entry_id)
+
+    assert entry.state is ConfigEntryState.SETUP_RETRY
+    assert aldes_cloud.calls["token"] == 0
+    assert aldes_cloud.calls["products"] > 0
+
+
+async def _async_setup_accounts(hass: HomeAssistant, cloud, count: int) -> list:
+    """Set up accounts concurrently, as at startup, and return their entries."""
+    entries = []
+    for number in range(1, count + 1):
+        entry = mock_config_entry(number)
+        entry.add_to_hass(hass)
+        entries.append(entry)
+        cloud.accounts[entry.data[CONF_USERNAME]] = make_products(
+            tone_air=1, easy_home=1, first=2 * number - 1
+        )
+    assert all(
+        await asyncio.gather(
+            *(hass.config_entries.async_setup(entry.entry_id) for entry in entries)
+        )
+    )
+    await hass.async_block_till_done()
+    return entries
+
+
+async def _async_unload(hass: HomeAssistant, entries) -> None:
+    """Unload the given entries."""
+    for entry in entries:
+        assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_accounts_set_up_together_are_staggered(
+    hass: HomeAssistant, aldes_cloud
+) -> None:
+    """Each account set up at startup polls in its own slot."""
+    entries = await _async_setup_accounts(hass, aldes_cloud, 3)
+
+    intervals = [
+        hass.data[DOMAIN][entry.entry_id].scheduler.interval for entry in entries
+    ]
+
+    assert intervals == [
+        DEFAULT_SCAN_INTERVAL,
+        DEFAULT_SCAN_INTERVAL + STAGGER_STEP,
+        DEFAULT_SCAN_INTERVAL + 2 * STAGGER_STEP,
+    ]
+    await _async_unload(hass, entries)
+
+
+async def _async_refresh_latencies(hass: HomeAssistant, cloud, count: int) -> list:
+    """Return the refresh time of each of count accounts polling in turn."""
+    entries = await _async_setup_accounts(hass, cloud, count)
+    cloud.delays["products"] = [CLOUD_LATENCY] * count
+    latencies = []
+    for entry in entries:
+        coordinator = hass.data[DOMAIN][entry.entry_id]
+        for product in cloud.accounts[entry.data[CONF_USERNAME]]:
+            for thermostat in product["indicator"].get("thermostats", ()):
+                thermostat["CurrentTemperature"] += 1
+        started = time.perf_counter()
+        await coordinator.async_refresh()
+        latencies.append(time.perf_counter() - started)
+    await _async_unload(hass, entries)
+    return latencies
+
+
+async def test_refresh_latency_does_not_grow_with_accounts(
+    hass: HomeAssistant, aldes_cloud
+) -> None:
+    """Refreshing one account costs the same with 1 or 50 accounts set up.
+
+    Staggered accounts poll in turn, each through the shared session.
+    """
+    alone = median(await _async_refresh_latencies(hass, aldes_cloud, 1))
+    aldes_cloud.accounts.clear()
+
+    among_many = median(await _async_refresh_latencies(hass, aldes_cloud, 50))
+
+    assert among_many < 2 * alone
+
+
+async def test_hub_names_do_not_include_the_account_email(
+    hass: HomeAssistant, config_entry
+) -> None:
+    """The account device and its sensors are named without the email."""
+    device = dr.async_get(hass).async_get_device({(DOMAIN, config_entry.entry_id)})
+    hub_entities = er.async_entries_for_device(
+        er.async_get(hass), device.id, include_disabled_entities=True
+    )
+
+    assert device.name == "Aldes account"
+    assert hub_entities
+    for entity in hub_entities:
+        assert "example" not in entity.entity_id
+        assert entity.entity_id.startswith("sensor.aldes_account_")
@@ -0,0 +1,70 @@
+"""Tests for the decoding of the Aldes products payload."""
+from __future__ import annotations
+
+import copy
+
+import pytest
+
+from custom_components.aldes.models import (
+    AldesDecodeError,
+    decode_products,
+    encode_products,
+)
+
+from .conftest import PRODUCTS, easy_home_product
+
+
+def test_encoded_products_decode_to_the_same_records() -> None:
+    """The persisted snapshot shape round-trips."""
+    products = decode_products(PRODUCTS)
+
+    assert decode_products(encode_products(products)) == products
+
+
+def test_payload_must_be_a_list() -> None:
+    """An error object from the cloud is not mistaken for products."""
+    with pytest.raises(AldesDecodeError):
+        decode_products({"error": "maintenance"})
+
+
+@pytest.mark.parametrize(
+    ("path", "value"),
+    [
+        (("serial_number",), None),
+        (("indicator", "TmpCu"), "215"),
+        (("indicator", "CO2"), True),
+        (("indicator", "Qai"), []),
+        (("indicator", "thermostats", 0, "ThermostatId"), "1"),
+        (("indicator", "thermostats", 0, "Name"), 3),
+        (("indicators", 0, "value"), 1),
+    ],
+)
+def test_mistyped_fields_are_refused(path, value) -> None:
+    """Fields of the wrong type raise instead of reaching the platforms."""
+    products = copy.deepcopy(PRODUCTS)
+    target = products[0]
+    for key in path[:-1]:
+        target = target[key]
+    target[path[-1]] = value
+
+    with pytest.raises(AldesDecodeError, match="SERIAL1|0"):
+        decode_products(products)
+
+
+def test_missing_optional_fields_decode_as_none() -> None:
+    """Measurements a product does not report are None."""
+    [product] = decode_products(PRODUCTS)
+
+    assert product.indicator.tmp_cu is None
+    assert product.indicator.qai is None
+
+
+def test_easy_home_product_decodes_its_probes() -> None:
+    """An EASYHOME product has probes and air quality but no thermostats."""
+    [product] = decode_products([easy_home_product(1)])
+
+    assert product.indicator.tmp_cu == 215
+    assert product.indicator.co2 == 640
+    assert product.indicator.qai.polluant_dominant == "hr"
+    assert not product.has_thermostats
+    assert product.indicator.thermostats == ()
@@ -0,0 +1,82 @@
+"""Tests for the adaptive polling of the Aldes coordinator."""
+from __future__ import annotations
+
+from datetime import timedelta
+
+import pytest
+
+from custom_components.aldes.polling import (
+    BURST_POLLS,
+    MAX_BACKOFF_EXPONENT,
+    STRETCH_FACTOR,
+    AldesPollScheduler,
+)
+
+
+@pytest.fixture
+def scheduler() -> AldesPollScheduler:
+    """Return a scheduler polling every 300 s within [30, 1800]."""
+    return AldesPollScheduler(300, 30, 1800)
+
+
+def test_default_interval_is_clamped() -> None:
+    """The default interval respects the configured bounds."""
+    assert AldesPollScheduler(10, 30, 1800).interval == 30
+    assert AldesPollScheduler(5000, 30, 1800).interval == 1800
+
+
+def test_command_burst_polls_fast_then_resumes(scheduler) -> None:
+    """A command triggers a few polls at the minimum interval."""
+    assert scheduler.on_command() == timedelta(seconds=30)
+    for _ in range(BURST_POLLS):
+        assert scheduler.on_success(True, now=0).total_seconds() == 30
+        assert scheduler.decision == "command burst"
+
+    assert scheduler.on_success(True, now=0).total_seconds() == 300
+
+
+def test_unchanged_payloads_stretch_the_interval(scheduler) -> None:
+    """The interval grows while nothing changes, and resets on a change."""
+    assert scheduler.on_success(False, now=0).total_seconds() == 300 * STRETCH_FACTOR
+    assert scheduler.on_success(False, now=0).total_seconds() == pytest.approx(
+        300 * STRETCH_FACTOR**2
+    )
+    for _ in range(20):
+        scheduler.on_success(False, now=0)
+    assert scheduler.interval == 1800
+
+    assert scheduler.on_success(True, now=0).total_seconds() == 300
+
+
+def test_failures_back_off_exponentially(scheduler) -> None:
+    """Failures double the interval up to the maximum."""
+    assert scheduler.on_failure().total_seconds() == 600
+    assert scheduler.on_failure().total_seconds() == 1200
+    for _ in range(MAX_BACKOFF_EXPONENT):
+        scheduler.on_failure()
+    assert scheduler.interval == 1800
+    assert scheduler.decision == "backoff"
+
+    scheduler.on_success(True, now=0)
+    assert scheduler.failures == 0
+
+
+def test_offset_delays_only_the_first_poll() -> None:
+    """The stagger offset is added once."""
+    scheduler = AldesPollScheduler(300, 30, 1800, offset=7)
+
+    assert scheduler.on_success(True, now=0).total_seconds() == 307
+    assert scheduler.decision == "changed, staggered"
+    assert scheduler.on_success(True, now=0).total_seconds() == 300
+
+
+def test_polls_lock_onto_the_upstream_cadence(scheduler) -> None:
+    """Regular upstream changes make the next poll land just after them."""
+    for change in (0, 120, 240, 360):
+        scheduler.on_success(True, now=change)
+
+    assert scheduler.cadence == 120
+    interval = scheduler.on_success(False, now=400).total_seconds()
+
+    assert scheduler.decision == "phase lock"
+    assert interval == pytest.approx(480 + 12 - 400)
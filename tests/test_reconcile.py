@@ -0,0 +1,188 @@
+"""Tests for the reconciliation of Aldes commands."""
+from __future__ import annotations
+
+import asyncio
+import copy
+import time
+
+import pytest
+
+from custom_components.aldes import confirm, reconcile
+from custom_components.aldes.coordinator import AldesIndex
+from custom_components.aldes.models import decode_products
+from custom_components.aldes.reconcile import AldesReconciler
+
+from .conftest import PRODUCTS
+
+
+class FakeApi:
+    """Record the commands sent to the cloud."""
+
+    def __init__(self) -> None:
+        self.modes: list[tuple[str, str]] = []
+        self.setpoints: list[tuple[str, int, int]] = []
+        self.fail = False
+
+    async def set_mode(self, modem: str, option: str) -> None:
+        if self.fail:
+            raise ConnectionError("cloud unavailable")
+        self.modes.append((modem, option))
+
+    async def set_target_temperature(self, modem, thermostat_id, name, temperature):
+        self.setpoints.append((modem, thermostat_id, temperature))
+
+
+class FakeHass:
+    """Run background tasks on the current loop."""
+
+    def async_create_task(self, target):
+        return asyncio.get_running_loop().create_task(target)
+
+
+class FakeCoordinator:
+    """Just what the reconciler reads from the coordinator."""
+
+    def __init__(self) -> None:
+        self.hass = FakeHass()
+        self.api = FakeApi()
+        self.index = _index()
+        self.stale = False
+        self.snapshot_age: float | None = 10
+
+
+def _index(mode: str = "V", setpoint: int = 20) -> AldesIndex:
+    """Index the sample products with a mode and a first thermostat setpoint."""
+    products = copy.deepcopy(PRODUCTS)
+    products[0]["indicators"] = [{"type": "MODE", "value": mode}]
+    products[0]["indicator"]["thermostats"][0]["TemperatureSet"] = setpoint
+    return AldesIndex(decode_products(products))
+
+
+@pytest.fixture
+def coordinator() -> FakeCoordinator:
+    """Return a coordinator with a fresh snapshot."""
+    return FakeCoordinator()
+
+
+async def test_command_matching_a_fresh_snapshot_is_suppressed(coordinator) -> None:
+    """Asking for the mode and setpoint already reported sends nothing."""
+    reconciler = AldesReconciler(coordinator)
+
+    assert not await reconciler.async_set_mode("SERIAL1", "Daily")
+    assert not await reconciler.async_set_setpoint("SERIAL1", 1, 20)
+
+    assert coordinator.api.modes == []
+    assert coordinator.api.setpoints == []
+    assert reconciler.suppressed == 2
+
+
+async def test_repeated_command_is_sent_once(coordinator) -> None:
+    """A second request for a pending state is suppressed."""
+    reconciler = AldesReconciler(coordinator)
+
+    assert await reconciler.async_set_mode("SERIAL1", "Boost")
+    assert not await reconciler.async_set_mode("SERIAL1", "Boost")
+
+    assert coordinator.api.modes == [("MODEM1", "Boost")]
+    assert reconciler.pending == 1
+
+
+async def test_rejected_command_can_be_asked_for_again(
+    coordinator, monkeypatch
+) -> None:
+    """Once its confirmation window closed, a pending state is sent again."""
+    reconciler = AldesReconciler(coordinator)
+    assert await reconciler.async_set_mode("SERIAL1", "Boost")
+    later = time.monotonic() + sum(confirm.VERIFICATION_DELAYS) + 1
+    monkeypatch.setattr(time, "monotonic", lambda: later)
+
+    assert await reconciler.async_set_mode("SERIAL1", "Boost")
+
+    assert coordinator.api.modes == [("MODEM1", "Boost"), ("MODEM1", "Boost")]
+    assert reconciler.pending == 1
+
+
+@pytest.mark.parametrize(
+    ("stale", "age"),
+    [(True, 10), (False, reconcile.MAX_SNAPSHOT_AGE + 1), (False, None)],
+)
+async def test_commands_are_sent_when_the_snapshot_is_not_fresh(
+    coordinator, stale, age
+) -> None:
+    """A stale or old snapshot may miss changes made from the Aldes app."""
+    coordinator.stale = stale
+    coordinator.snapshot_age = age
+    reconciler = AldesReconciler(coordinator)
+
+    assert await reconciler.async_set_mode("SERIAL1", "Daily")
+    assert coordinator.api.modes == [("MODEM1", "Daily")]
+
+
+async def test_failed_command_is_forgotten(coordinator) -> None:
+    """A command that failed can be asked for again."""
+    reconciler = AldesReconciler(coordinator)
+    coordinator.api.fail = True
+
+    with pytest.raises(ConnectionError):
+        await reconciler.async_set_mode("SERIAL1", "Boost")
+    assert reconciler.pending == 0
+
+    coordinator.api.fail = False
+    assert await reconciler.async_set_mode("SERIAL1", "Boost")
+
+
+async def test_reached_state_is_forgotten(coordinator) -> None:
+    """Once a snapshot shows the state, later changes are left alone."""
+    reconciler = AldesReconciler(coordinator)
+    await reconciler.async_set_setpoint("SERIAL1", 1, 22)
+
+    coordinator.index = _index(setpoint=22)
+    reconciler.reconcile(coordinator.index, None)
+    assert reconciler.pending == 0
+
+    coordinator.index = _index(setpoint=19)
+    reconciler.reconcile(coordinator.index, None)
+    await asyncio.sleep(0)
+    assert coordinator.api.setpoints == [("MODEM1", 1, 22)]
+
+
+async def test_drifted_state_is_sent_again_a_bounded_number_of_times(
+    coordinator, monkeypatch
+) -> None:
+    """A changed snapshot still contradicting the state triggers a resend."""
+    monkeypatch.setattr(reconcile, "REAPPLY_DELAY", 0)
+    reconciler = AldesReconciler(coordinator)
+    await reconciler.async_set_mode("SERIAL1", "Boost")
+
+    for _ in range(reconcile.MAX_REAPPLY + 2):
+        reconciler.reconcile(coordinator.index, {"SERIAL1"})
+        await asyncio.sleep(0)
+
+    assert len(coordinator.api.modes) == 1 + reconcile.MAX_REAPPLY
+    assert reconciler.reapplied == reconcile.MAX_REAPPLY
+    assert reconciler.pending == 0
+
+
+async def test_unchanged_snapshot_does_not_resend(coordinator, monkeypatch) -> None:
+    """Only snapshots where the product changed are acted upon."""
+    monkeypatch.setattr(reconcile, "REAPPLY_DELAY", 0)
+    reconciler = AldesReconciler(coordinator)
+    await reconciler.async_set_mode("SERIAL1", "Boost")
+
+    reconciler.reconcile(coordinator.index, set())
+    await asyncio.sleep(0)
+
+    assert len(coordinator.api.modes) == 1
+    assert reconciler.pending == 1
+
+
+async def test_expired_state_is_dropped(coordinator, monkeypatch) -> None:
+    """Desired states are forgotten after their time to live."""
+    reconciler = AldesReconciler(coordinator)
+    await reconciler.async_set_mode("SERIAL1", "Boost")
+    later = time.monotonic() + reconcile.DESIRED_STATE_TTL
+    monkeypatch.setattr(time, "monotonic", lambda: later)
+
+    reconciler.reconcile(coordinator.index, None)
+
+    assert reconciler.pending == 0
@@ -0,0 +1,110 @@
+"""Tests for the Aldes retry policy and circuit breaker."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+import time
+
+import pytest
+
+from custom_components.aldes.resilience import (
+    AldesCircuitBreaker,
+    AldesRetryPolicy,
+    CircuitOpenException,
+    parse_retry_after,
+)
+
+
+def test_retry_delays_stay_within_the_jittered_backoff() -> None:
+    """Each attempt waits at most the capped exponential delay."""
+    policy = AldesRetryPolicy(attempts=5, base_delay=0.5, max_delay=2)
+
+    for attempt, ceiling in enumerate((0.5, 1, 2, 2)):
+        for _ in range(50):
+            assert 0 <= policy.delay(attempt) <= ceiling
+    assert policy.delay(4) is None
+
+
+def test_retry_after_is_honoured_up_to_the_maximum_delay() -> None:
+    """A short Retry-After is used as is, a long one gives up."""
+    policy = AldesRetryPolicy(attempts=3, max_delay=5)
+
+    assert policy.delay(0, "3") == 3
+    assert policy.delay(0, "60") is None
+    assert 0 <= policy.delay(0, "soon") <= policy.base_delay
+
+
+def test_parse_retry_after() -> None:
+    """Retry-After is accepted in seconds or as an HTTP date."""
+    assert parse_retry_after("7") == 7
+    assert parse_retry_after("-3") == 0
+    assert parse_retry_after("not a date") is None
+    in_ten = format_datetime(
+        datetime.now(timezone.utc) + timedelta(seconds=10), usegmt=True
+    )
+    assert 8 <= parse_retry_after(in_ten) <= 10
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Control time.monotonic as seen by the circuit breaker."""
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_circuit_opens_after_repeated_failures(clock) -> None:
+    """Calls are rejected once the failure threshold is reached."""
+    breaker = AldesCircuitBreaker(failure_threshold=3, reset_timeout=60)
+
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenException):
+        breaker.before_call()
+
+
+def test_half_open_lets_a_single_trial_through(clock) -> None:
+    """After the reset timeout, one trial call passes and others wait."""
+    breaker = AldesCircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    clock[0] += 60
+
+    assert breaker.state == "half_open"
+    breaker.before_call()
+    with pytest.raises(CircuitOpenException):
+        breaker.before_call()
+
+
+def test_successful_trial_closes_the_circuit(clock) -> None:
+    """A success resets the failure count and closes the circuit."""
+    breaker = AldesCircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    clock[0] += 60
+    breaker.before_call()
+
+    breaker.record_success()
+
+    assert breaker.state == "closed"
+    assert breaker.failures == 0
+    breaker.before_call()
+
+
+def test_failed_trial_reopens_the_circuit(clock) -> None:
+    """A failed trial keeps rejecting calls for another reset timeout."""
+    breaker = AldesCircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    clock[0] += 60
+    breaker.before_call()
+
+    breaker.record_failure()
+
+    assert breaker.state == "open"
+    clock[0] += 59
+    assert breaker.state == "open"
+    clock[0] += 1
+    assert breaker.state == "half_open"
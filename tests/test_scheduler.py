@@ -0,0 +1,153 @@
+"""Tests for the Aldes request scheduler."""
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from custom_components.aldes.scheduler import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_CONFIRMATION,
+    PRIORITY_INTERACTIVE,
+    AldesRequestScheduler,
+    TokenBucket,
+)
+
+HOST = "aldes.example"
+
+
+async def _hold(scheduler, priority, started, release, name) -> None:
+    """Hold a slot until release is set, recording when it was granted."""
+    async with scheduler.slot(HOST, priority):
+        started.append(name)
+        await release.wait()
+
+
+async def test_waiting_requests_start_by_priority() -> None:
+    """A command queued last still starts before confirmations and polls."""
+    scheduler = AldesRequestScheduler(concurrency=1, reserved=0, rate=1000)
+    started: list[str] = []
+    release = asyncio.Event()
+    busy = asyncio.create_task(
+        _hold(scheduler, PRIORITY_BACKGROUND, started, release, "busy")
+    )
+    await asyncio.sleep(0)
+    tasks = [
+        asyncio.create_task(_hold(scheduler, priority, started, release, name))
+        for priority, name in (
+            (PRIORITY_BACKGROUND, "poll"),
+            (PRIORITY_CONFIRMATION, "confirmation"),
+            (PRIORITY_INTERACTIVE, "command"),
+        )
+    ]
+    await asyncio.sleep(0)
+    assert scheduler.queue_depth == {
+        "interactive": 1,
+        "confirmation": 1,
+        "background": 1,
+    }
+
+    release.set()
+    await asyncio.gather(busy, *tasks)
+
+    assert started == ["busy", "command", "confirmation", "poll"]
+    assert scheduler.in_flight == 0
+
+
+async def test_reserved_slot_is_kept_for_commands() -> None:
+    """Polls cannot take the reserved slot, commands start at once."""
+    scheduler = AldesRequestScheduler(concurrency=3, reserved=1, rate=1000)
+    started: list[str] = []
+    release = asyncio.Event()
+    polls = [
+        asyncio.create_task(
+            _hold(scheduler, PRIORITY_BACKGROUND, started, release, f"poll{i}")
+        )
+        for i in range(3)
+    ]
+    await asyncio.sleep(0)
+    assert started == ["poll0", "poll1"]
+    assert not scheduler.has_free_slot(HOST, PRIORITY_BACKGROUND)
+    assert scheduler.has_free_slot(HOST, PRIORITY_INTERACTIVE)
+
+    began = time.monotonic()
+    async with scheduler.slot(HOST, PRIORITY_INTERACTIVE) as waited:
+        assert time.monotonic() - began < 0.05
+        assert waited < 0.05
+
+    release.set()
+    await asyncio.gather(*polls)
+    assert started == ["poll0", "poll1", "poll2"]
+
+
+async def test_rate_limit_delays_requests_past_the_burst() -> None:
+    """Requests beyond the bucket burst wait for tokens to refill."""
+    scheduler = AldesRequestScheduler(concurrency=10, rate=20, burst=2)
+    waits = []
+    for _ in range(4):
+        async with scheduler.slot(HOST, PRIORITY_BACKGROUND) as waited:
+            waits.append(waited)
+
+    assert waits[0] < 0.01
+    assert waits[1] < 0.01
+    assert waits[2] >= 0.03
+    assert waits[3] >= 0.03
+
+
+async def test_cancelled_waiter_does_not_leak_a_slot() -> None:
+    """A request cancelled while queued leaves the slot for the next one."""
+    scheduler = AldesRequestScheduler(concurrency=1, reserved=0, rate=1000)
+    started: list[str] = []
+    release = asyncio.Event()
+    busy = asyncio.create_task(
+        _hold(scheduler, PRIORITY_BACKGROUND, started, release, "busy")
+    )
+    await asyncio.sleep(0)
+    cancelled = asyncio.create_task(
+        _hold(scheduler, PRIORITY_BACKGROUND, started, release, "cancelled")
+    )
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+
+    release.set()
+    await busy
+    async with scheduler.slot(HOST, PRIORITY_BACKGROUND):
+        assert scheduler.in_flight == 1
+    assert scheduler.in_flight == 0
+    assert started == ["busy"]
+
+
+async def test_close_cancels_waiting_requests() -> None:
+    """Closing the scheduler cancels the requests still queued."""
+    scheduler = AldesRequestScheduler(concurrency=1, reserved=0, rate=1000)
+    release = asyncio.Event()
+    busy = asyncio.create_task(
+        _hold(scheduler, PRIORITY_BACKGROUND, [], release, "busy")
+    )
+    await asyncio.sleep(0)
+    waiting = asyncio.create_task(
+        _hold(scheduler, PRIORITY_BACKGROUND, [], release, "waiting")
+    )
+    await asyncio.sleep(0)
+
+    scheduler.close()
+
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    release.set()
+    await busy
+
+
+def test_token_bucket_refills_at_its_rate(monkeypatch) -> None:
+    """An empty bucket reports the wait until its next token."""
+    now = 100.0
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+    bucket = TokenBucket(rate=2, capacity=1)
+
+    assert bucket.take() == 0
+    assert bucket.take() == pytest.approx(0.5)
+    now += 0.5
+    assert bucket.take() == 0
@@ -0,0 +1,67 @@
+"""Tests for the Aldes mode select."""
+from __future__ import annotations
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+
+from custom_components.aldes import confirm
+from custom_components.aldes.const import DOMAIN
+
+
+@pytest.fixture
+def entity_id(hass: HomeAssistant, config_entry, monkeypatch) -> str:
+    """Return the mode select of the first product, confirming quickly."""
+    monkeypatch.setattr(confirm, "VERIFICATION_DELAYS", (0, 0, 0))
+    return er.async_get(hass).async_get_entity_id(
+        "select", DOMAIN, "T.One® AIR_SERIAL1_mode"
+    )
+
+
+async def _async_select(hass: HomeAssistant, entity_id: str, option: str) -> None:
+    """Select a mode and wait for its confirmation."""
+    await hass.services.async_call(
+        "select",
+        "select_option",
+        {"entity_id": entity_id, "option": option},
+        blocking=True,
+    )
+    await hass.async_block_till_done()
+
+
+async def test_mode_changed_from_the_app_is_shown(
+    hass: HomeAssistant, config_entry, cloud, entity_id
+) -> None:
+    """The select follows the mode the product reports."""
+    cloud.products[0]["indicators"] = [{"type": "MODE", "value": "Y"}]
+
+    await hass.data[DOMAIN][config_entry.entry_id].async_refresh()
+
+    assert hass.states.get(entity_id).state == "Boost"
+
+
+async def test_rejected_mode_is_reverted_and_sent_again(
+    hass: HomeAssistant, cloud, entity_id
+) -> None:
+    """A forced product keeps its mode, and asking again sends the command."""
+    cloud.apply_commands = False
+    mode = hass.states.get(entity_id).state
+
+    await _async_select(hass, entity_id, "Boost")
+    assert hass.states.get(entity_id).state == mode
+
+    await _async_select(hass, entity_id, "Boost")
+    assert cloud.calls["commands"] == 2
+
+
+async def test_suppressed_mode_writes_no_state(
+    hass: HomeAssistant, cloud, entity_id
+) -> None:
+    """Asking for the mode already reported neither sends nor writes."""
+    state = hass.states.get(entity_id)
+
+    await _async_select(hass, entity_id, state.state)
+
+    assert cloud.calls["commands"] == 0
+    assert hass.states.get(entity_id).last_updated == state.last_updated
@@ -0,0 +1,60 @@
+"""Tests for the compiled accessors of the Aldes sensors."""
+from __future__ import annotations
+
+import pytest
+
+from custom_components.aldes.models import decode_products
+from custom_components.aldes.sensor import SENSORS_BY_REFERENCE, _compiled_sensors
+
+from .conftest import easy_home_product, tone_air_product
+
+PRODUCTS_BY_REFERENCE = {
+    "EASY_HOME_CONNECT": easy_home_product(1),
+    "TONE_AIR": tone_air_product(1),
+}
+
+
+def _read_every_sensor(product) -> dict:
+    """Return the value of every sensor of a product, by name and thermostat."""
+    values = {}
+    for description, accessor in _compiled_sensors(product.reference):
+        if description.path2recursive:
+            for thermostat in product.indicator.thermostats:
+                values[(description.name, thermostat.thermostat_id)] = accessor(
+                    product, thermostat
+                )
+        else:
+            values[(description.name, None)] = accessor(product, None)
+    return values
+
+
+@pytest.mark.parametrize("reference", sorted(SENSORS_BY_REFERENCE))
+def test_every_sensor_resolves_against_a_decoded_product(reference: str) -> None:
+    """Each description of a model reads a value from a product of that model."""
+    [product] = decode_products([PRODUCTS_BY_REFERENCE[reference]])
+
+    values = _read_every_sensor(product)
+
+    assert len(_compiled_sensors(reference)) == len(SENSORS_BY_REFERENCE[reference])
+    assert {name for name, _ in values} == {
+        description.name for description in SENSORS_BY_REFERENCE[reference].values()
+    }
+    assert None not in values.values()
+
+
+@pytest.mark.parametrize("reference", sorted(SENSORS_BY_REFERENCE))
+def test_missing_paths_read_as_none(reference: str) -> None:
+    """A product missing its measurements has sensors without a value."""
+    payload = PRODUCTS_BY_REFERENCE[reference]
+    indicator = {
+        "thermostats": [
+            {"ThermostatId": thermostat["ThermostatId"], "Name": thermostat["Name"]}
+            for thermostat in payload["indicator"].get("thermostats", ())
+        ]
+    }
+    [product] = decode_products([{**payload, "indicator": indicator}])
+
+    values = _read_every_sensor(product)
+
+    assert values
+    assert set(values.values()) == {None}